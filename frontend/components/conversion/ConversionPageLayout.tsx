@@ -195,6 +195,9 @@ export function ConversionPageLayout({
                 status={conversionStatus.status}
                 message={conversionStatus.message}
                 progress={conversionStatus.progress}
+                pagesDone={conversionStatus.pagesDone}
+                pagesTotal={conversionStatus.pagesTotal}
+                etaSeconds={conversionStatus.etaSeconds}
               />
             ) : (
               <div className="text-center py-8 text-muted-foreground">
@@ -14,12 +14,25 @@ interface ConversionStatusProps {
     | "error";
   message?: string;
   progress?: number;
+  pagesDone?: number | null;
+  pagesTotal?: number | null;
+  etaSeconds?: number | null;
+}
+
+function formatEta(seconds: number): string {
+  if (seconds < 60) {
+    return `${Math.ceil(seconds)}s`;
+  }
+  return `${Math.floor(seconds / 60)}m ${Math.ceil(seconds % 60)}s`;
 }
 
 export function ConversionStatus({
   status,
   message,
   progress,
+  pagesDone,
+  pagesTotal,
+  etaSeconds,
 }: ConversionStatusProps) {
   if (status === "idle") {
     return null;
@@ -56,6 +69,13 @@ export function ConversionStatus({
       {progress !== undefined && progress > 0 && (
         <Progress value={progress} className="h-2" />
       )}
+
+      {status !== "completed" && pagesTotal ? (
+        <p className="text-xs text-muted-foreground">
+          Page {pagesDone ?? 0} of {pagesTotal}
+          {etaSeconds ? ` · about ${formatEta(etaSeconds)} remaining` : ""}
+        </p>
+      ) : null}
     </div>
   );
 }
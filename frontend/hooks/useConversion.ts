@@ -1,6 +1,13 @@
-import { useMutation, useQuery } from "@tanstack/react-query";
+import { useEffect, useRef, useState } from "react";
+import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { api, type ConversionResponse, type StatusResponse } from "@/lib/api";
 
+const FINISHED_STATUSES: StatusResponse["status"][] = [
+  "completed",
+  "error",
+  "cancelled",
+];
+
 interface ConversionOptions {
   onSuccess?: (data: ConversionResponse) => void;
   onError?: (error: Error) => void;
@@ -37,14 +44,53 @@ export function useConversionStatus(
   jobId: string | null,
   options?: StatusOptions
 ) {
+  const queryClient = useQueryClient();
+  const enabled = Boolean(jobId) && options?.enabled !== false;
+  // Pushed updates over server-sent events; polling is the fallback
+  const [streaming, setStreaming] = useState(false);
+  const onCompleteRef = useRef(options?.onComplete);
+  onCompleteRef.current = options?.onComplete;
+
+  useEffect(() => {
+    if (!enabled || typeof EventSource === "undefined") {
+      return;
+    }
+
+    const source = new EventSource(api.getStatusStreamUrl(jobId!));
+    setStreaming(true);
+
+    source.addEventListener("status", (event) => {
+      const data: StatusResponse = JSON.parse((event as MessageEvent).data);
+      queryClient.setQueryData(["conversion-status", jobId], data);
+      if (FINISHED_STATUSES.includes(data.status)) {
+        source.close();
+        if (data.status === "completed") {
+          onCompleteRef.current?.(data);
+        }
+      }
+    });
+    source.onerror = () => {
+      // The browser retries dropped connections itself; a closed source
+      // (e.g. the service has no stream endpoint) falls back to polling
+      if (source.readyState === EventSource.CLOSED) {
+        setStreaming(false);
+      }
+    };
+
+    return () => {
+      source.close();
+      setStreaming(false);
+    };
+  }, [jobId, enabled, queryClient]);
+
   const query = useQuery({
     queryKey: ["conversion-status", jobId],
     queryFn: () => api.getStatus(jobId!),
-    enabled: Boolean(jobId) && options?.enabled !== false,
+    enabled: enabled && !streaming,
     refetchInterval: (query) => {
       const data = query.state.data;
-      // Stop polling when completed or error
-      if (data?.status === "completed" || data?.status === "error") {
+      // Stop polling when completed, failed or cancelled
+      if (data && FINISHED_STATUSES.includes(data.status)) {
         if (data.status === "completed") {
           options?.onComplete?.(data);
         }
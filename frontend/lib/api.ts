@@ -26,7 +26,11 @@ async function apiRequest<T>(url: string, options?: RequestInit): Promise<T> {
   });
 
   if (!response.ok) {
-    throw new Error(`HTTP error! status: ${response.status}`);
+    // Rate limits and a full queue explain themselves and say when to retry
+    const body: ApiResponse<T> | null = await response.json().catch(() => null);
+    const message = body?.error?.message || `HTTP error! status: ${response.status}`;
+    const retryAfter = response.headers.get("Retry-After");
+    throw new Error(retryAfter ? `${message}. Try again in ${retryAfter}s.` : message);
   }
 
   const result: ApiResponse<T> = await response.json();
@@ -45,6 +49,13 @@ export interface UploadResponse {
   uploadedAt: string;
 }
 
+export interface BatchUploadResponse {
+  files: UploadResponse[];
+  fileIds: string[];
+  errors: Array<{ filename?: string; code: string; message: string }>;
+  conversion?: ConversionResponse;
+}
+
 export interface ConversionResponse {
   jobId: string;
   status: string;
@@ -53,8 +64,19 @@ export interface ConversionResponse {
 
 export interface StatusResponse {
   jobId: string;
-  status: "pending" | "processing" | "converting" | "completed" | "error";
+  status:
+    | "pending"
+    | "processing"
+    | "converting"
+    | "cancelling"
+    | "completed"
+    | "error"
+    | "cancelled";
   progress: number;
+  pagesDone?: number | null;
+  pagesTotal?: number | null;
+  pagesPerSecond?: number | null;
+  etaSeconds?: number | null;
   message?: string;
   currentFile?: string;
   error?: string;
@@ -63,7 +85,22 @@ export interface StatusResponse {
     filename: string;
     size: number;
   }>;
+  /** Profile files of a job started with `profile: true`, served by the download service */
+  profileFiles?: Array<{
+    fileId: string;
+    filename: string;
+    size: number;
+  }>;
   errors?: string[];
+  pageErrors?: Array<{
+    fileId: string;
+    filename: string;
+    page: number;
+    error: string;
+  }>;
+  /** Count and total milliseconds per pipeline stage, once the job finished */
+  timings?: Record<string, { count: number; ms: number }> | null;
+  version?: number;
 }
 
 export const api = {
@@ -77,11 +114,35 @@ export const api = {
     });
   },
 
+  uploadBatch: async (
+    files: File[],
+    convert?: {
+      parser: "pdfplumber" | "tabula";
+      merge: boolean;
+      outputFormat?: "csv" | "excel" | "json" | "text";
+    }
+  ): Promise<BatchUploadResponse> => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append("files", file));
+    if (convert) {
+      formData.append("convert", "true");
+      formData.append("parser", convert.parser);
+      formData.append("merge", String(convert.merge));
+      formData.append("outputFormat", convert.outputFormat ?? "csv");
+    }
+
+    return apiRequest(`${UPLOAD_SERVICE_URL}/api/upload/batch`, {
+      method: "POST",
+      body: formData,
+    });
+  },
+
   convert: async (params: {
     fileIds: string[];
     parser: "pdfplumber" | "tabula";
     merge: boolean;
     outputFormat?: "csv" | "excel" | "json" | "text";
+    profile?: boolean;
   }): Promise<ConversionResponse> => {
     return apiRequest(`${CONVERSION_SERVICE_URL}/api/convert`, {
       method: "POST",
@@ -94,6 +155,16 @@ export const api = {
     return apiRequest(`${CONVERSION_SERVICE_URL}/api/status/${jobId}`);
   },
 
+  getStatusStreamUrl: (jobId: string): string => {
+    return `${CONVERSION_SERVICE_URL}/api/status/${jobId}/stream`;
+  },
+
+  cancelConversion: async (jobId: string): Promise<ConversionResponse> => {
+    return apiRequest(`${CONVERSION_SERVICE_URL}/api/convert/${jobId}`, {
+      method: "DELETE",
+    });
+  },
+
   download: async (fileId: string, fileName?: string): Promise<void> => {
     const response = await fetch(
       `${DOWNLOAD_SERVICE_URL}/api/download/${fileId}`
@@ -50,9 +50,13 @@ def index():
 
 
 def tables_from_pdf_bytes(pdf_bytes):
-    """Return a list of tables (each table is list-of-rows) extracted from the PDF bytes."""
+    """Return a list of tables (each table is list-of-rows) extracted from the PDF bytes.
+
+    A memory map (or any seekable binary file) is read in place instead of being copied.
+    """
     tables = []
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+    source = pdf_bytes if hasattr(pdf_bytes, 'seek') else io.BytesIO(pdf_bytes)
+    with pdfplumber.open(source) as pdf:
         for page in pdf.pages:
             # extract_tables returns list of tables (each table as list of rows)
             page_tables = page.extract_tables()
@@ -1,4 +1,8 @@
-"""Development script to run all backend services."""
+"""Development script to run all backend services.
+
+With --prod the services run under production servers instead (serve.py);
+the remaining arguments are passed on to it.
+"""
 import subprocess
 import sys
 import os
@@ -9,6 +13,7 @@ def run_service(service_name: str, port: int):
     service_path = Path(__file__).parent.parent / "services" / service_name
     env = os.environ.copy()
     env["FLASK_ENV"] = "development"
+    env["FLASK_DEBUG"] = "1"
     env["PORT"] = str(port)
     
     print(f"Starting {service_name} service on port {port}...")
@@ -20,6 +25,10 @@ def run_service(service_name: str, port: int):
 
 def main():
     """Run all services."""
+    if "--prod" in sys.argv[1:]:
+        from serve import main as serve
+        return serve([arg for arg in sys.argv[1:] if arg != "--prod"])
+    
     processes = []
     
     try:
@@ -45,4 +54,4 @@ def main():
         print("All services stopped")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
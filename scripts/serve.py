@@ -0,0 +1,158 @@
+"""Run the backend services with production servers.
+
+On Linux and macOS every service runs under gunicorn (shared/gunicorn_conf.py):
+pre-forked worker processes with a pool of threads each, recycled after a
+number of requests, draining running work when they stop. On Windows, where
+gunicorn does not run, every service runs under waitress in one process.
+
+Settings come from the environment (see shared/serving.py); --workers and
+--threads override them for the services started.
+
+Usage:
+    python serve.py                          # all services
+    python serve.py conversion --workers 4   # one service, four worker processes
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from shared.serving import SERVICES, server_settings, shutdown  # noqa: E402
+
+WINDOWS = sys.platform == 'win32'
+
+
+def service_env(service: str, workers=None, threads=None):
+    """Environment of a service's server, with the command-line overrides applied."""
+    env = os.environ.copy()
+    env["SERVICE_NAME"] = service
+    env.pop("FLASK_DEBUG", None)
+    prefix = service.upper()
+    if workers is not None:
+        env[f"{prefix}_WEB_CONCURRENCY"] = str(workers)
+    if threads is not None:
+        env[f"{prefix}_WEB_THREADS"] = str(threads)
+    return env
+
+
+def service_command(service: str):
+    """Command that serves a service, run from its folder."""
+    if WINDOWS:
+        return [sys.executable, str(Path(__file__).resolve()), "--serve-one", service]
+    return [sys.executable, "-m", "gunicorn", "-c", str(ROOT / "shared" / "gunicorn_conf.py"), "app:app"]
+
+
+def start_service(service: str, env):
+    """Start a service's server."""
+    settings = server_settings(service, env)
+    if WINDOWS:
+        print(f"Starting {service} service on port {settings['port']} "
+              f"(waitress, {settings['threads']} threads)...")
+    else:
+        print(f"Starting {service} service on port {settings['port']} "
+              f"({settings['workers']} workers x {settings['threads']} threads)...")
+    kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP} if WINDOWS else {'start_new_session': True}
+    # Own session / process group: Ctrl+C reaches this script only, which then
+    # stops every server gracefully
+    return subprocess.Popen(service_command(service), cwd=ROOT / "services" / service, env=env, **kwargs)
+
+
+def stop_service(process):
+    """Ask a server to stop gracefully (gunicorn: SIGTERM drains the workers)."""
+    if process.poll() is None:
+        process.send_signal(signal.CTRL_BREAK_EVENT if WINDOWS else signal.SIGTERM)
+
+
+def serve_one(service: str):
+    """Serve one service in this process with waitress (Windows)."""
+    from waitress import serve
+
+    settings = server_settings(service)
+    service_path = ROOT / "services" / service
+    sys.path.insert(0, str(service_path))
+    os.chdir(service_path)
+    from app import app
+
+    try:
+        serve(app, host="0.0.0.0", port=settings['port'], threads=settings['threads'])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown(settings['graceful_timeout'])
+
+
+def run(services, workers=None, threads=None):
+    """
+    Start the servers of services and wait for them.
+
+    Returns:
+        Exit status: 0 when stopped by a signal, else that of the first server to exit
+    """
+    envs = {service: service_env(service, workers, threads) for service in services}
+    try:
+        for service, env in envs.items():
+            server_settings(service, env)
+    except ValueError as e:
+        print(f"Invalid server settings: {e}", file=sys.stderr)
+        return 2
+
+    def handle_term(sig, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, handle_term)
+    processes = {}
+    status = 0
+    try:
+        for service, env in envs.items():
+            processes[service] = start_service(service, env)
+        print("\nPress Ctrl+C to stop all services")
+        while True:
+            exited = [service for service, process in processes.items() if process.poll() is not None]
+            if exited:
+                status = processes[exited[0]].returncode
+                print(f"\n{exited[0]} service exited with status {status}")
+                break
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    print("\nStopping all services (running jobs are finished first)...")
+    for process in processes.values():
+        stop_service(process)
+    for process in processes.values():
+        try:
+            process.wait()
+        except KeyboardInterrupt:
+            # A second Ctrl+C stops without waiting
+            for remaining in processes.values():
+                if remaining.poll() is None:
+                    remaining.kill()
+    print("All services stopped")
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the backend services with production servers.')
+    parser.add_argument('services', nargs='*', metavar='service',
+                        help=f"Services to run: {', '.join(SERVICES)} (default: all)")
+    parser.add_argument('--workers', type=int, help='Worker processes per service')
+    parser.add_argument('--threads', type=int, help='Threads per worker process')
+    parser.add_argument('--serve-one', choices=SERVICES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve_one:
+        serve_one(args.serve_one)
+        return 0
+    unknown = [service for service in args.services if service not in SERVICES]
+    if unknown:
+        parser.error(f"Unknown services: {', '.join(unknown)} (known: {', '.join(SERVICES)})")
+    return run(args.services or list(SERVICES), args.workers, args.threads)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,7 @@
 Table Analysis Module
 Intelligent analysis of table structures to identify headers, titles, and data rows.
 """
+from shared.tracing import span, traced
 
 
 def clean_header(header):
@@ -37,6 +38,7 @@ def is_title_row(row):
     return False
 
 
+@traced()
 def analyze_table_structure(table):
     """
     Intelligently analyze table structure to identify:
@@ -58,6 +60,7 @@ def analyze_table_structure(table):
     }
     
     # Analyze each row
+    classifying = span('analyze.classify_rows', rows=len(table))
     row_analysis = []
     for idx, row in enumerate(table):
         analysis = {
@@ -107,6 +110,7 @@ def analyze_table_structure(table):
             analysis['type'] = 'unknown'
         
         row_analysis.append(analysis)
+    classifying.end()
     
     # Find title rows (at the beginning)
     for analysis in row_analysis:
@@ -116,6 +120,7 @@ def analyze_table_structure(table):
             break  # Stop at first non-title, non-empty row
     
     # Find header row using keyword scoring
+    scoring = span('analyze.score_headers')
     header_candidates = []
     header_keywords = [
         'sno', 's.no', 'no', 'serial', 'number', '#', 'name', 'description', 
@@ -183,6 +188,7 @@ def analyze_table_structure(table):
         if best_score >= 6:  # Increased threshold for confidence
             structure['header_row_idx'] = header_candidates[0][0]
             structure['data_start_idx'] = header_candidates[0][0] + 1
+    scoring.end()
     
     # If still no header found, look for patterns
     if structure['header_row_idx'] is None:
@@ -227,6 +233,7 @@ def analyze_table_structure(table):
     return structure
 
 
+@traced()
 def create_headers(row, col_count, structure=None):
     """Create clean, unique headers from a row with intelligent naming."""
     headers = []
@@ -254,6 +261,7 @@ def create_headers(row, col_count, structure=None):
     return headers
 
 
+@traced()
 def validate_table_data(tables):
     """
     Check if extracted data is truly tabular or just poorly parsed text.
@@ -3,30 +3,227 @@ Conversion Service
 Handles PDF to CSV, Excel, and JSON conversion using pdfplumber and tabula.
 Port: 5002
 """
+import hmac
 import os
+import sys
 import tempfile
-from datetime import datetime, timezone
-from flask import Flask, request, jsonify
+import threading
+from datetime import datetime, timedelta, timezone
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 
+# Make the repository-level shared package importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from shared.constants import (
+    CONVERSION_TIMEOUT, CONVERTED_PREFIX, CONVERTED_QUOTA, CONVERTED_TTL, INTERNAL_TOKEN_HEADER, METADATA_PREFIX,
+    PAGE_TIMEOUT, POLLING_INTERVAL, RATE_LIMIT_CONVERSIONS, RATE_LIMIT_STORE_FILE, RETENTION_SWEEP_INTERVAL,
+    STREAM_KEEPALIVE_INTERVAL, TABLE_CACHE_TTL, UPLOAD_PREFIX
+)
+from shared.metadata import MetadataStore
+from shared.metrics import REGISTRY, instrument_app
+from shared.ratelimit import create_rate_limiter, retry_after
+from shared.retention import RetentionManager
+from shared.serving import is_supervised, on_shutdown, request_recycle, server_settings
+from shared.storage import CachedStorageBackend, LocalStorageBackend, get_storage_backend
+from cache import TableCache
+from events import JobEvents, parse_last_event_id, stream_job_events
+from job_store import create_job_store
+from work_queue import (
+    BULK, DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, DEFAULT_PRIORITY_WEIGHTS, INTERACTIVE, WAIT_STATS_WINDOW,
+    QueueFull, create_work_queue
+)
 from worker import ConversionWorker
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
+instrument_app(app)
 
 # Configuration
-UPLOAD_FOLDER = os.path.join(tempfile.gettempdir(), 'pdf-to-csv-uploads')
-CONVERTED_FOLDER = os.path.join(tempfile.gettempdir(), 'pdf-to-csv-converted')
+STORAGE_ROOT = tempfile.gettempdir()
+UPLOAD_FOLDER = os.path.join(STORAGE_ROOT, UPLOAD_PREFIX)
+CONVERTED_FOLDER = os.path.join(STORAGE_ROOT, CONVERTED_PREFIX)
+TABLE_CACHE_FOLDER = os.path.join(tempfile.gettempdir(), 'pdf-to-csv-cache')
+STORAGE_CACHE_FOLDER = os.path.join(tempfile.gettempdir(), 'pdf-to-csv-storage-cache')
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', os.path.join(tempfile.gettempdir(), 'pdf-to-csv-jobs.db'))
+WORK_QUEUE_PATH = os.getenv('WORK_QUEUE_PATH', os.path.join(tempfile.gettempdir(), 'pdf-to-csv-queue.db'))
+CONVERSION_WORKERS = int(os.getenv('CONVERSION_WORKERS', 2))
+SERVER_SETTINGS = server_settings('conversion')
+# Consumers of the shared work queue in all processes of the service (one
+# process unless a gunicorn master runs WEB_CONCURRENCY of them)
+TOTAL_CONSUMERS = (SERVER_SETTINGS['workers'] if is_supervised() else 1) * CONVERSION_WORKERS
+# Jobs with more files than this default to the bulk priority class
+INTERACTIVE_MAX_FILES = int(os.getenv('INTERACTIVE_MAX_FILES', 5))
+RATE_LIMIT_CONVERSIONS_PER_HOUR = int(os.getenv('RATE_LIMIT_CONVERSIONS', RATE_LIMIT_CONVERSIONS))
+# Shared with the upload service; only requests carrying it may name the client (X-Client-Id)
+INTERNAL_SERVICE_TOKEN = os.getenv('INTERNAL_SERVICE_TOKEN', '')
+# Whether clients may ask for a job to be profiled ("profile": true); off in production
+ENABLE_JOB_PROFILING = os.getenv('ENABLE_JOB_PROFILING', 'false').lower() == 'true'
+# Bounds of the Retry-After sent when the queue turns a job away
+QUEUE_RETRY_AFTER_MIN = 1  # seconds
+QUEUE_RETRY_AFTER_MAX = 60  # seconds
+# Status streams hold a server thread each for as long as they are open. Past
+# this many per process they are turned away (clients fall back to polling),
+# so the other requests always have STREAM_RESERVED_THREADS threads left.
+STREAM_RESERVED_THREADS = 8
+MAX_STATUS_STREAMS = int(os.getenv(
+    'MAX_STATUS_STREAMS',
+    max(SERVER_SETTINGS['threads'] - STREAM_RESERVED_THREADS, 1)
+))
 
 # Ensure directories exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(CONVERTED_FOLDER, exist_ok=True)
 
-# In-memory storage for conversion jobs
-conversion_jobs = {}
+# Conversion jobs, shared by every process of the service (JOB_STORE=sqlite|memory)
+job_store = create_job_store(os.getenv('JOB_STORE', 'sqlite'), JOB_STORE_PATH)
+
+# Wakes status streams as soon as this process writes a job
+job_events = JobEvents()
+job_store.subscribe(job_events.notify)
+_stream_slots = threading.BoundedSemaphore(MAX_STATUS_STREAMS)
+
+# Persistent queue of conversion tasks; leases of crashed workers expire and are retried.
+# Interactive and bulk jobs share consumers by weighted round-robin, clients get a fair share
+# within each class, and bulk jobs leave a consumer free for interactive ones by default
+# (BULK_MAX_RUNNING is a global cap: the queue counts the bulk leases of every process).
+work_queue = create_work_queue(
+    os.getenv('WORK_QUEUE', 'sqlite'),
+    WORK_QUEUE_PATH,
+    lease_seconds=int(os.getenv('CONVERSION_LEASE_SECONDS', DEFAULT_LEASE_SECONDS)),
+    max_attempts=int(os.getenv('CONVERSION_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)),
+    weights={
+        INTERACTIVE: int(os.getenv('INTERACTIVE_WEIGHT', DEFAULT_PRIORITY_WEIGHTS[INTERACTIVE])),
+        BULK: int(os.getenv('BULK_WEIGHT', DEFAULT_PRIORITY_WEIGHTS[BULK]))
+    },
+    class_limits={
+        INTERACTIVE: int(os.getenv('QUEUE_LIMIT_INTERACTIVE', 1000)),
+        BULK: int(os.getenv('QUEUE_LIMIT_BULK', 10000))
+    },
+    client_limit=int(os.getenv('QUEUE_LIMIT_PER_CLIENT', 100)),
+    running_limits={BULK: int(os.getenv('BULK_MAX_RUNNING', max(TOTAL_CONSUMERS - 1, 1)))}
+)
+
+# Per-client conversion budget (token bucket), shared by every service process on the host
+rate_limiter = create_rate_limiter(
+    os.getenv('RATE_LIMIT_STORE', 'sqlite'),
+    os.getenv('RATE_LIMIT_STORE_PATH', os.path.join(tempfile.gettempdir(), RATE_LIMIT_STORE_FILE))
+)
+
+# Uploads, converted outputs and metadata live in the configured StorageBackend.
+# Local storage is rooted at the temp dir, so keys map onto the folders above;
+# remote backends are read through a local cache since extraction needs a file.
+storage = get_storage_backend(base_path=STORAGE_ROOT)
+LOCAL_STORAGE = isinstance(storage, LocalStorageBackend)
+if not LOCAL_STORAGE and not isinstance(storage, CachedStorageBackend):
+    storage = CachedStorageBackend(
+        storage,
+        STORAGE_CACHE_FOLDER,
+        max_bytes=int(os.getenv('STORAGE_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+    )
+
+# Upload records published by the upload service (fileId -> storage key, original filename)
+file_metadata = MetadataStore(storage, prefix=METADATA_PREFIX)
+
+# Intermediate cache of extracted tables, filled by conversions and speculative pre-extraction
+table_cache = TableCache(TABLE_CACHE_FOLDER)
 
 # Initialize conversion worker
-worker = ConversionWorker(UPLOAD_FOLDER, CONVERTED_FOLDER, conversion_jobs)
+worker = ConversionWorker(
+    UPLOAD_FOLDER, CONVERTED_FOLDER, job_store, file_metadata,
+    table_cache=table_cache,
+    speculation_max_active=int(os.getenv('SPECULATION_MAX_ACTIVE_JOBS', 1)),
+    storage=storage,
+    converted_prefix=CONVERTED_PREFIX,
+    work_queue=work_queue,
+    page_timeout=int(os.getenv('PAGE_TIMEOUT_SECONDS', PAGE_TIMEOUT)),
+    conversion_timeout=int(os.getenv('CONVERSION_TIMEOUT_SECONDS', CONVERSION_TIMEOUT)),
+    isolate_extraction=os.getenv('ISOLATE_EXTRACTION', 'true').lower() == 'true',
+    tracing=os.getenv('JOB_TRACING', 'true').lower() == 'true',
+    trace_dir=os.getenv('TRACE_DIR') or None,
+    # Under gunicorn a worker process is replaced after this many jobs
+    max_jobs=int(os.getenv('MAX_JOBS_PER_WORKER', 200)) if is_supervised() else 0,
+    on_retire=request_recycle
+)
+worker.start_consumers(CONVERSION_WORKERS)
+# Running jobs finish before the process exits; unfinished ones are leased again elsewhere
+on_shutdown(worker.stop_consumers)
+
+# Metrics read from existing state when /metrics is scraped
+REGISTRY.callback(
+    'conversion_queue_tasks', 'Tasks in the work queue by priority class and state',
+    lambda: {
+        (priority, state): depth[state]
+        for priority, depth in work_queue.stats()['classes'].items() for state in ('queued', 'leased')
+    },
+    ('priority', 'state')
+)
+REGISTRY.callback(
+    'conversion_workers', 'Consumer threads', lambda: worker.activity()['consumers'], per_process=True
+)
+REGISTRY.callback(
+    'conversion_workers_active', 'Consumers running a job', lambda: worker.activity()['activeJobs'], per_process=True
+)
+REGISTRY.callback(
+    'table_cache_lookups_total', 'Table cache lookups by result',
+    lambda: {('hit',): table_cache.stats()['hits'], ('miss',): table_cache.stats()['misses']},
+    ('result',), kind='counter', per_process=True
+)
+REGISTRY.callback('table_cache_hit_ratio', 'Share of table cache lookups that hit', lambda: table_cache.stats()['hitRatio'])
+if isinstance(storage, CachedStorageBackend):
+    REGISTRY.callback(
+        'storage_cache_hit_ratio', 'Share of storage cache reads served locally', lambda: storage.stats()['hitRatio']
+    )
+
+CONVERTED_TTL_SECONDS = int(os.getenv('CONVERTED_TTL_SECONDS', CONVERTED_TTL))
+FINISHED_STATUSES = ('completed', 'error', 'cancelled')
+# Statuses of a job a worker has started and not finished
+RUNNING_STATUSES = ('processing', 'converting', 'cancelling')
+
+
+def _is_active_job_path(path):
+    """Protect output folders of jobs that are still running."""
+    job_id = os.path.relpath(path, CONVERTED_FOLDER).split(os.sep, 1)[0]
+    job = job_store.get(job_id)
+    return job is not None and job['status'] not in FINISHED_STATUSES
+
+
+def _on_output_evicted(path):
+    """Drop the download record of a converted file removed by the retention manager."""
+    parts = os.path.relpath(path, CONVERTED_FOLDER).split(os.sep)
+    if len(parts) == 3 and parts[0] != os.pardir:
+        # <job_id>/<upload_file_id>/<filename>
+        file_metadata.delete('converted', f"{parts[1]}_{parts[2]}")
+
+
+def _prune_finished_jobs():
+    """Drop finished jobs whose outputs were evicted or which outlived the TTL."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=CONVERTED_TTL_SECONDS)).isoformat()
+    for job in job_store.list_jobs(statuses=FINISHED_STATUSES, created_before=cutoff):
+        job_store.delete(job['jobId'])
+    work_queue.purge_done(CONVERTED_TTL_SECONDS)
+    
+    # Remote outputs expire through the object store's own lifecycle rules
+    if not LOCAL_STORAGE:
+        return
+    for job in job_store.list_jobs(statuses=FINISHED_STATUSES):
+        if job.get('convertedFiles') and not os.path.exists(os.path.join(CONVERTED_FOLDER, job['jobId'])):
+            job_store.delete(job['jobId'])
+
+
+# Background TTL sweeper and disk quota manager for converted files
+retention = RetentionManager(
+    {
+        CONVERTED_FOLDER: CONVERTED_TTL_SECONDS,
+        TABLE_CACHE_FOLDER: int(os.getenv('TABLE_CACHE_TTL_SECONDS', TABLE_CACHE_TTL))
+    },
+    quota_bytes=int(os.getenv('CONVERTED_QUOTA_BYTES', CONVERTED_QUOTA)),
+    interval=int(os.getenv('RETENTION_SWEEP_INTERVAL', RETENTION_SWEEP_INTERVAL)),
+    on_evict=_on_output_evicted,
+    on_sweep=_prune_finished_jobs,
+    protect=_is_active_job_path
+)
+retention.start()
 
 
 @app.route('/api/health', methods=['GET'])
@@ -35,10 +232,39 @@ def health():
     return jsonify({
         'status': 'healthy',
         'service': 'conversion',
+        'retention': retention.stats(),
+        'tableCache': table_cache.stats(),
+        'speculation': dict(worker.speculation_stats),
+        'queue': work_queue.stats(),
+        'workers': worker.activity(),
         'timestamp': datetime.now(timezone.utc).isoformat()
     })
 
 
+def _client_id():
+    """
+    Client a request is scheduled and limited against: the remote address, or
+    the X-Client-Id forwarded by the upload service with the internal token.
+    """
+    token = request.headers.get(INTERNAL_TOKEN_HEADER, '')
+    forwarded = request.headers.get('X-Client-Id')
+    if forwarded and INTERNAL_SERVICE_TOKEN and hmac.compare_digest(
+            token.encode('utf-8'), INTERNAL_SERVICE_TOKEN.encode('utf-8')):
+        return forwarded
+    return request.remote_addr or 'anonymous'
+
+
+def _queue_retry_after(priority):
+    """
+    Seconds a client turned away by the queue should wait: roughly the time
+    between two leases of its priority class, from the recent lease rate.
+    """
+    leased = work_queue.stats()['classes'].get(priority, {}).get('leasedRecently')
+    if not leased:
+        return QUEUE_RETRY_AFTER_MAX
+    return min(max(WAIT_STATS_WINDOW / leased, QUEUE_RETRY_AFTER_MIN), QUEUE_RETRY_AFTER_MAX)
+
+
 @app.route('/api/convert', methods=['POST'])
 def convert():
     """
@@ -49,7 +275,9 @@ def convert():
         "fileIds": ["abc123", "def456"],
         "parser": "pdfplumber",  // or "tabula"
         "merge": false,
-        "outputFormat": "csv"  // or "excel", "json", "text"
+        "outputFormat": "csv",  // or "excel", "json", "text"
+        "priority": "interactive",  // or "bulk"; default depends on the number of files
+        "profile": false  // profile the job (needs ENABLE_JOB_PROFILING)
     }
     """
     data = request.get_json()
@@ -67,6 +295,17 @@ def convert():
     parser = data.get('parser', 'pdfplumber')
     merge = data.get('merge', False)
     output_format = data.get('outputFormat', 'csv')
+    priority = data.get('priority') or (BULK if len(file_ids) > INTERACTIVE_MAX_FILES else INTERACTIVE)
+    profile = data.get('profile') is True
+    
+    if priority not in (INTERACTIVE, BULK):
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'INVALID_PRIORITY',
+                'message': f"Priority must be '{INTERACTIVE}' or '{BULK}'"
+            }
+        }), 400
     
     if not file_ids:
         return jsonify({
@@ -77,24 +316,170 @@ def convert():
             }
         }), 400
     
+    if profile and not ENABLE_JOB_PROFILING:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'PROFILING_DISABLED',
+                'message': 'Job profiling is not enabled on this service'
+            }
+        }), 403
+    
+    allowed, wait = rate_limiter.acquire(f"convert:{_client_id()}", RATE_LIMIT_CONVERSIONS_PER_HOUR)
+    if not allowed:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'RATE_LIMIT_EXCEEDED',
+                'message': f'Conversion limit of {RATE_LIMIT_CONVERSIONS_PER_HOUR} jobs per hour reached'
+            }
+        }), 429, {'Retry-After': retry_after(wait)}
+    
     # Create conversion job using worker
-    job_id = worker.start_conversion(file_ids, parser, merge, output_format)
+    try:
+        job_id = worker.start_conversion(
+            file_ids, parser, merge, output_format, priority=priority, client_id=_client_id(),
+            profile=profile
+        )
+    except QueueFull as e:
+        # A client over its share is told to slow down; a full class is a service limit
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'QUEUE_LIMIT_REACHED' if e.scope == 'client' else 'QUEUE_FULL',
+                'message': str(e)
+            }
+        }), 429 if e.scope == 'client' else 503, {'Retry-After': retry_after(_queue_retry_after(priority))}
     
     return jsonify({
         'success': True,
         'data': {
             'jobId': job_id,
             'status': 'pending',
+            'priority': priority,
+            'profile': profile,
             'message': 'Conversion started'
         },
         'timestamp': datetime.now(timezone.utc).isoformat()
     }), 200
 
 
+@app.route('/api/prefetch', methods=['POST'])
+def prefetch():
+    """
+    Queue speculative table extraction for freshly uploaded files.
+    Runs at low priority into the table cache and is cancelled under load.
+    
+    Request body:
+    {
+        "fileIds": ["abc123"],
+        "parser": "pdfplumber"
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    file_ids = data.get('fileIds', [])
+    
+    if not file_ids:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'NO_FILES',
+                'message': 'No files provided for prefetch'
+            }
+        }), 400
+    
+    queued = worker.prefetch(file_ids, data.get('parser', 'pdfplumber'))
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'queued': queued
+        },
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }), 202
+
+
+def _job_status(job):
+    """Public view of a job, shared by the status endpoint and the event streams."""
+    return {
+        'jobId': job['jobId'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'pagesDone': job.get('pagesDone'),
+        'pagesTotal': job.get('pagesTotal'),
+        'pagesPerSecond': job.get('pagesPerSecond'),
+        'etaSeconds': job.get('etaSeconds'),
+        'message': job.get('message', ''),
+        'currentFile': job.get('currentFile'),
+        'convertedFiles': job.get('convertedFiles', []),
+        'profileFiles': job.get('profileFiles', []),
+        'errors': job.get('errors', []),
+        'pageErrors': job.get('pageErrors', []),
+        'error': job.get('error'),
+        'createdAt': job['createdAt'],
+        'completedAt': job.get('completedAt'),
+        'timings': job.get('timings'),
+        'version': job['version']
+    }
+
+
+def _event_stream(job_ids):
+    """Server-sent event response following job_ids until they finish."""
+    if not _stream_slots.acquire(blocking=False):
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'TOO_MANY_STREAMS',
+                'message': 'Too many open status streams, poll the status instead'
+            }
+        }), 503, {'Retry-After': retry_after(POLLING_INTERVAL / 1000)}
+    events = stream_job_events(
+        job_store, job_events, job_ids, _job_status, FINISHED_STATUSES,
+        last_versions=parse_last_event_id(request.headers.get('Last-Event-ID')),
+        keepalive_interval=int(os.getenv('STREAM_KEEPALIVE_SECONDS', STREAM_KEEPALIVE_INTERVAL)),
+        retry_ms=POLLING_INTERVAL
+    )
+    response = Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # The server closes the response when the stream ends or the client leaves
+    response.call_on_close(_stream_slots.release)
+    return response
+
+
 @app.route('/api/status/<job_id>', methods=['GET'])
 def get_status(job_id):
     """Get conversion job status."""
-    if job_id not in conversion_jobs:
+    job = job_store.get(job_id)
+    
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'JOB_NOT_FOUND',
+                'message': 'Conversion job not found'
+            }
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': _job_status(job),
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    })
+
+
+@app.route('/api/status/<job_id>/stream', methods=['GET'])
+def stream_status(job_id):
+    """
+    Stream job status as server-sent events until the job finishes.
+    
+    Each change is a `status` event with the same data as /api/status/<job_id>
+    and id `<job_id>:<version>`; reconnecting with Last-Event-ID skips versions
+    the client already has. Idle streams send a keep-alive comment.
+    """
+    if job_store.get(job_id) is None:
         return jsonify({
             'success': False,
             'error': {
@@ -103,25 +488,78 @@ def get_status(job_id):
             }
         }), 404
     
-    job = conversion_jobs[job_id]
+    return _event_stream([job_id])
+
+
+@app.route('/api/status/stream', methods=['GET'])
+def stream_statuses():
+    """
+    Stream the status of several jobs over one connection.
+    
+    Query parameters:
+        jobIds: Comma-separated job IDs
+    
+    Jobs that do not exist get a single `gone` event.
+    """
+    job_ids = [job_id for job_id in request.args.get('jobIds', '').split(',') if job_id]
+    
+    if not job_ids:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'NO_JOBS',
+                'message': 'No job IDs provided'
+            }
+        }), 400
+    
+    return _event_stream(job_ids)
+
+
+@app.route('/api/convert/<job_id>', methods=['DELETE'])
+def cancel_conversion(job_id):
+    """
+    Cancel a conversion job.
+    A queued job is cancelled immediately; a running one stops at its next
+    cancellation check (within about a second) and keeps the files it already converted.
+    """
+    # Each step only applies to the status it expects, so a worker moving
+    # the job on in the meantime is never overwritten
+    if job_store.transition(job_id, {
+        'cancelRequested': True, 'status': 'cancelled', 'message': 'Conversion cancelled'
+    }, ('pending',)):
+        status = 'cancelled'
+    elif job_store.transition(job_id, {
+        'cancelRequested': True, 'status': 'cancelling', 'message': 'Cancelling conversion'
+    }, RUNNING_STATUSES):
+        status = 'cancelling'
+    else:
+        job = job_store.get(job_id)
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'JOB_NOT_FOUND',
+                    'message': 'Conversion job not found'
+                }
+            }), 404
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'JOB_FINISHED',
+                'message': f"Conversion job already {job['status']}"
+            }
+        }), 409
     
     return jsonify({
         'success': True,
         'data': {
-            'jobId': job['jobId'],
-            'status': job['status'],
-            'progress': job['progress'],
-            'message': job.get('message', ''),
-            'currentFile': job.get('currentFile'),
-            'convertedFiles': job.get('convertedFiles', []),
-            'errors': job.get('errors', []),
-            'error': job.get('error'),
-            'createdAt': job['createdAt'],
-            'completedAt': job.get('completedAt')
+            'jobId': job_id,
+            'status': status
         },
         'timestamp': datetime.now(timezone.utc).isoformat()
-    })
+    }), 202
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5002, debug=True)
+    # Development server; production runs under scripts/serve.py
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5002)), debug=os.getenv('FLASK_DEBUG') == '1')
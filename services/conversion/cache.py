@@ -0,0 +1,74 @@
+"""
+Table Cache Module
+On-disk cache of extracted tables, keyed by PDF content hash and parser,
+so a conversion can skip extraction when the tables are already known.
+"""
+import json
+import os
+import re
+import threading
+import uuid
+
+_VALID_KEY = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+def table_cache_key(sha256, parser):
+    """Cache key for the tables of a PDF with the given content hash."""
+    if not sha256:
+        return None
+    return f"{sha256}-{parser}"
+
+
+class TableCache:
+    """Intermediate cache of extraction results stored as JSON files."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        if not _VALID_KEY.match(key):
+            raise ValueError(f"Invalid cache key: {key}")
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Return cached tables for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                tables = json.load(f)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        # Touch the entry so retention treats it as recently used
+        os.utime(path)
+        with self._lock:
+            self.hits += 1
+        return tables
+
+    def contains(self, key):
+        """Check for an entry without counting a hit or miss."""
+        return os.path.exists(self._path(key))
+
+    def put(self, key, tables):
+        """Store tables for key (atomically replaces any existing entry)."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(tables, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def stats(self):
+        """Return hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRatio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
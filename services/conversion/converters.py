@@ -5,7 +5,6 @@ Handles conversion of extracted table data to various output formats (CSV, Excel
 import os
 import csv
 import json
-import pdfplumber
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 
@@ -14,20 +13,70 @@ from analyzers import (
     create_headers,
     validate_table_data
 )
-from extractors import extract_structured_text_json
+from extractors import extract_page_texts, structured_text_json
+from metrics import analysis_timer
+from shared.tracing import span
 
+# Writers report progress through on_rows(count) after this many rows
+ROW_BATCH_SIZE = 1000
 
-def save_tables_to_text(tables, output_dir, base_filename, merge=False, pdf_path=None):
+
+class _RowBatches:
+    """Counts rows as they are handled and reports them to on_rows(count) in batches."""
+    
+    def __init__(self, on_rows):
+        self.on_rows = on_rows
+        self.pending = 0
+    
+    def add(self, count=1):
+        if not self.on_rows:
+            return
+        self.pending += count
+        if self.pending >= ROW_BATCH_SIZE:
+            self.flush()
+    
+    def flush(self):
+        if self.on_rows and self.pending:
+            self.on_rows(self.pending)
+            self.pending = 0
+    
+    def counted(self, rows):
+        """Yield rows, counting each one once the caller is done with it."""
+        for row in rows:
+            yield row
+            self.add()
+
+
+def _write_rows(rows, write_row, on_rows=None):
+    """Write rows one at a time, calling on_rows(count) after every batch."""
+    with span('write.rows'):
+        batches = _RowBatches(on_rows)
+        for row in batches.counted(rows):
+            write_row(row)
+        batches.flush()
+
+
+def _page_texts(pdf_path, extract_text=None):
+    """Text of every page of pdf_path (page number -> text), through extract_text if given."""
+    return (extract_text or extract_page_texts)(pdf_path)
+
+
+def save_tables_to_text(tables, output_dir, base_filename, merge=False, pdf_path=None, on_rows=None,
+                        extract_text=None):
     """
     Save extracted content to plain text (.txt) files.
     For documents with tables, extracts table data.
-    For text documents (CVs, resumes), extracts full text content.
+    For text documents (CVs, resumes), extracts full text content with
+    extract_text(pdf_path), which returns a dict of page number to text
+    (default: in-process extraction).
+    If given, on_rows(count) is called after every batch of table rows written.
     Returns list of created file paths.
     """
     converted_files = []
     
     # Check if this is valid tabular data or just text
-    is_valid_table_data = validate_table_data(tables)
+    with analysis_timer():
+        is_valid_table_data = validate_table_data(tables)
     
     if not is_valid_table_data:
         # Extract as plain text for non-tabular documents
@@ -36,14 +85,14 @@ def save_tables_to_text(tables, output_dir, base_filename, merge=False, pdf_path
             
         output_path = os.path.join(output_dir, f"{base_filename}.txt")
         
-        with pdfplumber.open(pdf_path) as pdf:
-            full_text = []
-            for page_num, page in enumerate(pdf.pages, start=1):
-                text = page.extract_text() or ''
-                if text.strip():
-                    full_text.append(f"=== Page {page_num} ===")
-                    full_text.append(text)
-                    full_text.append("")  # Empty line between pages
+        page_texts = _page_texts(pdf_path, extract_text)
+        full_text = []
+        for page_num in sorted(page_texts):
+            text = page_texts[page_num]
+            if text.strip():
+                full_text.append(f"=== Page {page_num} ===")
+                full_text.append(text)
+                full_text.append("")  # Empty line between pages
         
         # Write to file
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -68,12 +117,7 @@ def save_tables_to_text(tables, output_dir, base_filename, merge=False, pdf_path
                                 col_widths[col_idx] = max(col_widths[col_idx], len(str(cell)))
                         
                         # Write rows with aligned columns
-                        for row in table:
-                            row_text = []
-                            for col_idx, cell in enumerate(row):
-                                cell_text = str(cell).ljust(col_widths[col_idx])
-                                row_text.append(cell_text)
-                            f.write('  '.join(row_text) + '\n')
+                        _write_rows(table, lambda row: f.write(_format_text_row(row, col_widths)), on_rows)
                         
                         if table_idx < len(tables):
                             f.write('\n')  # Separator between tables
@@ -92,21 +136,22 @@ def save_tables_to_text(tables, output_dir, base_filename, merge=False, pdf_path
                                 col_widths[col_idx] = max(col_widths[col_idx], len(str(cell)))
                         
                         # Write rows with aligned columns
-                        for row in table:
-                            row_text = []
-                            for col_idx, cell in enumerate(row):
-                                cell_text = str(cell).ljust(col_widths[col_idx])
-                                row_text.append(cell_text)
-                            f.write('  '.join(row_text) + '\n')
+                        _write_rows(table, lambda row: f.write(_format_text_row(row, col_widths)), on_rows)
                 
                 converted_files.append(output_path)
     
     return converted_files
 
 
-def save_tables_to_csv(tables, output_dir, base_filename, merge=False):
+def _format_text_row(row, col_widths):
+    """Format a table row as a line of left-aligned columns."""
+    return '  '.join(str(cell).ljust(col_widths[col_idx]) for col_idx, cell in enumerate(row)) + '\n'
+
+
+def save_tables_to_csv(tables, output_dir, base_filename, merge=False, on_rows=None):
     """
     Save extracted tables to CSV files.
+    If given, on_rows(count) is called after every batch of rows written.
     Returns list of created file paths.
     """
     converted_files = []
@@ -117,8 +162,7 @@ def save_tables_to_csv(tables, output_dir, base_filename, merge=False):
         with open(output_path, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             for table in tables:
-                for row in table:
-                    writer.writerow(row)
+                _write_rows(table, writer.writerow, on_rows)
         converted_files.append(output_path)
     else:
         # Save each table as a separate CSV
@@ -126,16 +170,16 @@ def save_tables_to_csv(tables, output_dir, base_filename, merge=False):
             output_path = os.path.join(output_dir, f"{base_filename}_table{idx}.csv")
             with open(output_path, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                for row in table:
-                    writer.writerow(row)
+                _write_rows(table, writer.writerow, on_rows)
             converted_files.append(output_path)
     
     return converted_files
 
 
-def save_tables_to_excel(tables, output_dir, base_filename, merge=False):
+def save_tables_to_excel(tables, output_dir, base_filename, merge=False, on_rows=None):
     """
     Save extracted tables to Excel (.xlsx) files.
+    If given, on_rows(count) is called after every batch of rows written.
     Returns list of created file paths.
     """
     converted_files = []
@@ -149,10 +193,10 @@ def save_tables_to_excel(tables, output_dir, base_filename, merge=False):
         
         # Append all rows from all tables sequentially
         for table in tables:
-            for row in table:
-                ws.append(row)
+            _write_rows(table, ws.append, on_rows)
         
         # Auto-adjust column widths
+        autofit = span('excel.autofit')
         for col_idx in range(1, ws.max_column + 1):
             column_letter = get_column_letter(col_idx)
             max_length = 0
@@ -162,8 +206,10 @@ def save_tables_to_excel(tables, output_dir, base_filename, merge=False):
                     max_length = max(max_length, len(str(cell.value)))
             adjusted_width = min(max_length + 2, 50)
             ws.column_dimensions[column_letter].width = adjusted_width
+        autofit.end()
         
-        wb.save(output_path)
+        with span('excel.save'):
+            wb.save(output_path)
         converted_files.append(output_path)
     else:
         # Save each table as a separate Excel file
@@ -174,10 +220,10 @@ def save_tables_to_excel(tables, output_dir, base_filename, merge=False):
             ws.title = "Table Data"
             
             # Append all rows from the table
-            for row in table:
-                ws.append(row)
+            _write_rows(table, ws.append, on_rows)
             
             # Auto-adjust column widths
+            autofit = span('excel.autofit')
             for col_idx in range(1, ws.max_column + 1):
                 column_letter = get_column_letter(col_idx)
                 max_length = 0
@@ -187,39 +233,47 @@ def save_tables_to_excel(tables, output_dir, base_filename, merge=False):
                         max_length = max(max_length, len(str(cell.value)))
                 adjusted_width = min(max_length + 2, 50)
                 ws.column_dimensions[column_letter].width = adjusted_width
+            autofit.end()
             
-            wb.save(output_path)
+            with span('excel.save'):
+                wb.save(output_path)
             converted_files.append(output_path)
     
     return converted_files
 
 
-def save_tables_to_json(tables, output_dir, base_filename, merge=False, pdf_path=None):
+def save_tables_to_json(tables, output_dir, base_filename, merge=False, pdf_path=None, on_rows=None,
+                        extract_text=None):
     """
     Save extracted tables to JSON files with intelligent structure detection.
-    Falls back to structured text extraction for non-tabular documents.
+    Falls back to structured text extraction for non-tabular documents, with
+    extract_text(pdf_path) as in save_tables_to_text.
+    If given, on_rows(count) is called after every batch of table rows handled.
     Returns list of created file paths.
     """
     converted_files = []
+    batches = _RowBatches(on_rows)
     
     if merge:
         # Merge all tables into a single JSON file with table metadata
         output_path = os.path.join(output_dir, f"{base_filename}.json")
         
         # Check if extracted data is truly tabular
-        is_valid_table_data = validate_table_data(tables)
+        with analysis_timer():
+            is_valid_table_data = validate_table_data(tables)
         
         # If tables look like poorly parsed text, fall back to text extraction
         if not is_valid_table_data:
             if pdf_path and os.path.exists(pdf_path):
-                result = extract_structured_text_json(pdf_path)
+                result = structured_text_json(_page_texts(pdf_path, extract_text))
             else:
                 result = {"tables": []}
             
             # Write the text extraction result and skip table processing
-            with open(output_path, 'w', encoding='utf-8') as f:
+            with span('json.dump'), open(output_path, 'w', encoding='utf-8') as f:
                 json.dump(result, f, indent=2, ensure_ascii=False)
             
+            batches.add(sum(len(table) for table in tables))
             converted_files.append(output_path)
         else:
             # Strategy: Find the first table with valid headers, use those headers for ALL subsequent tables
@@ -227,13 +281,17 @@ def save_tables_to_json(tables, output_dir, base_filename, merge=False, pdf_path
             all_data_rows = []
             
             for table_idx, table in enumerate(tables, start=1):
+                # Rows collected here are counted when they are converted below
+                collected = len(all_data_rows)
                 if len(table) < 1:
                     continue
                 
                 # Analyze table structure
-                structure = analyze_table_structure(table)
+                with analysis_timer():
+                    structure = analyze_table_structure(table)
                 
                 if not structure:
+                    batches.add(len(table))
                     continue
                 
                 # If we don't have master headers yet, try to get them from this table
@@ -257,6 +315,7 @@ def save_tables_to_json(tables, output_dir, base_filename, merge=False, pdf_path
                         # Skip the header row in this table since we're using master headers
                         start_idx = structure['data_start_idx'] if structure['data_start_idx'] < len(table) else 0
                     
+                    filtering = span('json.filter_header_rows')
                     for row_idx in range(start_idx, len(table)):
                         row = table[row_idx]
                         # Skip empty rows
@@ -276,6 +335,8 @@ def save_tables_to_json(tables, output_dir, base_filename, merge=False, pdf_path
                                 continue
                         
                         all_data_rows.append(row)
+                    filtering.end()
+                batches.add(len(table) - (len(all_data_rows) - collected))
             
             # If we found headers and data, create the merged result
             has_valid_tables = False
@@ -284,7 +345,7 @@ def save_tables_to_json(tables, output_dir, base_filename, merge=False, pdf_path
                 
                 # Convert all data rows to dictionaries using master headers
                 table_data = []
-                for row in all_data_rows:
+                for row in batches.counted(all_data_rows):
                     row_dict = {}
                     for col_idx, header in enumerate(master_headers):
                         value = row[col_idx] if col_idx < len(row) else ""
@@ -303,14 +364,15 @@ def save_tables_to_json(tables, output_dir, base_filename, merge=False, pdf_path
                     }]
                 }
             else:
+                batches.add(len(all_data_rows))
                 result = {"tables": []}
             
             # If no valid tables found in table mode, extract as structured text
             if not has_valid_tables or not result["tables"]:
                 if pdf_path and os.path.exists(pdf_path):
-                    result = extract_structured_text_json(pdf_path)
+                    result = structured_text_json(_page_texts(pdf_path, extract_text))
             
-            with open(output_path, 'w', encoding='utf-8') as f:
+            with span('json.dump'), open(output_path, 'w', encoding='utf-8') as f:
                 json.dump(result, f, indent=2, ensure_ascii=False)
             
             converted_files.append(output_path)
@@ -320,14 +382,17 @@ def save_tables_to_json(tables, output_dir, base_filename, merge=False, pdf_path
         
         for idx, table in enumerate(tables, start=1):
             if len(table) < 2:
+                batches.add(len(table))
                 continue
             
             output_path = os.path.join(output_dir, f"{base_filename}_table{idx}.json")
             
             # Analyze table structure intelligently
-            structure = analyze_table_structure(table)
+            with analysis_timer():
+                structure = analyze_table_structure(table)
             
             if not structure or structure['header_row_idx'] is None:
+                batches.add(len(table))
                 continue
             
             has_valid_tables = True
@@ -335,6 +400,7 @@ def save_tables_to_json(tables, output_dir, base_filename, merge=False, pdf_path
             data_start_idx = structure['data_start_idx']
             
             if data_start_idx >= len(table):
+                batches.add(len(table))
                 continue
             
             # Extract title if present
@@ -350,9 +416,9 @@ def save_tables_to_json(tables, output_dir, base_filename, merge=False, pdf_path
             headers = create_headers(table[header_row_idx], structure['column_count'], structure)
             
             # Convert data rows to dictionaries
+            batches.add(data_start_idx)
             table_data = []
-            for row_idx in range(data_start_idx, len(table)):
-                row = table[row_idx]
+            for row in batches.counted(table[data_start_idx:]):
                 
                 # Skip empty rows
                 if not any(str(cell).strip() for cell in row if cell):
@@ -378,19 +444,21 @@ def save_tables_to_json(tables, output_dir, base_filename, merge=False, pdf_path
                 if title_text:
                     result["title"] = title_text
                 
-                with open(output_path, 'w', encoding='utf-8') as f:
+                with span('json.dump'), open(output_path, 'w', encoding='utf-8') as f:
                     json.dump(result, f, indent=2, ensure_ascii=False)
                 
                 converted_files.append(output_path)
+            batches.flush()
         
         # If no valid tables found, create a single text file
         if not has_valid_tables and pdf_path and os.path.exists(pdf_path):
             output_path = os.path.join(output_dir, f"{base_filename}.json")
-            result = extract_structured_text_json(pdf_path)
+            result = structured_text_json(_page_texts(pdf_path, extract_text))
             
-            with open(output_path, 'w', encoding='utf-8') as f:
+            with span('json.dump'), open(output_path, 'w', encoding='utf-8') as f:
                 json.dump(result, f, indent=2, ensure_ascii=False)
             
             converted_files.append(output_path)
     
+    batches.flush()
     return converted_files
@@ -0,0 +1,127 @@
+"""
+Job Events Module
+Server-sent event streams of conversion job status.
+
+Writes made by this process wake the streams immediately through JobEvents;
+jobs run by other service processes are picked up by re-reading the job
+store every poll interval.
+"""
+import json
+import threading
+import time
+
+# Streams re-read the job store at least this often
+STREAM_POLL_INTERVAL = 1.0  # seconds
+
+
+class JobEvents:
+    """Wakes the streams following a job whenever this process writes that job."""
+
+    # Change counters are dropped (waking every stream once) beyond this many jobs
+    MAX_TRACKED_JOBS = 10000
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._changes = {}  # job id -> number of writes seen
+
+    def notify(self, job_id):
+        """Record a change to job_id (subscribe this to the job store)."""
+        with self._condition:
+            if job_id not in self._changes and len(self._changes) >= self.MAX_TRACKED_JOBS:
+                self._changes.clear()
+            self._changes[job_id] = self._changes.get(job_id, 0) + 1
+            self._condition.notify_all()
+
+    def snapshot(self, job_ids):
+        """Current change counters of job_ids, to pass to wait()."""
+        with self._condition:
+            return {job_id: self._changes.get(job_id) for job_id in job_ids}
+
+    def wait(self, snapshot, timeout):
+        """
+        Wait until one of the jobs in snapshot changed, or timeout passed.
+
+        Returns:
+            A new snapshot of the same jobs
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: any(self._changes.get(job_id) != seen for job_id, seen in snapshot.items()),
+                timeout
+            )
+            return {job_id: self._changes.get(job_id) for job_id in snapshot}
+
+
+def format_event(data, event=None, event_id=None):
+    """Format one server-sent event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def parse_last_event_id(value):
+    """
+    Parse a Last-Event-ID header into {job_id: version}.
+    Event ids have the form ``<job_id>:<version>``.
+    """
+    job_id, _, version = (value or '').rpartition(':')
+    if job_id and version.isdigit():
+        return {job_id: int(version)}
+    return {}
+
+
+def stream_job_events(job_store, events, job_ids, to_payload, finished_statuses,
+                      last_versions=None, keepalive_interval=15, retry_ms=None):
+    """
+    Generate server-sent events for a set of jobs until all of them finished.
+
+    Every job change is sent as a ``status`` event whose id is
+    ``<job_id>:<version>``; a reconnecting client passes the last id back
+    in Last-Event-ID and only receives newer versions of that job.
+
+    Args:
+        job_store: JobStore the jobs live in
+        events: JobEvents notified by job_store writes
+        job_ids: Jobs to follow
+        to_payload: Function turning a job into the event data
+        finished_statuses: Statuses after which a job sends no more events
+        last_versions: {job_id: version} the client already has
+        keepalive_interval: Seconds between comment lines on an idle stream
+        retry_ms: Optional reconnection delay sent to the client
+
+    Yields:
+        Event strings
+    """
+    versions = dict(last_versions or {})
+    pending = list(job_ids)
+    if retry_ms:
+        yield f"retry: {retry_ms}\n\n"
+    last_sent = time.monotonic()
+    snapshot = events.snapshot(pending)
+
+    while pending:
+        for job_id in list(pending):
+            job = job_store.get(job_id)
+            if job is None:
+                pending.remove(job_id)
+                yield format_event({'jobId': job_id}, event='gone')
+                last_sent = time.monotonic()
+                continue
+            if job['version'] > versions.get(job_id, 0):
+                versions[job_id] = job['version']
+                yield format_event(to_payload(job), event='status', event_id=f"{job_id}:{job['version']}")
+                last_sent = time.monotonic()
+            if job['status'] in finished_statuses:
+                pending.remove(job_id)
+        if not pending:
+            break
+
+        snapshot = events.wait({job_id: snapshot.get(job_id) for job_id in pending}, STREAM_POLL_INTERVAL)
+        if time.monotonic() - last_sent >= keepalive_interval:
+            # Comment line; keeps proxies from closing an idle connection
+            yield ': keep-alive\n\n'
+            last_sent = time.monotonic()
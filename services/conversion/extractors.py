@@ -2,71 +2,169 @@
 PDF Extraction Module
 Handles raw data extraction from PDF files using different parsers.
 """
+import io
+
 import pdfplumber
 
+from shared.tracing import span, traced
+
+
+class ExtractionCancelled(Exception):
+    """Raised from an on_page callback to stop an extraction early."""
+
+
+def _pdf_source(pdf):
+    """
+    Normalize the PDF argument for pdfplumber.
+    Accepts a file path, an open binary file or memory map, or an in-memory
+    buffer (bytes, bytearray, memoryview).
+    """
+    if isinstance(pdf, (bytes, bytearray, memoryview)):
+        return io.BytesIO(pdf)
+    return pdf
+
 
-def extract_tables_pdfplumber(pdf_path):
+def extract_tables_pdfplumber(pdf_path, on_page=None):
     """
     Extract tables from PDF using pdfplumber.
+    pdf_path may be a path, a memory-mapped or open file, or bytes.
     Returns list of tables (each table is a list of rows).
+    If given, on_page(page_number, total_pages) is called after every page;
+    raising ExtractionCancelled from it aborts the extraction.
     """
     tables = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            page_tables = page.extract_tables()
-            if page_tables:
-                for table in page_tables:
-                    # Clean table: replace None with empty string
-                    clean_table = [
-                        [cell if cell is not None else "" for cell in row]
-                        for row in table
-                    ]
-                    tables.append(clean_table)
+    with pdfplumber.open(_pdf_source(pdf_path)) as pdf:
+        total_pages = len(pdf.pages)
+        for page_num, page in enumerate(pdf.pages, start=1):
+            with span('page', page=page_num):
+                tables.extend(extract_page_tables(page))
+            if on_page:
+                on_page(page_num, total_pages)
+    return tables
+
+
+def extract_page_tables(page):
+    """Extract the cleaned tables of a single pdfplumber page."""
+    tables = []
+    with span('page.extract_tables'):
+        page_tables = page.extract_tables()
+    if page_tables:
+        with span('page.clean_tables'):
+            for table in page_tables:
+                # Clean table: replace None with empty string
+                clean_table = [
+                    [cell if cell is not None else "" for cell in row]
+                    for row in table
+                ]
+                tables.append(clean_table)
     return tables
 
 
-def extract_text_lines(pdf_path):
+def extract_text_lines(pdf_path, on_page=None):
     """
     Fallback: Extract structured text when no tables found.
     Returns structured data for non-tabular documents (CVs, reports, etc.).
+    Accepts the same on_page callback as extract_tables_pdfplumber.
     """
     lines = []
-    with pdfplumber.open(pdf_path) as pdf:
+    with pdfplumber.open(_pdf_source(pdf_path)) as pdf:
+        total_pages = len(pdf.pages)
         for page_num, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ''
-            for line in text.splitlines():
-                if line.strip():
-                    lines.append([line])
+            with span('page', page=page_num):
+                lines.extend(extract_page_text_lines(page))
+            if on_page:
+                on_page(page_num, total_pages)
     return [lines] if lines else []
 
 
-def extract_structured_text_json(pdf_path):
+def extract_page_text_lines(page):
+    """Extract the non-empty text lines of a single page as one-cell rows."""
+    with span('page.extract_text'):
+        text = page.extract_text() or ''
+    return [[line] for line in text.splitlines() if line.strip()]
+
+
+def extract_page_texts(pdf_path, on_page=None):
     """
-    Extract structured text content for JSON output (CVs, resumes, reports).
-    Organizes content by pages and sections.
+    Extract the plain text of every page, for the text fallback of the JSON
+    and text writers. Returns a dict of page number to text.
+    Accepts the same on_page callback as extract_tables_pdfplumber.
+    """
+    texts = {}
+    with pdfplumber.open(_pdf_source(pdf_path)) as pdf:
+        total_pages = len(pdf.pages)
+        for page_num, page in enumerate(pdf.pages, start=1):
+            with span('page', page=page_num):
+                texts[page_num] = extract_page_text(page)
+            if on_page:
+                on_page(page_num, total_pages)
+    return texts
+
+
+def extract_page_text(page):
+    """Extract the plain text of a single page."""
+    with span('page.extract_text'):
+        return page.extract_text() or ''
+
+
+# Extraction of one page per mode: cleaned tables, one-cell text line rows, plain text
+PAGE_EXTRACTORS = {
+    'tables': extract_page_tables,
+    'text': extract_page_text_lines,
+    'page_text': extract_page_text
+}
+
+
+def iter_page_results(pdf_path, mode):
+    """
+    Extract a PDF page by page with the page extractor of mode.
+    Yields (page_number, total_pages, result); closing the generator early
+    leaves the remaining pages unparsed.
+    """
+    extract_page = PAGE_EXTRACTORS[mode]
+    with pdfplumber.open(_pdf_source(pdf_path)) as pdf:
+        total_pages = len(pdf.pages)
+        for page_num, page in enumerate(pdf.pages, start=1):
+            with span('page', page=page_num):
+                result = extract_page(page)
+            yield page_num, total_pages, result
+
+
+def structured_text_json(page_texts):
+    """
+    Build the structured text result of the JSON writer from a dict of page
+    number to text. Organizes content by pages; pages without text are left out.
     """
     result = {
         "document_type": "text",
         "pages": []
     }
     
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ''
-            
-            if not text.strip():
-                continue
-            
-            # Split into lines and organize
-            lines = [line for line in text.splitlines() if line.strip()]
-            
-            page_data = {
-                "page_number": page_num,
-                "line_count": len(lines),
-                "content": text.strip(),
-                "lines": lines
-            }
-            
-            result["pages"].append(page_data)
+    for page_num in sorted(page_texts):
+        text = page_texts[page_num]
+        
+        if not text.strip():
+            continue
+        
+        # Split into lines and organize
+        lines = [line for line in text.splitlines() if line.strip()]
+        
+        page_data = {
+            "page_number": page_num,
+            "line_count": len(lines),
+            "content": text.strip(),
+            "lines": lines
+        }
+        
+        result["pages"].append(page_data)
     
     return result
+
+
+@traced()
+def extract_structured_text_json(pdf_path):
+    """
+    Extract structured text content for JSON output (CVs, resumes, reports).
+    Organizes content by pages and sections.
+    """
+    return structured_text_json(extract_page_texts(pdf_path))
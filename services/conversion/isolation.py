@@ -0,0 +1,191 @@
+"""
+Isolated Extraction Module
+Runs PDF extraction in a child process that reports every page back as a JSON
+line, so a page that makes the parser hang (or crash) can be killed without
+losing the pages extracted so far.
+
+The child is a fresh interpreter running this file rather than a
+multiprocessing child, so it never re-imports the service's main module.
+"""
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+if __name__ == '__main__':
+    # The child runs this file directly; make the repository-level shared package importable
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from shared.tracing import Trace, activate, current_trace, span
+
+# How often the parent wakes up to check deadlines and cancellation
+CHECK_INTERVAL = 0.25  # seconds
+
+
+class JobTimeout(Exception):
+    """Raised when the job's time budget runs out before extraction finished."""
+
+
+def _child_main(pdf_path, mode, start_page, traced=False):
+    """
+    Child process: extract pages from start_page on and write one JSON line per page.
+
+    Messages: {"open": total_pages}, {"page": page_num, "rows": [...]},
+    {"done": true}, or {"error": message} if the PDF cannot be processed.
+    When traced, page messages also carry the spans recorded for the page
+    ("spans"), which the parent merges into its trace.
+    """
+    # Keep stray prints from the PDF libraries out of the message stream
+    out = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    sys.stdout = sys.stderr
+
+    def send(message):
+        out.write(json.dumps(message) + '\n')
+        out.flush()
+
+    trace = Trace('extraction') if traced else None
+    try:
+        import pdfplumber
+        from extractors import PAGE_EXTRACTORS
+        from shared.storage import map_file
+
+        extract_page = PAGE_EXTRACTORS[mode]
+        with activate(trace), map_file(pdf_path) as pdf_data, pdfplumber.open(pdf_data) as pdf:
+            send({'open': len(pdf.pages)})
+            for page_num in range(start_page, len(pdf.pages) + 1):
+                page = pdf.pages[page_num - 1]
+                with span('page', page=page_num, mode=mode):
+                    rows = extract_page(page)
+                message = {'page': page_num, 'rows': rows}
+                if trace:
+                    message['spans'] = trace.drain()
+                send(message)
+                # Release the page's parsed objects before moving on
+                page.close()
+        send({'done': True})
+    except Exception as e:
+        send({'error': f"{type(e).__name__}: {e}"})
+
+
+def _start_child(pdf_path, mode, start_page, traced=False):
+    """Start an extraction child and a thread that queues its messages (None at EOF)."""
+    args = [sys.executable, os.path.abspath(__file__), pdf_path, mode, str(start_page)]
+    if traced:
+        args.append('trace')
+    process = subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        text=True
+    )
+    messages = queue.Queue()
+
+    def read():
+        for line in process.stdout:
+            messages.put(json.loads(line))
+        messages.put(None)
+
+    threading.Thread(target=read, name='extraction-reader', daemon=True).start()
+    return process, messages
+
+
+def _stop(process):
+    if process.poll() is None:
+        process.kill()
+    process.wait()
+
+
+def extract_isolated(pdf_path, mode, page_timeout, deadline=None, on_page=None, check=None):
+    """
+    Extract tables or text lines page by page in a child process.
+
+    A page that takes longer than page_timeout (or kills the child) is
+    recorded as a page error and extraction resumes with the next page in a
+    fresh child. Spans the child records are added to the calling thread's
+    trace, if it has one.
+
+    Args:
+        pdf_path: Path to the PDF file
+        mode: 'tables' (cleaned tables), 'text' (one-cell text line rows) or
+            'page_text' (the page's plain text)
+        page_timeout: Seconds allowed per page
+        deadline: time.monotonic() value by which extraction must finish
+        on_page: Optional on_page(page_number, total_pages) progress callback
+        check: Optional callable run every CHECK_INTERVAL; raise from it to abort
+
+    Returns:
+        Tuple of (results, page_errors): results maps page number to the
+        page's tables, lines or text, page_errors is a list of {'page', 'error'}
+
+    Raises:
+        JobTimeout: The deadline passed; the exception carries the page it
+            stopped at and the partial results (page, results, page_errors)
+        RuntimeError: The PDF could not be processed
+    """
+    results = {}
+    page_errors = []
+    start_page = 1
+    total_pages = None
+    trace = current_trace()
+
+    while total_pages is None or start_page <= total_pages:
+        process, messages = _start_child(pdf_path, mode, start_page, traced=trace is not None)
+        current_page = start_page
+        page_started = time.monotonic()
+        page_failed = None
+
+        try:
+            while page_failed is None:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    error = JobTimeout(f"Time limit reached at page {current_page}")
+                    error.page, error.results, error.page_errors = current_page, results, page_errors
+                    raise error
+                if now - page_started >= page_timeout:
+                    page_failed = f"Page timed out after {page_timeout}s"
+                    break
+                if check:
+                    check()
+
+                wait = min(CHECK_INTERVAL, page_timeout - (now - page_started))
+                if deadline is not None:
+                    wait = min(wait, deadline - now)
+                try:
+                    message = messages.get(timeout=max(wait, 0.001))
+                except queue.Empty:
+                    continue
+
+                if message is None:
+                    page_failed = f"Extraction process died (exit code {process.wait()})"
+                elif 'open' in message:
+                    total_pages = message['open']
+                    page_started = time.monotonic()
+                elif 'page' in message:
+                    results[message['page']] = message['rows']
+                    if trace and message.get('spans'):
+                        trace.add_events(message['spans'])
+                    current_page = message['page'] + 1
+                    page_started = time.monotonic()
+                    if on_page:
+                        on_page(message['page'], total_pages)
+                elif 'done' in message:
+                    return results, page_errors
+                elif 'error' in message:
+                    raise RuntimeError(message['error'])
+        finally:
+            _stop(process)
+
+        if total_pages is None:
+            # The document itself could not be opened
+            raise RuntimeError(f"Could not open PDF: {page_failed}")
+        page_errors.append({'page': current_page, 'error': page_failed})
+        start_page = current_page + 1
+
+    return results, page_errors
+
+
+if __name__ == '__main__':
+    _child_main(sys.argv[1], sys.argv[2], int(sys.argv[3]), traced='trace' in sys.argv[4:])
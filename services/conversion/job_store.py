@@ -0,0 +1,345 @@
+"""
+Job Store Module
+Persistent conversion job state shared by every conversion-service process.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+# Progress-only updates are written at most this often per process
+DEFAULT_FLUSH_INTERVAL = 0.5  # seconds
+
+
+class JobStore(ABC):
+    """
+    Interface for conversion job storage.
+
+    Jobs are dictionaries in the API's camelCase format, keyed by ``jobId``.
+    Every write bumps the job's ``version``, so readers can tell whether a
+    job changed since they last saw it. Callbacks registered with
+    ``subscribe`` are called with the job id after every write made through
+    this store (writes by other processes are only seen by reading).
+    """
+
+    _listeners = ()
+
+    def subscribe(self, callback):
+        """Call callback(job_id) whenever this store writes a job."""
+        self._listeners = (*self._listeners, callback)
+
+    def _notify(self, job_id):
+        for callback in self._listeners:
+            callback(job_id)
+
+    @abstractmethod
+    def create(self, job):
+        """Insert a new job."""
+
+    @abstractmethod
+    def get(self, job_id):
+        """Return a job, or None if it does not exist."""
+
+    @abstractmethod
+    def update(self, job_id, fields, batch=False):
+        """
+        Merge fields into a job.
+
+        Args:
+            job_id: Job identifier
+            fields: Dictionary of fields to set
+            batch: Progress-only update that may be coalesced with later ones
+                and written with a short delay
+        """
+
+    @abstractmethod
+    def transition(self, job_id, fields, statuses):
+        """
+        Merge fields into a job only while its status is one of statuses,
+        checked and written as one step.
+
+        Returns:
+            True if the job was updated
+        """
+
+    @abstractmethod
+    def delete(self, job_id):
+        """Delete a job if it exists."""
+
+    @abstractmethod
+    def list_jobs(self, statuses=None, created_before=None, limit=None):
+        """Return jobs filtered by status and creation time (ISO 8601), oldest first."""
+
+    def flush(self):
+        """Write any batched updates that are still pending."""
+
+
+class MemoryJobStore(JobStore):
+    """Job store for a single process (jobs are lost on restart)."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job['jobId']] = {**job, 'version': 1}
+        self._notify(job['jobId'])
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job is not None else None
+
+    def update(self, job_id, fields, batch=False):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+                job['version'] += 1
+        self._notify(job_id)
+
+    def transition(self, job_id, fields, statuses):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] not in statuses:
+                return False
+            job.update(fields)
+            job['version'] += 1
+        self._notify(job_id)
+        return True
+
+    def delete(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def list_jobs(self, statuses=None, created_before=None, limit=None):
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda job: job['createdAt'])
+            jobs = [
+                json.loads(json.dumps(job)) for job in jobs
+                if (statuses is None or job['status'] in statuses)
+                and (created_before is None or job['createdAt'] < created_before)
+            ]
+        return jobs[:limit] if limit is not None else jobs
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Job store in an embedded SQLite database.
+
+    The database runs in WAL mode, so status reads never block the worker
+    writing progress, and several processes on one host (e.g. gunicorn
+    workers) can share it. Batched progress updates are coalesced in memory
+    and written at most every ``flush_interval`` seconds, by a background
+    thread once updates stop; any other write of the same job in this process
+    writes them first. Reads in this process see them merged in memory, with
+    the version the job will have once they are written.
+    """
+
+    def __init__(self, path, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._pending = {}  # job id -> (batched fields not yet written, number of updates)
+        self._pending_lock = threading.Lock()
+        # Held from taking pending fields until they are written, so a read
+        # finds them either pending or stored
+        self._flush_lock = threading.RLock()
+        self._last_flush = time.monotonic()
+
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' job_id TEXT PRIMARY KEY,'
+                ' status TEXT NOT NULL,'
+                ' created_at TEXT NOT NULL,'
+                ' updated_at REAL NOT NULL,'
+                ' version INTEGER NOT NULL,'
+                ' data TEXT NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at)')
+
+        threading.Thread(target=self._flush_loop, name='job-store-flush', daemon=True).start()
+
+    def _conn(self):
+        """Connection for the calling thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_job(row):
+        job = json.loads(row[0])
+        job['version'] = row[1]
+        return job
+
+    def _write(self, job_id, fields, updates=1, statuses=None):
+        """
+        Merge fields into a stored job within one write transaction, as that
+        many updates; with statuses, only if the job's status is one of them.
+
+        Returns:
+            True if the job was updated
+        """
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT data, status FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+            applied = row is not None and (statuses is None or row[1] in statuses)
+            if applied:
+                job = json.loads(row[0])
+                job.update(fields)
+                conn.execute(
+                    'UPDATE jobs SET status = ?, updated_at = ?, version = version + ?, data = ?'
+                    ' WHERE job_id = ?',
+                    (job['status'], time.time(), updates, json.dumps(job), job_id)
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return applied
+
+    def _take_pending(self, job_id=None):
+        with self._pending_lock:
+            if job_id is None:
+                pending, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+                return pending
+            pending = self._pending.pop(job_id, None)
+            return {job_id: pending} if pending else {}
+
+    def _restore_pending(self, pending):
+        """Put back taken fields that were not written, under any newer updates."""
+        with self._pending_lock:
+            for job_id, (fields, updates) in pending.items():
+                newer, newer_updates = self._pending.get(job_id, ({}, 0))
+                self._pending[job_id] = ({**fields, **newer}, updates + newer_updates)
+
+    def _flush_loop(self):
+        """Write batched updates that no later update has flushed."""
+        while True:
+            time.sleep(self.flush_interval)
+            if self._pending and time.monotonic() - self._last_flush >= self.flush_interval:
+                try:
+                    self.flush()
+                except sqlite3.Error:
+                    # Kept pending; the next round tries again
+                    pass
+
+    def create(self, job):
+        job = {key: value for key, value in job.items() if key != 'version'}
+        with self._conn() as conn:
+            conn.execute(
+                'INSERT INTO jobs (job_id, status, created_at, updated_at, version, data)'
+                ' VALUES (?, ?, ?, ?, 1, ?)',
+                (job['jobId'], job['status'], job['createdAt'], time.time(), json.dumps(job))
+            )
+        self._notify(job['jobId'])
+
+    def get(self, job_id):
+        with self._flush_lock:
+            row = self._conn().execute(
+                'SELECT data, version FROM jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+            with self._pending_lock:
+                fields, updates = self._pending.get(job_id, ({}, 0))
+                fields = json.loads(json.dumps(fields))
+        if row is None:
+            return None
+        job = self._row_to_job(row)
+        job.update(fields)
+        job['version'] += updates
+        return job
+
+    def update(self, job_id, fields, batch=False):
+        if batch:
+            with self._pending_lock:
+                pending, updates = self._pending.get(job_id, ({}, 0))
+                self._pending[job_id] = ({**pending, **fields}, updates + 1)
+                due = time.monotonic() - self._last_flush >= self.flush_interval
+            if due:
+                self.flush()
+            # Listeners read the pending fields merged into the job
+            self._notify(job_id)
+            return
+
+        with self._flush_lock:
+            pending, updates = self._take_pending(job_id).get(job_id, ({}, 0))
+            self._write(job_id, {**pending, **fields}, updates + 1)
+        self._notify(job_id)
+
+    def flush(self):
+        with self._flush_lock:
+            pending = self._take_pending()
+            try:
+                while pending:
+                    job_id, (fields, updates) = next(iter(pending.items()))
+                    self._write(job_id, fields, updates)
+                    del pending[job_id]
+            finally:
+                self._restore_pending(pending)
+
+    def transition(self, job_id, fields, statuses):
+        with self._flush_lock:
+            taken = self._take_pending(job_id)
+            pending, updates = taken.get(job_id, ({}, 0))
+            applied = False
+            try:
+                applied = self._write(job_id, {**pending, **fields}, updates + 1, statuses)
+            finally:
+                if not applied:
+                    self._restore_pending(taken)
+        if applied:
+            self._notify(job_id)
+        return applied
+
+    def delete(self, job_id):
+        with self._flush_lock:
+            self._take_pending(job_id)
+            with self._conn() as conn:
+                conn.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+
+    def list_jobs(self, statuses=None, created_before=None, limit=None):
+        self.flush()
+        query = 'SELECT data, version FROM jobs'
+        clauses, params = [], []
+        if statuses is not None:
+            clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if created_before is not None:
+            clauses.append('created_at < ?')
+            params.append(created_before)
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' ORDER BY created_at'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        return [self._row_to_job(row) for row in self._conn().execute(query, params)]
+
+
+def create_job_store(backend, path):
+    """
+    Create the configured job store.
+
+    Args:
+        backend: 'sqlite' (default) or 'memory'
+        path: SQLite database file
+    """
+    if backend == 'memory':
+        return MemoryJobStore()
+    if backend == 'sqlite':
+        return SQLiteJobStore(path)
+    raise ValueError(f"Unknown job store: {backend}")
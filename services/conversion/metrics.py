@@ -0,0 +1,74 @@
+"""
+Conversion Metrics Module
+Metrics recorded by the conversion worker and the output writers.
+
+Writing a file includes analysing its tables (header detection, validation);
+the writers time the analysis separately, so the write stage is reported
+without it.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from shared.metrics import REGISTRY
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'conversion_stage_seconds', 'Time spent per file in each conversion stage', ('stage',)
+)
+JOB_SECONDS = REGISTRY.histogram(
+    'conversion_job_seconds', 'Time from a job starting to run until it finished', ('status',)
+)
+PAGES_PER_SECOND = REGISTRY.histogram(
+    'conversion_pages_per_second', 'Extraction throughput per file',
+    buckets=(0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+ROWS_PER_SECOND = REGISTRY.histogram(
+    'conversion_rows_per_second', 'Output throughput per file, analysis included',
+    buckets=(100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)
+)
+PAGES = REGISTRY.counter('conversion_pages_total', 'Pages extracted')
+ROWS = REGISTRY.counter('conversion_rows_total', 'Table rows written')
+BYTES_IN = REGISTRY.counter('conversion_bytes_in_total', 'Bytes of PDF input converted')
+BYTES_OUT = REGISTRY.counter('conversion_bytes_out_total', 'Bytes of output files written')
+JOBS = REGISTRY.counter('conversion_jobs_total', 'Conversion jobs finished', ('status',))
+
+_analysis = threading.local()
+
+
+@contextmanager
+def analysis_timer():
+    """Add the duration of the with block to this thread's analysis time."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _analysis.seconds = getattr(_analysis, 'seconds', 0.0) + time.perf_counter() - started
+
+
+def take_analysis_time():
+    """Return and reset this thread's analysis time."""
+    seconds = getattr(_analysis, 'seconds', 0.0)
+    _analysis.seconds = 0.0
+    return seconds
+
+
+def record_extraction(seconds, pages):
+    """Record one extraction of a file."""
+    STAGE_SECONDS.labels('extract').observe(seconds)
+    if pages:
+        PAGES.inc(pages)
+        if seconds > 0:
+            PAGES_PER_SECOND.observe(pages / seconds)
+
+
+def record_writing(seconds, analysis_seconds, rows, output_paths):
+    """Record the output of one file; seconds includes analysis_seconds."""
+    STAGE_SECONDS.labels('analyze').observe(analysis_seconds)
+    write_seconds = max(seconds - analysis_seconds, 0.0)
+    STAGE_SECONDS.labels('write').observe(write_seconds)
+    if rows:
+        ROWS.inc(rows)
+        if seconds > 0:
+            ROWS_PER_SECOND.observe(rows / seconds)
+    BYTES_OUT.inc(sum(os.path.getsize(path) for path in output_paths if os.path.exists(path)))
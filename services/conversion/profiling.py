@@ -0,0 +1,157 @@
+"""
+Job Profiling Module
+Profiles a single conversion job on request.
+
+A profiled job runs under cProfile (deterministic, per function) while a
+sampler thread records the job thread's call stack at a fixed interval, and
+tracemalloc records where memory was allocated. The results are written as:
+
+- profile.pstats: cProfile stats, for pstats, snakeviz or gprof2dot
+- profile.txt: the top functions by cumulative and by own time
+- profile-allocations.txt: peak traced memory and the top allocation sites
+- profile-stacks.folded: sampled stacks in the collapsed format read by
+  flamegraph.pl, speedscope and inferno
+
+cProfile only sees the thread that started it, so extraction of a profiled
+job has to run in that thread rather than in a child process. tracemalloc is
+process-wide: one job is profiled at a time, and allocations of other jobs
+running alongside it are counted too.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# Seconds between two stack samples of the profiled thread
+SAMPLE_INTERVAL = 0.005
+# Frames kept per allocation traceback
+TRACEMALLOC_FRAMES = 10
+# Functions and allocation sites listed in the text reports
+REPORT_LIMIT = 40
+
+PROFILE_FILES = (
+    'profile.pstats', 'profile.txt', 'profile-allocations.txt', 'profile-stacks.folded'
+)
+
+# tracemalloc (and the sampler's view of the process) is shared by every thread
+_profile_lock = threading.Lock()
+
+
+def _frame_name(code):
+    """Name of a frame in a collapsed stack; ';' separates frames, so it is dropped."""
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+
+
+class JobProfiler:
+    """Profiles the calling thread between start() and save()."""
+
+    def __init__(self, sample_interval=SAMPLE_INTERVAL):
+        """
+        Args:
+            sample_interval: Seconds between two stack samples
+        """
+        self.sample_interval = sample_interval
+        self._profile = cProfile.Profile()
+        self._stacks = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._sampler = None
+        self._thread_id = None
+        self._started = None
+        self._elapsed = None
+        self._peak_bytes = 0
+        self._snapshot = None
+
+    def start(self):
+        """Start profiling the calling thread; waits while another job is profiled."""
+        _profile_lock.acquire()
+        self._thread_id = threading.get_ident()
+        try:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._sampler = threading.Thread(target=self._sample, name='profile-sampler', daemon=True)
+            self._sampler.start()
+        except Exception:
+            self._thread_id = None
+            tracemalloc.stop()
+            _profile_lock.release()
+            raise
+        self._started = time.perf_counter()
+        self._profile.enable()
+
+    def stop(self):
+        """Stop profiling; safe to call more than once."""
+        if self._thread_id is None or self._elapsed is not None:
+            return
+        self._profile.disable()
+        self._elapsed = time.perf_counter() - self._started
+        self._stop.set()
+        self._sampler.join()
+        try:
+            self._peak_bytes = tracemalloc.get_traced_memory()[1]
+            self._snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+        finally:
+            tracemalloc.stop()
+            _profile_lock.release()
+
+    def _sample(self):
+        """Sampler thread: count the profiled thread's current call stack."""
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self._stacks[';'.join(reversed(stack))] += 1
+                self._samples += 1
+
+    def save(self, output_dir):
+        """
+        Stop profiling and write the profile files.
+
+        Args:
+            output_dir: Folder to write the files to
+
+        Returns:
+            List of written file paths, in PROFILE_FILES order
+        """
+        self.stop()
+        os.makedirs(output_dir, exist_ok=True)
+        paths = [os.path.join(output_dir, filename) for filename in PROFILE_FILES]
+        stats_path, report_path, allocations_path, stacks_path = paths
+
+        self._profile.dump_stats(stats_path)
+
+        report = io.StringIO()
+        report.write(f"Wall time: {self._elapsed:.3f}s, {self._samples} stack samples\n")
+        stats = pstats.Stats(self._profile, stream=report).strip_dirs()
+        for sort in ('cumulative', 'tottime'):
+            report.write(f"\n=== Top {REPORT_LIMIT} functions by {sort} time ===\n")
+            stats.sort_stats(sort).print_stats(REPORT_LIMIT)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+
+        with open(allocations_path, 'w', encoding='utf-8') as f:
+            f.write(f"Peak traced memory: {self._peak_bytes / 1024 / 1024:.1f} MiB\n")
+            f.write(f"\n=== Top {REPORT_LIMIT} allocation sites still held at the end ===\n")
+            for stat in self._snapshot.statistics('lineno')[:REPORT_LIMIT]:
+                f.write(f"{stat}\n")
+            f.write(f"\n=== Top {REPORT_LIMIT} allocation tracebacks ===\n")
+            for stat in self._snapshot.statistics('traceback')[:REPORT_LIMIT]:
+                f.write(f"\n{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                f.write('\n'.join(stat.traceback.format()) + '\n')
+
+        with open(stacks_path, 'w', encoding='utf-8') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        return paths
@@ -0,0 +1,107 @@
+"""
+Job Progress Module
+Page- and row-level progress of a conversion job, with throughput and an
+estimate of the time remaining, written to the job store at a limited rate.
+"""
+import time
+
+# Progress is written to the job store at most this often
+PROGRESS_INTERVAL = 0.5  # seconds
+
+# Share of a file's progress taken by extraction; writing the output is the rest
+EXTRACTION_WEIGHT = 0.9
+
+
+class JobProgress:
+    """
+    Tracks progress across the files of one job.
+
+    Extraction reports pages through on_page(page, total) and the output
+    writers report rows through on_rows(count). Every report updates the
+    job's progress fields; they are written (as batched updates) when
+    PROGRESS_INTERVAL has passed since the last write, or when a file ends.
+    """
+
+    def __init__(self, jobs, job_id, total_files, interval=PROGRESS_INTERVAL):
+        self.jobs = jobs
+        self.job_id = job_id
+        self.total_files = max(total_files, 1)
+        self.interval = interval
+        self.started = time.monotonic()
+        self._last_write = None
+
+        self.files_done = 0
+        self.pages_done = 0  # pages of finished files
+        self.pages_total = 0
+        self.files_with_pages = 0
+        self.file_pages_done = 0
+        self.file_pages_total = 0
+        self.file_rows_done = 0
+        self.file_rows_total = 0
+
+    def start_file(self):
+        self.file_pages_done = self.file_pages_total = 0
+        self.file_rows_done = self.file_rows_total = 0
+
+    def on_page(self, page_num, total_pages):
+        """Extraction callback; a second pass over the same file does not count twice."""
+        self.file_pages_total = total_pages
+        self.file_pages_done = max(self.file_pages_done, page_num)
+        self._report()
+
+    def start_writing(self, tables):
+        self.file_rows_total = sum(len(table) for table in tables)
+        self.file_rows_done = 0
+        self._report()
+
+    def on_rows(self, count):
+        """Writer callback, called after every batch of rows written."""
+        self.file_rows_done += count
+        self._report()
+
+    def finish_file(self):
+        self.files_done += 1
+        if self.file_pages_total:
+            self.pages_done += self.file_pages_total
+            self.pages_total += self.file_pages_total
+            self.files_with_pages += 1
+        self.start_file()
+        self._report(force=True)
+
+    def fields(self):
+        """Current progress fields of the job."""
+        if self.file_pages_total:
+            extracted = self.file_pages_done / self.file_pages_total
+        else:
+            # Unknown page count (e.g. tables came from the cache)
+            extracted = 1.0 if self.file_rows_total else 0.0
+        written = self.file_rows_done / self.file_rows_total if self.file_rows_total else 0.0
+        file_fraction = EXTRACTION_WEIGHT * extracted + (1 - EXTRACTION_WEIGHT) * written
+
+        pages_done = self.pages_done + self.file_pages_done
+        pages_total = self.pages_total + self.file_pages_total
+        elapsed = time.monotonic() - self.started
+        pages_per_second = pages_done / elapsed if pages_done and elapsed > 0 else None
+
+        eta_seconds = None
+        if pages_per_second:
+            # Files not opened yet are assumed to be as long as the ones seen so far
+            files_seen = self.files_with_pages + (1 if self.file_pages_total else 0)
+            unopened = self.total_files - self.files_done - (1 if self.file_pages_total else 0)
+            expected_total = pages_total + max(unopened, 0) * (pages_total / files_seen)
+            eta_seconds = round(max(expected_total - pages_done, 0) / pages_per_second, 1)
+
+        return {
+            'progress': min(int((self.files_done + file_fraction) / self.total_files * 100), 99),
+            'pagesDone': pages_done,
+            'pagesTotal': pages_total,
+            'pagesPerSecond': round(pages_per_second, 2) if pages_per_second else None,
+            'etaSeconds': eta_seconds
+        }
+
+    def _report(self, force=False):
+        now = time.monotonic()
+        if not force and self._last_write is not None and now - self._last_write < self.interval:
+            return
+        self._last_write = now
+        self.jobs.update(self.job_id, self.fields(), batch=True)
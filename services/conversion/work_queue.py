@@ -0,0 +1,394 @@
+"""
+Work Queue Module
+Persistent queue of conversion tasks with leases, heartbeats and bounded retries,
+so jobs survive restarts and crashed workers without an external broker.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 5  # multiplied by the number of failed attempts
+
+QUEUED = 'queued'
+LEASED = 'leased'
+DONE = 'done'
+DEAD = 'dead'
+
+# Priority classes and their weighted round-robin shares: out of every four
+# leases, three go to interactive work while both classes have tasks waiting
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+DEFAULT_PRIORITY_WEIGHTS = {INTERACTIVE: 3, BULK: 1}
+
+# Window over which per-class wait times are reported
+WAIT_STATS_WINDOW = 300  # seconds
+
+
+class QueueFull(Exception):
+    """
+    Raised by enqueue when an admission limit is reached.
+
+    ``scope`` is 'client' when the submitting client has too many tasks
+    waiting, or 'class' when the priority class as a whole is full.
+    """
+
+    def __init__(self, message, scope):
+        super().__init__(message)
+        self.scope = scope
+
+
+class WorkQueue(ABC):
+    """
+    Interface for the conversion task queue.
+
+    A consumer leases a task for a limited time and keeps the lease alive with
+    heartbeats while it works. Tasks whose lease runs out (the worker crashed
+    or hung) go back to the queue until they have been attempted
+    ``max_attempts`` times, after which they are dead-lettered. Adapters for
+    an external broker implement the same methods.
+
+    Tasks belong to a priority class and a client. Leases alternate between
+    classes by weighted round-robin, and within a class go to the client
+    with the fewest tasks running, so one client's backlog cannot starve
+    the others.
+    """
+
+    lease_seconds = DEFAULT_LEASE_SECONDS
+
+    @abstractmethod
+    def enqueue(self, job_id, payload, priority=INTERACTIVE, client_id=None):
+        """
+        Add a task for job_id; payload must be JSON-serializable.
+
+        Raises:
+            QueueFull: An admission limit was reached
+        """
+
+    @abstractmethod
+    def lease(self, owner):
+        """
+        Lease the next available task.
+
+        Returns:
+            Task dictionary (taskId, jobId, payload, attempts) or None
+        """
+
+    @abstractmethod
+    def heartbeat(self, task_id, owner):
+        """Extend a lease; returns False if the lease was lost."""
+
+    @abstractmethod
+    def complete(self, task_id, owner):
+        """Mark a leased task as done."""
+
+    @abstractmethod
+    def fail(self, task_id, owner, error):
+        """
+        Give a leased task back after a failure.
+
+        Returns:
+            New task state (queued for a retry, or dead)
+        """
+
+    @abstractmethod
+    def reap_expired(self):
+        """
+        Requeue or dead-letter tasks whose lease has expired.
+
+        Returns:
+            List of (task dictionary, new state) for every reaped task
+        """
+
+    @abstractmethod
+    def stats(self):
+        """
+        Return the number of tasks in each state, and per priority class the
+        queue depth and the wait times of recently leased tasks.
+        """
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Work queue in an embedded SQLite database (WAL mode).
+
+    Several processes on one host can consume from the same file; leasing
+    runs in an immediate transaction, so a task is handed to one consumer.
+    """
+
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 weights=None, class_limits=None, client_limit=None, running_limits=None):
+        """
+        Args:
+            path: SQLite database file
+            lease_seconds: How long a lease lasts without a heartbeat
+            max_attempts: Attempts before a task is dead-lettered
+            weights: Round-robin weight per priority class
+            class_limits: Maximum waiting tasks per priority class
+            client_limit: Maximum waiting tasks per client and class
+            running_limits: Maximum leased tasks per priority class, e.g. to
+                keep a consumer free for interactive work
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.weights = dict(weights or DEFAULT_PRIORITY_WEIGHTS)
+        self.class_limits = dict(class_limits or {})
+        self.client_limit = client_limit
+        self.running_limits = dict(running_limits or {})
+        # Round-robin schedule, e.g. [interactive, interactive, interactive, bulk]
+        self._schedule = [name for name, weight in self.weights.items() for _ in range(weight)]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS tasks ('
+                ' task_id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' job_id TEXT NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' state TEXT NOT NULL,'
+                ' attempts INTEGER NOT NULL DEFAULT 0,'
+                ' lease_owner TEXT,'
+                ' lease_expires REAL,'
+                ' available_at REAL NOT NULL,'
+                ' created_at REAL NOT NULL,'
+                ' last_error TEXT)'
+            )
+            # Columns added after the first release
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(tasks)')}
+            for column, definition in (
+                ('priority', f"TEXT NOT NULL DEFAULT '{INTERACTIVE}'"),
+                ('client_id', "TEXT NOT NULL DEFAULT ''"),
+                ('leased_at', 'REAL'),
+            ):
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE tasks ADD COLUMN {column} {definition}')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_state_available ON tasks (state, available_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_state_lease ON tasks (state, lease_expires)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_class_client ON tasks (state, priority, client_id)')
+            # Position in the round-robin schedule, shared by every consumer process
+            conn.execute('CREATE TABLE IF NOT EXISTS scheduler (id INTEGER PRIMARY KEY CHECK (id = 1), turn INTEGER NOT NULL)')
+            conn.execute('INSERT OR IGNORE INTO scheduler (id, turn) VALUES (1, 0)')
+
+    def _conn(self):
+        """Connection for the calling thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, func):
+        """Run func(conn) in an immediate (write-locking) transaction."""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = func(conn)
+            conn.execute('COMMIT')
+            return result
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    @staticmethod
+    def _row_to_task(row):
+        return {'taskId': row[0], 'jobId': row[1], 'payload': json.loads(row[2]), 'attempts': row[3]}
+
+    def _give_back(self, conn, task_id, attempts, error, now):
+        """Requeue a task with backoff, or dead-letter it once out of attempts."""
+        state = DEAD if attempts >= self.max_attempts else QUEUED
+        conn.execute(
+            'UPDATE tasks SET state = ?, lease_owner = NULL, lease_expires = NULL,'
+            ' available_at = ?, last_error = ? WHERE task_id = ?',
+            (state, now + RETRY_BACKOFF_SECONDS * attempts, error, task_id)
+        )
+        return state
+
+    def enqueue(self, job_id, payload, priority=INTERACTIVE, client_id=None):
+        if priority not in self.weights:
+            raise ValueError(f"Unknown priority class: {priority}")
+        client_id = client_id or ''
+
+        def add(conn):
+            class_limit = self.class_limits.get(priority)
+            if class_limit is not None:
+                waiting = conn.execute(
+                    'SELECT COUNT(*) FROM tasks WHERE state = ? AND priority = ?', (QUEUED, priority)
+                ).fetchone()[0]
+                if waiting >= class_limit:
+                    raise QueueFull(f"The {priority} queue is full", 'class')
+            if self.client_limit is not None:
+                waiting = conn.execute(
+                    'SELECT COUNT(*) FROM tasks WHERE state = ? AND priority = ? AND client_id = ?',
+                    (QUEUED, priority, client_id)
+                ).fetchone()[0]
+                if waiting >= self.client_limit:
+                    raise QueueFull(f"Too many {priority} conversions waiting for this client", 'client')
+            now = time.time()
+            cursor = conn.execute(
+                'INSERT INTO tasks (job_id, payload, state, available_at, created_at, priority, client_id)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, json.dumps(payload), QUEUED, now, now, priority, client_id)
+            )
+            return cursor.lastrowid
+        return self._transaction(add)
+
+    def _next_in_class(self, conn, priority, now):
+        """
+        Oldest available task of the client with the fewest running tasks in
+        a priority class, or None.
+        """
+        candidates = conn.execute(
+            'SELECT client_id, MIN(task_id) FROM tasks'
+            ' WHERE state = ? AND priority = ? AND available_at <= ? GROUP BY client_id',
+            (QUEUED, priority, now)
+        ).fetchall()
+        if not candidates:
+            return None
+        running = dict(conn.execute(
+            'SELECT client_id, COUNT(*) FROM tasks WHERE state = ? GROUP BY client_id', (LEASED,)
+        ).fetchall())
+        _, task_id = min(candidates, key=lambda c: (running.get(c[0], 0), c[1]))
+        return conn.execute(
+            'SELECT task_id, job_id, payload, attempts FROM tasks WHERE task_id = ?', (task_id,)
+        ).fetchone()
+
+    def lease(self, owner):
+        def take(conn):
+            now = time.time()
+            turn = conn.execute('SELECT turn FROM scheduler WHERE id = 1').fetchone()[0]
+            # This turn's class first, then the others, so no lease is wasted
+            preferred = self._schedule[turn % len(self._schedule)]
+            running = dict(conn.execute(
+                'SELECT priority, COUNT(*) FROM tasks WHERE state = ? GROUP BY priority', (LEASED,)
+            ).fetchall())
+            row = None
+            for priority in [preferred] + [name for name in self.weights if name != preferred]:
+                limit = self.running_limits.get(priority)
+                if limit is not None and running.get(priority, 0) >= limit:
+                    continue
+                row = self._next_in_class(conn, priority, now)
+                if row is not None:
+                    break
+            if row is None:
+                return None
+            conn.execute('UPDATE scheduler SET turn = ? WHERE id = 1', ((turn + 1) % len(self._schedule),))
+            conn.execute(
+                'UPDATE tasks SET state = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?,'
+                ' leased_at = ? WHERE task_id = ?',
+                (LEASED, owner, now + self.lease_seconds, now, row[0])
+            )
+            task = self._row_to_task(row)
+            task['attempts'] += 1
+            return task
+        return self._transaction(take)
+
+    def heartbeat(self, task_id, owner):
+        with self._conn() as conn:
+            cursor = conn.execute(
+                'UPDATE tasks SET lease_expires = ? WHERE task_id = ? AND state = ? AND lease_owner = ?',
+                (time.time() + self.lease_seconds, task_id, LEASED, owner)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task_id, owner):
+        with self._conn() as conn:
+            conn.execute(
+                'UPDATE tasks SET state = ?, lease_owner = NULL, lease_expires = NULL'
+                ' WHERE task_id = ? AND state = ? AND lease_owner = ?',
+                (DONE, task_id, LEASED, owner)
+            )
+
+    def fail(self, task_id, owner, error):
+        def give_back(conn):
+            row = conn.execute(
+                'SELECT attempts FROM tasks WHERE task_id = ? AND state = ? AND lease_owner = ?',
+                (task_id, LEASED, owner)
+            ).fetchone()
+            if row is None:
+                return None
+            return self._give_back(conn, task_id, row[0], error, time.time())
+        return self._transaction(give_back)
+
+    def reap_expired(self):
+        def reap(conn):
+            now = time.time()
+            rows = conn.execute(
+                'SELECT task_id, job_id, payload, attempts FROM tasks WHERE state = ? AND lease_expires < ?',
+                (LEASED, now)
+            ).fetchall()
+            return [
+                (self._row_to_task(row), self._give_back(conn, row[0], row[3], 'Lease expired', now))
+                for row in rows
+            ]
+        return self._transaction(reap)
+
+    def purge_done(self, older_than):
+        """Delete finished and dead tasks created more than older_than seconds ago."""
+        with self._conn() as conn:
+            conn.execute(
+                'DELETE FROM tasks WHERE state IN (?, ?) AND created_at < ?',
+                (DONE, DEAD, time.time() - older_than)
+            )
+
+    def stats(self):
+        conn = self._conn()
+        now = time.time()
+        counts = dict(conn.execute('SELECT state, COUNT(*) FROM tasks GROUP BY state').fetchall())
+        stats = {state: counts.get(state, 0) for state in (QUEUED, LEASED, DONE, DEAD)}
+
+        classes = {}
+        for priority in self.weights:
+            depth = dict(conn.execute(
+                'SELECT state, COUNT(*) FROM tasks WHERE priority = ? AND state IN (?, ?) GROUP BY state',
+                (priority, QUEUED, LEASED)
+            ).fetchall())
+            oldest = conn.execute(
+                'SELECT MIN(created_at) FROM tasks WHERE priority = ? AND state = ?', (priority, QUEUED)
+            ).fetchone()[0]
+            waited = conn.execute(
+                'SELECT AVG(leased_at - created_at), MAX(leased_at - created_at), COUNT(*) FROM tasks'
+                ' WHERE priority = ? AND leased_at >= ?',
+                (priority, now - WAIT_STATS_WINDOW)
+            ).fetchone()
+            classes[priority] = {
+                'queued': depth.get(QUEUED, 0),
+                'leased': depth.get(LEASED, 0),
+                'oldestWaitSeconds': round(now - oldest, 1) if oldest is not None else 0,
+                'avgWaitSeconds': round(waited[0], 3) if waited[0] is not None else None,
+                'maxWaitSeconds': round(waited[1], 3) if waited[1] is not None else None,
+                'leasedRecently': waited[2]
+            }
+        stats['classes'] = classes
+        return stats
+
+
+def create_work_queue(backend, path, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                      weights=None, class_limits=None, client_limit=None, running_limits=None):
+    """
+    Create the configured work queue.
+
+    Args:
+        backend: 'sqlite' (the only built-in queue)
+        path: SQLite database file
+        lease_seconds: How long a lease lasts without a heartbeat
+        max_attempts: Attempts before a task is dead-lettered
+        weights: Round-robin weight per priority class
+        class_limits: Maximum waiting tasks per priority class
+        client_limit: Maximum waiting tasks per client and class
+        running_limits: Maximum leased tasks per priority class
+    """
+    if backend == 'sqlite':
+        return SQLiteWorkQueue(
+            path, lease_seconds, max_attempts, weights, class_limits, client_limit, running_limits
+        )
+    raise ValueError(f"Unknown work queue: {backend}")
@@ -3,30 +3,112 @@ Conversion Worker Module
 Background processing of PDF conversion jobs.
 """
 import os
+import shutil
+import socket
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime, timezone
 
-from extractors import extract_tables_pdfplumber, extract_text_lines
+from cache import table_cache_key
+from extractors import ExtractionCancelled, iter_page_results
 from converters import save_tables_to_csv, save_tables_to_excel, save_tables_to_json, save_tables_to_text
+from isolation import JobTimeout, extract_isolated
+from metrics import BYTES_IN, JOB_SECONDS, JOBS, record_extraction, record_writing, take_analysis_time
+from profiling import JobProfiler
+from progress import JobProgress
+from shared.constants import CONVERSION_TIMEOUT, PAGE_TIMEOUT
+from shared.storage import LocalStorageBackend, map_file
+from shared.tracing import Trace, bind_trace, span
+
+# How often a running job re-reads its record to notice a cancellation request
+CANCEL_CHECK_INTERVAL = 1.0  # seconds
+# Page error covering the pages a job ran out of time for
+TIME_LIMIT_ERROR = 'Conversion time limit reached; remaining pages skipped'
+
+
+def _time_limit_reached(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+class JobCancelled(Exception):
+    """Raised inside a running conversion once its job has been cancelled."""
 
 
 class ConversionWorker:
     """Handles background processing of PDF conversion jobs."""
     
-    def __init__(self, upload_folder, converted_folder, jobs_storage):
+    def __init__(self, upload_folder, converted_folder, jobs_storage, file_metadata,
+                 table_cache=None, speculation_max_active=1, storage=None, converted_prefix=None,
+                 work_queue=None, page_timeout=PAGE_TIMEOUT, conversion_timeout=CONVERSION_TIMEOUT,
+                 isolate_extraction=True, tracing=True, trace_dir=None, max_jobs=0, on_retire=None):
         """
         Initialize the conversion worker.
         
         Args:
             upload_folder: Path to uploaded PDF files
-            converted_folder: Path for converted output files
-            jobs_storage: Reference to shared jobs dictionary
+            converted_folder: Path for converted output files (scratch space when
+                outputs are published to a remote storage backend)
+            jobs_storage: JobStore holding the conversion jobs
+            file_metadata: MetadataStore with upload records published by the upload service
+            table_cache: Optional TableCache of extracted tables keyed by content hash
+            speculation_max_active: Speculative extraction is cancelled while more
+                conversion jobs than this are running
+            storage: StorageBackend holding uploads and converted outputs; must
+                provide local_path() (a local or cached backend)
+            converted_prefix: Storage key prefix of converted outputs
+            work_queue: Persistent WorkQueue that jobs are run from (consumed by
+                start_consumers); without one every job gets its own thread
+            page_timeout: Seconds a single page may take to extract
+            conversion_timeout: Seconds a whole job may take
+            isolate_extraction: Extract in child processes, which is what lets a
+                hung page be killed; in-process extraction only honours the
+                job deadline and cancellation between pages
+            tracing: Record spans of every job and store per-stage timings on the job
+            trace_dir: Optional folder to export each job's trace to (Chrome trace JSON)
+            max_jobs: Consumers stop leasing tasks once this process has run this
+                many jobs (0: no limit), so a supervised worker process can be
+                replaced before memory held by extraction libraries builds up
+            on_retire: Called once, without arguments, when max_jobs is reached
         """
         self.upload_folder = upload_folder
         self.converted_folder = converted_folder
         self.jobs = jobs_storage
+        self.file_metadata = file_metadata
+        self.table_cache = table_cache
+        self.speculation_max_active = speculation_max_active
+        self.storage = storage
+        self.converted_prefix = converted_prefix
+        # Local storage is rooted so that converted_folder already is the output
+        # location; other backends get the outputs uploaded after each file
+        self.publish_outputs = storage is not None and not isinstance(storage, LocalStorageBackend)
+        self.page_timeout = page_timeout
+        self.conversion_timeout = conversion_timeout
+        self.isolate_extraction = isolate_extraction
+        self.tracing = tracing
+        self.trace_dir = trace_dir
+        self.max_jobs = max_jobs
+        self.on_retire = on_retire
+        
+        # Speculative pre-extraction runs one file at a time behind real jobs
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+        self._speculation_lock = threading.Lock()
+        self._speculative = {}  # cache key -> Future
+        self._wanted = set()  # cache keys a running job is waiting for
+        self._active_jobs = 0
+        self.speculation_stats = {'queued': 0, 'completed': 0, 'cancelled': 0, 'failed': 0}
+        
+        # Consumers of the persistent work queue
+        self.queue = work_queue
+        self._consumers = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._last_reap = 0.0
+        self._jobs_run = 0
+        self._retired = False
     
-    def process_conversion(self, job_id, file_infos, parser, merge, output_format='csv'):
+    def process_conversion(self, job_id, file_infos, parser, merge, output_format='csv', profile=False):
         """
         Process PDF conversion in background thread.
         Updates job status as it progresses.
@@ -37,72 +119,298 @@ class ConversionWorker:
             parser: Parser to use ('pdfplumber' or 'tabula')
             merge: Whether to merge tables into single file
             output_format: Output format ('csv', 'excel', 'json', 'text')
+            profile: Run the job under the profiler and publish the profile
+                files with it; extraction then runs in this thread and
+                bypasses the table cache, so the profile covers it
         """
-        job = self.jobs[job_id]
-        job['status'] = 'processing'
-        job['progress'] = 0
+        job = self.jobs.get(job_id)
+        if job is not None and job.get('cancelRequested'):
+            # Cancelled while it was still queued
+            self.jobs.update(job_id, {'status': 'cancelled', 'message': 'Conversion cancelled'})
+            return
+        
+        if not self.jobs.transition(job_id, {'status': 'processing', 'progress': 0},
+                                    ('pending', 'processing', 'converting')):
+            # Cancelled (or removed) since it was read
+            return
+        started = time.perf_counter()
+        outcome = 'error'
+        errors = []
+        page_errors = []
+        deadline = time.monotonic() + self.conversion_timeout
+        check_cancelled = self._cancel_check(job_id)
+        progress = JobProgress(self.jobs, job_id, len(file_infos))
+        
+        with self._speculation_lock:
+            self._active_jobs += 1
         
+        # Spans of this job are recorded while its trace is bound to this thread
+        trace = Trace(f"conversion {job_id}") if self.tracing else None
+        previous_trace = bind_trace(trace)
+        job_span = span('job', jobId=job_id, files=len(file_infos), outputFormat=output_format)
+        # Local copies of the job's PDFs, kept until it finishes
+        inputs = ExitStack()
+        
+        all_converted = []
+        profile_files = []
+        profiler = JobProfiler() if profile else None
         try:
-            total_files = len(file_infos)
-            all_converted = []
-            
-            for idx, file_info in enumerate(file_infos):
+            if profiler is not None:
+                profiler.start()
+            for file_info in file_infos:
                 file_id = file_info['fileId']
                 filename = file_info['filename']
+                check_cancelled(force=True)
+                progress.start_file()
+                
+                if time.monotonic() >= deadline:
+                    errors.append(f"Skipped {filename}: conversion time limit reached")
+                    self.jobs.update(job_id, {'errors': errors})
+                    progress.finish_file()
+                    continue
                 
-                # Find the PDF file
-                pdf_path = self._find_pdf_file(file_id)
+                # Resolve a local copy of the PDF from its upload record
+                with span('resolve_input', fileId=file_id):
+                    pdf_path = self._local_pdf_path(file_info, inputs)
                 
                 if not pdf_path:
-                    job['errors'].append(f"File not found: {filename}")
+                    errors.append(f"File not found: {filename}")
+                    self.jobs.update(job_id, {'errors': errors})
+                    progress.finish_file()
                     continue
                 
                 # Update status
-                job['status'] = 'converting'
-                job['currentFile'] = filename
+                self.jobs.update(job_id, {'status': 'converting', 'currentFile': filename})
+                BYTES_IN.inc(os.path.getsize(pdf_path))
                 
-                # Extract tables
-                tables = self._extract_tables(pdf_path, parser)
+                # Extract tables (reusing cached or speculative results when available)
+                tables, file_page_errors = self._extract_tables(
+                    pdf_path, parser, None if profile else table_cache_key(file_info.get('sha256'), parser),
+                    deadline=deadline, check=check_cancelled, on_page=progress.on_page,
+                    isolated=False if profile else None
+                )
+                if file_page_errors:
+                    # Keep the pages that did extract and say which ones did not
+                    for page_error in file_page_errors:
+                        page_errors.append({'fileId': file_id, 'filename': filename, **page_error})
+                        errors.append(f"{filename}, page {page_error['page']}: {page_error['error']}")
+                    self.jobs.update(job_id, {'errors': errors, 'pageErrors': page_errors})
                 
                 # Create output directory for this file
                 base_filename = os.path.splitext(filename)[0]
                 file_output_dir = os.path.join(self.converted_folder, job_id, file_id)
                 os.makedirs(file_output_dir, exist_ok=True)
                 
+                # Text fallback of the JSON and text writers, under the same limits
+                text_errors = []
+                
+                def extract_text(path):
+                    page_texts, fallback_errors = self._extract_page_texts(
+                        path, deadline, check_cancelled, isolated=False if profile else None
+                    )
+                    text_errors.extend(fallback_errors)
+                    return page_texts
+                
                 # Convert to requested format
-                converted_files = self._convert_to_format(
-                    tables, file_output_dir, base_filename, 
-                    merge, output_format, pdf_path
+                progress.start_writing(tables)
+                take_analysis_time()
+                writing_started = time.perf_counter()
+                with span('write', outputFormat=output_format, tables=len(tables)):
+                    converted_files = self._convert_to_format(
+                        tables, file_output_dir, base_filename, 
+                        merge, output_format, pdf_path, on_rows=progress.on_rows, extract_text=extract_text
+                    )
+                record_writing(
+                    time.perf_counter() - writing_started, take_analysis_time(),
+                    progress.file_rows_total, converted_files
                 )
+                failed_pages = {page_error['page'] for page_error in file_page_errors}
+                new_text_errors = [e for e in text_errors if e['page'] not in failed_pages]
+                if new_text_errors:
+                    for page_error in new_text_errors:
+                        page_errors.append({'fileId': file_id, 'filename': filename, **page_error})
+                        errors.append(f"{filename}, page {page_error['page']}: {page_error['error']}")
+                    self.jobs.update(job_id, {'errors': errors, 'pageErrors': page_errors})
                 
                 # Register converted files
-                for file_path in converted_files:
-                    file_info = {
-                        'fileId': f"{file_id}_{os.path.basename(file_path)}",
-                        'originalFileId': file_id,
-                        'filename': os.path.basename(file_path),
-                        'filepath': file_path,
-                        'size': os.path.getsize(file_path)
-                    }
-                    all_converted.append(file_info)
+                with span('publish', files=len(converted_files)):
+                    for file_path in converted_files:
+                        all_converted.append(self._register_output(job_id, file_id, file_path))
+                if self.publish_outputs:
+                    shutil.rmtree(file_output_dir, ignore_errors=True)
                 
                 # Update progress
-                job['progress'] = int(((idx + 1) / total_files) * 100)
+                progress.finish_file()
             
             # Mark as completed
-            job['status'] = 'completed'
-            job['progress'] = 100
-            job['convertedFiles'] = all_converted
-            job['completedAt'] = datetime.now(timezone.utc).isoformat(),
-            job['message'] = f"Successfully converted {len(all_converted)} file(s)"
+            profile_files = self._publish_profile(job_id, profiler)
+            message = f"Successfully converted {len(all_converted)} file(s)"
+            if page_errors:
+                message = f"Converted {len(all_converted)} file(s) with {len(page_errors)} page error(s)"
+            self.jobs.update(job_id, {
+                'status': 'completed',
+                'progress': 100,
+                'etaSeconds': 0,
+                'convertedFiles': all_converted,
+                'profileFiles': profile_files,
+                'completedAt': datetime.now(timezone.utc).isoformat(),
+                'message': message,
+                'timings': self._job_timings(trace, started)
+            })
+            outcome = 'completed'
             
+        except JobCancelled:
+            outcome = 'cancelled'
+            profile_files = self._publish_profile(job_id, profiler)
+            self.jobs.update(job_id, {
+                'status': 'cancelled',
+                'convertedFiles': all_converted,
+                'profileFiles': profile_files,
+                'completedAt': datetime.now(timezone.utc).isoformat(),
+                'message': 'Conversion cancelled',
+                'timings': self._job_timings(trace, started)
+            })
         except Exception as e:
-            job['status'] = 'error'
-            job['progress'] = 100
-            job['error'] = str(e)
-            job['message'] = f"Conversion failed: {str(e)}"
+            profile_files = self._publish_profile(job_id, profiler)
+            self.jobs.update(job_id, {
+                'status': 'error',
+                'progress': 100,
+                'profileFiles': profile_files,
+                'error': str(e),
+                'message': f"Conversion failed: {str(e)}",
+                'timings': self._job_timings(trace, started)
+            })
+        finally:
+            inputs.close()
+            if profiler is not None:
+                # No-op once the profile was published
+                profiler.stop()
+            outputs = all_converted + profile_files
+            if self.storage is not None and outputs:
+                # Index of the job's outputs, used to clean them up without listing storage
+                self.file_metadata.put('jobs', job_id, {
+                    'jobId': job_id,
+                    'convertedFileIds': [f['fileId'] for f in outputs],
+                    'storageKeys': [f['storageKey'] for f in outputs]
+                })
+            if self.publish_outputs:
+                shutil.rmtree(os.path.join(self.converted_folder, job_id), ignore_errors=True)
+            with self._speculation_lock:
+                self._active_jobs -= 1
+            JOBS.labels(outcome).inc()
+            JOB_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+            job_span.end()
+            bind_trace(previous_trace)
+            if trace is not None and self.trace_dir:
+                try:
+                    trace.export(os.path.join(self.trace_dir, f"{job_id}.json"))
+                except OSError:
+                    pass
     
-    def start_conversion(self, file_ids, parser, merge, output_format='csv'):
+    def _publish_profile(self, job_id, profiler):
+        """
+        Stop profiling a job and publish its profile files like converted outputs,
+        so the download service serves them. A failure here never fails the job.
+        
+        Returns:
+            List of converted file dictionaries (empty when not profiled)
+        """
+        if profiler is None:
+            return []
+        try:
+            # Filed under the job id in place of an upload id, as the profile covers every file
+            paths = profiler.save(os.path.join(self.converted_folder, job_id, job_id))
+            return [self._register_output(job_id, job_id, path) for path in paths]
+        except Exception:
+            profiler.stop()
+            return []
+    
+    def _job_timings(self, trace, started):
+        """
+        Per-stage timings of a job for its record: count and total milliseconds
+        of every span name, plus the whole job so far (None without tracing).
+        """
+        if trace is None:
+            return None
+        timings = trace.timings()
+        timings['job'] = {'count': 1, 'ms': round((time.perf_counter() - started) * 1000, 1)}
+        return timings
+    
+    def _cancel_check(self, job_id):
+        """
+        Build a callback that raises JobCancelled once cancellation of job_id
+        was requested. The job is re-read at most every CANCEL_CHECK_INTERVAL
+        seconds unless the callback is called with force=True.
+        """
+        last_check = [time.monotonic()]
+        
+        def check(force=False):
+            now = time.monotonic()
+            if not force and now - last_check[0] < CANCEL_CHECK_INTERVAL:
+                return
+            last_check[0] = now
+            job = self.jobs.get(job_id)
+            if job is None or job.get('cancelRequested'):
+                raise JobCancelled()
+        
+        return check
+    
+    def _register_output(self, job_id, file_id, file_path):
+        """
+        Describe a converted file and publish it to storage and the metadata store,
+        so the download service can find it by fileId with a single lookup.
+        
+        Args:
+            job_id: Job that produced the file
+            file_id: Upload fileId the file was converted from
+            file_path: Local path of the converted file
+            
+        Returns:
+            Converted file dictionary for the job status
+        """
+        filename = os.path.basename(file_path)
+        converted = {
+            'fileId': f"{file_id}_{filename}",
+            'originalFileId': file_id,
+            'filename': filename,
+            'filepath': file_path,
+            'size': os.path.getsize(file_path)
+        }
+        if self.storage is None:
+            return converted
+        
+        storage_key = f"{self.converted_prefix}/{job_id}/{file_id}/{filename}"
+        if self.publish_outputs:
+            converted['filepath'] = self.storage.put_file(storage_key, file_path)
+        converted['storageKey'] = storage_key
+        self.file_metadata.put('converted', converted['fileId'], {
+            **converted,
+            'jobId': job_id,
+            'createdAt': datetime.now(timezone.utc).isoformat()
+        })
+        return converted
+    
+    def _local_pdf_path(self, file_info, inputs):
+        """
+        Local path of an uploaded PDF, or None if it no longer exists.
+        With a remote backend the PDF is fetched into the read-through cache.
+        
+        Args:
+            file_info: Upload record of the PDF
+            inputs: ExitStack that keeps the local copy in place until it is closed
+        """
+        storage_key = file_info.get('storageKey')
+        if storage_key and self.storage is not None:
+            try:
+                return inputs.enter_context(self.storage.local_copy(storage_key))
+            except FileNotFoundError:
+                return None
+        # Records written before uploads had storage keys
+        pdf_path = file_info.get('filepath')
+        return pdf_path if pdf_path and os.path.exists(pdf_path) else None
+    
+    def start_conversion(self, file_ids, parser, merge, output_format='csv',
+                         priority='interactive', client_id=None, profile=False):
         """
         Start conversion in background thread.
         
@@ -111,25 +419,35 @@ class ConversionWorker:
             parser: Parser to use
             merge: Whether to merge tables
             output_format: Output format
+            priority: Work queue priority class ('interactive' or 'bulk')
+            client_id: Client the job is scheduled fairly against
+            profile: Profile the job (see process_conversion)
             
         Returns:
             job_id: String identifier for the job
+            
+        Raises:
+            QueueFull: The work queue refused the job (no job is created)
         """
         import uuid
         
         # Generate job ID
         job_id = uuid.uuid4().hex
         
-        # Build file info list
+        # Build file info list from the upload records
         file_infos = []
         for file_id in file_ids:
+            record = self.file_metadata.get('files', file_id) or {}
             file_infos.append({
                 'fileId': file_id,
-                'filename': f"{file_id}.pdf"  # Will be updated when file is found
+                'filename': record.get('filename') or f"{file_id}.pdf",
+                'filepath': record.get('filepath'),
+                'storageKey': record.get('storageKey'),
+                'sha256': record.get('sha256')
             })
         
         # Create job entry
-        self.jobs[job_id] = {
+        self.jobs.create({
             'jobId': job_id,
             'status': 'pending',
             'progress': 0,
@@ -137,63 +455,401 @@ class ConversionWorker:
             'parser': parser,
             'merge': merge,
             'outputFormat': output_format,
+            'priority': priority,
+            'clientId': client_id,
+            'profile': profile,
             'createdAt': datetime.now(timezone.utc).isoformat(),
             'currentFile': None,
             'convertedFiles': [],
             'errors': [],
             'error': None,
             'message': 'Conversion queued'
-        }
+        })
+        
+        if self.queue is not None:
+            # Persist the task; a consumer (in any service process) picks it up
+            try:
+                self.queue.enqueue(job_id, {
+                    'fileInfos': file_infos,
+                    'parser': parser,
+                    'merge': merge,
+                    'outputFormat': output_format,
+                    'profile': profile
+                }, priority=priority, client_id=client_id)
+            except Exception:
+                self.jobs.delete(job_id)
+                raise
+            self._wakeup.set()
+            return job_id
         
         # Start background thread
         thread = threading.Thread(
             target=self.process_conversion,
-            args=(job_id, file_infos, parser, merge, output_format),
+            args=(job_id, file_infos, parser, merge, output_format, profile),
             daemon=True
         )
         thread.start()
         
         return job_id
     
-    def _find_pdf_file(self, file_id):
-        """Find PDF file by ID in upload folder."""
-        for filename in os.listdir(self.upload_folder):
-            if filename.startswith(file_id):
-                pdf_path = os.path.join(self.upload_folder, filename)
-                if os.path.exists(pdf_path):
-                    return pdf_path
-        return None
+    def start_consumers(self, count, poll_interval=1.0):
+        """
+        Start threads that lease conversion tasks from the work queue and run them.
+        
+        Args:
+            count: Number of conversions to run concurrently in this process
+            poll_interval: Seconds between queue polls while it is empty
+        """
+        for index in range(count):
+            thread = threading.Thread(
+                target=self._consume, args=(poll_interval,), name=f'conversion-{index}', daemon=True
+            )
+            thread.start()
+            self._consumers.append(thread)
+    
+    def activity(self):
+        """Number of consumer threads and of jobs running in this process."""
+        with self._speculation_lock:
+            return {'consumers': len(self._consumers), 'activeJobs': self._active_jobs}
     
-    def _extract_tables(self, pdf_path, parser):
+    def stop_consumers(self, timeout=None):
+        """Stop leasing new tasks and wait for running ones to finish."""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._consumers:
+            thread.join(timeout)
+        self._consumers = []
+    
+    def _consume(self, poll_interval):
+        """Consumer loop: reap expired leases, lease a task, run it."""
+        owner = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        while not self._stop.is_set():
+            try:
+                self._reap_expired()
+                task = self.queue.lease(owner)
+            except Exception:
+                # e.g. the database is locked for longer than the busy timeout
+                task = None
+            if task is None:
+                self._wakeup.wait(poll_interval)
+                self._wakeup.clear()
+                continue
+            self._run_task(task, owner)
+            if self.max_jobs and self._count_job():
+                self._retire()
+    
+    def _count_job(self):
+        """Count a job run by a consumer; True when it reached max_jobs."""
+        with self._speculation_lock:
+            self._jobs_run += 1
+            if self._retired or self._jobs_run < self.max_jobs:
+                return False
+            self._retired = True
+            return True
+    
+    def _retire(self):
+        """Stop leasing tasks in this process and let its owner replace it."""
+        self._stop.set()
+        self._wakeup.set()
+        if self.on_retire is not None:
+            self.on_retire()
+    
+    def _run_task(self, task, owner):
+        """Run a leased task, keeping its lease alive with heartbeats."""
+        done = threading.Event()
+        
+        def heartbeat():
+            while not done.wait(self.queue.lease_seconds / 3):
+                self.queue.heartbeat(task['taskId'], owner)
+        
+        threading.Thread(target=heartbeat, name=f"heartbeat-{task['taskId']}", daemon=True).start()
+        payload = task['payload']
+        try:
+            self.process_conversion(
+                task['jobId'], payload['fileInfos'], payload['parser'],
+                payload['merge'], payload['outputFormat'], payload.get('profile', False)
+            )
+        except Exception as e:
+            # Conversion errors are recorded on the job; this is an infrastructure failure
+            self._on_task_returned(task, self.queue.fail(task['taskId'], owner, str(e)))
+        else:
+            self.queue.complete(task['taskId'], owner)
+        finally:
+            done.set()
+    
+    def _reap_expired(self):
+        """Return tasks of crashed or hung workers to the queue (at most every half lease)."""
+        now = time.monotonic()
+        if now - self._last_reap < self.queue.lease_seconds / 2:
+            return
+        self._last_reap = now
+        for task, state in self.queue.reap_expired():
+            self._on_task_returned(task, state)
+    
+    def _on_task_returned(self, task, state):
+        """Reflect a retried or dead-lettered task in its job."""
+        if state == 'dead':
+            self.jobs.update(task['jobId'], {
+                'status': 'error',
+                'progress': 100,
+                'error': 'Conversion abandoned',
+                'message': f"Conversion failed after {task['attempts']} attempt(s)"
+            })
+        elif state == 'queued':
+            self.jobs.update(task['jobId'], {
+                'status': 'pending',
+                'message': f"Conversion requeued after a worker failure (attempt {task['attempts']})"
+            })
+    
+    def prefetch(self, file_ids, parser='pdfplumber'):
         """
-        Extract tables from PDF using specified parser.
+        Queue low-priority speculative extraction of freshly uploaded files.
+        Results land in the table cache, so a later conversion only runs the writer.
+        
+        Args:
+            file_ids: List of uploaded file IDs
+            parser: Parser the conversion is expected to use
+            
+        Returns:
+            Number of files queued
+        """
+        if self.table_cache is None:
+            return 0
+        
+        queued = 0
+        for file_id in file_ids:
+            record = self.file_metadata.get('files', file_id)
+            if not record or not (record.get('storageKey') or record.get('filepath')):
+                continue
+            key = table_cache_key(record.get('sha256'), parser)
+            if not key or self.table_cache.contains(key):
+                continue
+            with self._speculation_lock:
+                if key in self._speculative:
+                    continue
+                self._speculative[key] = self._prefetch_executor.submit(
+                    self._speculative_extract, key, record, parser
+                )
+                self.speculation_stats['queued'] += 1
+            queued += 1
+        return queued
+    
+    def _under_load(self, key):
+        """Whether speculative work for key should yield to real jobs."""
+        with self._speculation_lock:
+            return key not in self._wanted and self._active_jobs > self.speculation_max_active
+    
+    def _speculative_extract(self, key, record, parser):
+        """Extract tables into the cache, giving up as soon as the service gets busy."""
+        def yield_under_load(page_num, total_pages):
+            if self._under_load(key):
+                raise ExtractionCancelled()
+        
+        outcome = 'failed'
+        try:
+            yield_under_load(0, 0)
+            with ExitStack() as inputs:
+                pdf_path = self._local_pdf_path(record, inputs)
+                if not pdf_path:
+                    return None
+                tables, page_errors = self._run_extraction(pdf_path, parser, on_page=yield_under_load)
+            if page_errors:
+                # Leave incomplete documents to the job, which reports the failed pages
+                return None
+            self.table_cache.put(key, tables)
+            outcome = 'completed'
+            return tables
+        except ExtractionCancelled:
+            outcome = 'cancelled'
+            return None
+        except Exception:
+            return None
+        finally:
+            with self._speculation_lock:
+                self._speculative.pop(key, None)
+                self.speculation_stats[outcome] += 1
+    
+    def _extract_tables(self, pdf_path, parser, cache_key=None, deadline=None, check=None, on_page=None,
+                        isolated=None):
+        """
+        Extract tables from PDF, using the table cache when possible.
         
         Args:
             pdf_path: Path to PDF file
             parser: Parser to use ('pdfplumber' or 'tabula')
+            cache_key: Optional table cache key for the PDF content
+            deadline: time.monotonic() value by which extraction must finish
+            check: Optional callable run periodically; raise from it to abort
+            on_page: Optional on_page(page_number, total_pages) progress callback
+            isolated: Extract in child processes; defaults to isolate_extraction
             
         Returns:
-            List of extracted tables
+            Tuple of (extracted tables, page errors)
         """
-        if parser == 'pdfplumber':
-            tables = extract_tables_pdfplumber(pdf_path)
-            
-            # Fallback to text if no tables found
-            if not tables:
-                tables = extract_text_lines(pdf_path)
-        else:
-            # Future: Add tabula support
-            # For now, fall back to pdfplumber
-            tables = extract_tables_pdfplumber(pdf_path)
+        if self.table_cache is None or not cache_key:
+            return self._run_extraction(pdf_path, parser, on_page, deadline, check, isolated)
+        
+        # Wait for an in-flight speculative extraction of the same content,
+        # but take over ones that have not started yet
+        with self._speculation_lock:
+            future = self._speculative.get(cache_key)
+            if future and future.cancel():
+                self._speculative.pop(cache_key, None)
+                self.speculation_stats['cancelled'] += 1
+                future = None
+            elif future:
+                self._wanted.add(cache_key)
+        if future:
+            try:
+                with span('cache.wait_speculative'):
+                    tables = future.result()
+            finally:
+                with self._speculation_lock:
+                    self._wanted.discard(cache_key)
+            if tables is not None:
+                return tables, []
+        
+        with span('cache.lookup'):
+            tables = self.table_cache.get(cache_key)
+        if tables is not None:
+            return tables, []
+        tables, page_errors = self._run_extraction(pdf_path, parser, on_page, deadline, check, isolated)
+        if not page_errors:
+            # Partial results are never cached
+            with span('cache.store'):
+                self.table_cache.put(cache_key, tables)
+        return tables, page_errors
+    
+    def _run_extraction(self, pdf_path, parser, on_page=None, deadline=None, check=None, isolated=None):
+        """
+        Extract tables from PDF using specified parser.
+        
+        Args:
+            pdf_path: Path to PDF file
+            parser: Parser to use ('pdfplumber' or 'tabula')
+            on_page: Optional per-page callback passed to the extractors
+            deadline: time.monotonic() value by which extraction must finish
+            check: Optional callable run periodically; raise from it to abort
+            isolated: Extract in child processes; defaults to isolate_extraction
             
-            # Fallback to text if no tables found
-            if not tables:
-                tables = extract_text_lines(pdf_path)
+        Returns:
+            Tuple of (extracted tables, page errors); page errors list the
+            pages ({'page', 'error'}) missing from the tables
+        """
+        pages_seen = [0]
+        
+        def on_page_counted(page_num, total_pages):
+            pages_seen[0] = max(pages_seen[0], page_num)
+            if on_page:
+                on_page(page_num, total_pages)
         
-        return tables
+        if isolated is None:
+            isolated = self.isolate_extraction
+        started = time.perf_counter()
+        with span('extract', isolated=isolated):
+            result = self._extract(pdf_path, parser, on_page_counted, deadline, check, isolated)
+        record_extraction(time.perf_counter() - started, pages_seen[0])
+        return result
+    
+    def _extract(self, pdf_path, parser, on_page, deadline, check, isolated):
+        """Run the extraction passes for _run_extraction."""
+        # Future: Add tabula support; for now every parser uses pdfplumber.
+        if isolated:
+            return self._extract_passes(
+                lambda mode: self._extract_isolated(pdf_path, mode, on_page, deadline, check)
+            )
+        
+        # The PDF is memory-mapped so both passes share the OS page cache
+        # instead of copying the file through read buffers.
+        with map_file(pdf_path) as pdf_data:
+            return self._extract_passes(
+                lambda mode: self._extract_in_process(pdf_data, mode, on_page, deadline, check)
+            )
+    
+    def _extract_passes(self, run_pass):
+        """
+        Extract tables, falling back to text lines when there are none.
+        
+        Args:
+            run_pass: run_pass(mode) running one pass, returning
+                (page number -> rows, page errors)
+        """
+        with span('extract.tables'):
+            pages, page_errors = run_pass('tables')
+        tables = [table for page_num in sorted(pages) for table in pages[page_num]]
+        
+        # Fallback to text if no tables found, unless the time limit already cut the tables short
+        if not tables and not any(e['error'] == TIME_LIMIT_ERROR for e in page_errors):
+            with span('extract.text'):
+                pages, text_errors = run_pass('text')
+            lines = [line for page_num in sorted(pages) for line in pages[page_num]]
+            tables = [lines] if lines else []
+            page_errors = sorted(
+                {e['page']: e for e in page_errors + text_errors}.values(), key=lambda e: e['page']
+            )
+        return tables, page_errors
+    
+    def _extract_in_process(self, pdf_data, mode, on_page, deadline, check):
+        """
+        Run one extraction pass in this process. Like _extract_isolated, it
+        stops at the deadline with the pages extracted so far and a page error
+        that covers the rest of the document.
+        
+        Returns:
+            Tuple of (page number -> rows, page errors)
+        """
+        if _time_limit_reached(deadline):
+            return {}, [{'page': 1, 'error': TIME_LIMIT_ERROR}]
+        results = {}
+        pages = iter_page_results(pdf_data, mode)
+        try:
+            for page_num, total_pages, rows in pages:
+                results[page_num] = rows
+                if on_page:
+                    on_page(page_num, total_pages)
+                if page_num < total_pages and _time_limit_reached(deadline):
+                    return results, [{'page': page_num + 1, 'error': TIME_LIMIT_ERROR}]
+                if check:
+                    check()
+        finally:
+            pages.close()
+        return results, []
+    
+    def _extract_isolated(self, pdf_path, mode, on_page, deadline, check):
+        """
+        Run one extraction pass in a child process, turning a job timeout into
+        a page error that covers the rest of the document.
+        
+        Returns:
+            Tuple of (page number -> rows, page errors)
+        """
+        if _time_limit_reached(deadline):
+            # No child is started once the time is up
+            return {}, [{'page': 1, 'error': TIME_LIMIT_ERROR}]
+        try:
+            return extract_isolated(pdf_path, mode, self.page_timeout, deadline, on_page, check)
+        except JobTimeout as e:
+            return e.results, e.page_errors + [{'page': e.page, 'error': TIME_LIMIT_ERROR}]
+    
+    def _extract_page_texts(self, pdf_path, deadline=None, check=None, isolated=None):
+        """
+        Extract the text of every page for the text fallback of the JSON and
+        text writers, with the same page timeout, deadline and cancellation
+        checks as the table extraction.
+        
+        Returns:
+            Tuple of (page number -> text, page errors)
+        """
+        if isolated is None:
+            isolated = self.isolate_extraction
+        with span('extract.page_text', isolated=isolated):
+            if isolated:
+                return self._extract_isolated(pdf_path, 'page_text', None, deadline, check)
+            with map_file(pdf_path) as pdf_data:
+                return self._extract_in_process(pdf_data, 'page_text', None, deadline, check)
     
     def _convert_to_format(self, tables, output_dir, base_filename, 
-                          merge, output_format, pdf_path=None):
+                          merge, output_format, pdf_path=None, on_rows=None, extract_text=None):
         """
         Convert tables to requested output format.
         
@@ -204,6 +860,9 @@ class ConversionWorker:
             merge: Whether to merge tables
             output_format: Output format ('csv', 'excel', 'json', 'text')
             pdf_path: Path to original PDF (for JSON/text extraction fallback)
+            on_rows: Optional on_rows(count) callback for rows written
+            extract_text: Optional extract_text(pdf_path) for the JSON/text fallback,
+                returning page number -> text
             
         Returns:
             List of converted file paths
@@ -211,21 +870,21 @@ class ConversionWorker:
         # For JSON and text formats, always call save function as they handle text extraction fallback
         if output_format == 'json':
             return save_tables_to_json(
-                tables, output_dir, base_filename, merge, pdf_path
+                tables, output_dir, base_filename, merge, pdf_path, on_rows, extract_text
             )
         elif output_format == 'text':
             return save_tables_to_text(
-                tables, output_dir, base_filename, merge, pdf_path
+                tables, output_dir, base_filename, merge, pdf_path, on_rows, extract_text
             )
         elif tables:
             # CSV and Excel only process when tables exist
             if output_format == 'excel':
                 return save_tables_to_excel(
-                    tables, output_dir, base_filename, merge
+                    tables, output_dir, base_filename, merge, on_rows
                 )
             else:  # CSV
                 return save_tables_to_csv(
-                    tables, output_dir, base_filename, merge
+                    tables, output_dir, base_filename, merge, on_rows
                 )
         else:
             # No tables and not JSON/text format - return empty list
@@ -4,57 +4,108 @@ Handles file downloads and ZIP creation for batch downloads.
 Port: 5003
 """
 import os
+import shutil
+import sys
+import uuid
 import zipfile
 from datetime import datetime
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 import tempfile
 
+# Make the repository-level shared package importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from shared.constants import CONVERTED_PREFIX, METADATA_PREFIX
+from shared.metadata import MetadataStore
+from shared.metrics import REGISTRY, instrument_app
+from shared.storage import STREAM_BUFFER_SIZE, LocalStorageBackend, get_storage_backend
+
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
+instrument_app(app)
 
 # Configuration
-CONVERTED_FOLDER = os.path.join(tempfile.gettempdir(), 'pdf-to-csv-converted')
+STORAGE_ROOT = tempfile.gettempdir()
+CONVERTED_FOLDER = os.path.join(STORAGE_ROOT, CONVERTED_PREFIX)
+
+# Converted outputs are read from the configured StorageBackend; the local
+# backend is rooted at the temp dir, so keys map onto CONVERTED_FOLDER
+storage = get_storage_backend(base_path=STORAGE_ROOT)
+LOCAL_STORAGE = isinstance(storage, LocalStorageBackend)
 
-# Ensure directory exists
-os.makedirs(CONVERTED_FOLDER, exist_ok=True)
+# Converted file records published by the conversion service (fileId -> storage key)
+file_metadata = MetadataStore(storage, prefix=METADATA_PREFIX)
+
+FILES_SERVED = REGISTRY.counter('download_files_total', 'Converted files served', ('kind',))
+ZIP_SECONDS = REGISTRY.histogram('download_zip_seconds', 'Time to build a batch download archive')
 
 
 def find_file(file_id):
     """
-    Find a file by searching through the converted folder structure.
-    Returns the full path if found, None otherwise.
+    Look up a converted file by its fileId.
+    Returns the converted file record (storageKey, filename, size, createdAt)
+    if found, None otherwise.
     """
-    for root, dirs, files in os.walk(CONVERTED_FOLDER):
-        for filename in files:
-            if file_id in filename or filename.startswith(file_id):
-                return os.path.join(root, filename)
-    return None
+    return file_metadata.get('converted', file_id)
 
 
-def create_zip_archive(file_paths, zip_filename, file_names=None):
+def open_file(record):
+    """
+    Open a converted file for sending.
+    Returns a local path with local storage, otherwise an open file object
+    (a read-through cache opens its local copy, which eviction cannot
+    remove from under it).
+    Raises FileNotFoundError if the stored object is gone.
     """
-    Create a ZIP archive from a list of file paths.
+    if isinstance(storage, LocalStorageBackend):
+        return storage.local_path(record['storageKey'])
+    return storage.open_read(record['storageKey'])
+
+
+def create_zip_archive(records, zip_filename, file_names=None):
+    """
+    Create a ZIP archive from converted file records.
+    Each file is streamed from storage into the archive.
     
     Args:
-        file_paths: List of file paths to include in the ZIP
+        records: List of converted file records to include in the ZIP
         zip_filename: Name of the ZIP file to create
-        file_names: Optional dict mapping file paths to desired names in ZIP
+        file_names: Optional dict mapping fileIds to desired names in ZIP
     
     Returns the path to the created ZIP file.
     """
-    zip_path = os.path.join(tempfile.gettempdir(), zip_filename)
+    # Unique path so concurrent requests for the same zip name do not collide
+    zip_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4().hex}_{os.path.basename(zip_filename)}")
     
     with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file_path in file_paths:
-            if os.path.exists(file_path):
-                # Use custom name if provided, otherwise use basename
-                archive_name = file_names.get(file_path) if file_names else os.path.basename(file_path)
-                zipf.write(file_path, archive_name)
+        for record in records:
+            # Use custom name if provided, otherwise use the stored filename
+            archive_name = (file_names or {}).get(record['fileId']) or record['filename']
+            try:
+                src = storage.open_read(record['storageKey'])
+            except FileNotFoundError:
+                continue
+            with src, zipf.open(archive_name, 'w') as dst:
+                shutil.copyfileobj(src, dst, STREAM_BUFFER_SIZE)
     
     return zip_path
 
 
+def get_mimetype(filename):
+    """Determine the correct MIME type based on file extension."""
+    file_ext = os.path.splitext(filename)[1].lower()
+    if file_ext == '.xlsx':
+        return 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    elif file_ext == '.csv':
+        return 'text/csv'
+    elif file_ext == '.json':
+        return 'application/json'
+    elif file_ext == '.txt':
+        return 'text/plain'
+    return 'application/octet-stream'
+
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint."""
@@ -74,9 +125,14 @@ def download_file(file_id):
     - file_id: The unique identifier for the converted file
     """
     # Find the file
-    file_path = find_file(file_id)
+    record = find_file(file_id)
+    
+    try:
+        source = open_file(record) if record else None
+    except FileNotFoundError:
+        source = None
     
-    if not file_path or not os.path.exists(file_path):
+    if source is None:
         return jsonify({
             'success': False,
             'error': {
@@ -86,25 +142,13 @@ def download_file(file_id):
         }), 404
     
     try:
-        # Determine the correct MIME type based on file extension
-        file_ext = os.path.splitext(file_path)[1].lower()
-        if file_ext == '.xlsx':
-            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        elif file_ext == '.csv':
-            mimetype = 'text/csv'
-        elif file_ext == '.json':
-            mimetype = 'application/json'
-        elif file_ext == '.txt':
-            mimetype = 'text/plain'
-        else:
-            mimetype = 'application/octet-stream'
-        
+        FILES_SERVED.labels('single').inc()
         # Send file as attachment
         return send_file(
-            file_path,
+            source,
             as_attachment=True,
-            download_name=os.path.basename(file_path),
-            mimetype=mimetype
+            download_name=record['filename'],
+            mimetype=get_mimetype(record['filename'])
         )
     except Exception as e:
         return jsonify({
@@ -152,22 +196,14 @@ def download_batch():
             }
         }), 400
     
-    # Find all requested files
-    file_paths = []
-    file_path_to_name = {}
-    missing_files = []
-    
-    for file_id in file_ids:
-        file_path = find_file(file_id)
-        if file_path and os.path.exists(file_path):
-            file_paths.append(file_path)
-            # Map file path to original name if provided
-            if file_id in file_names_map:
-                file_path_to_name[file_path] = file_names_map[file_id]
-        else:
-            missing_files.append(file_id)
+    # Find all requested files (one concurrent existence check for the batch)
+    records = [record for record in map(find_file, file_ids) if record]
+    present = storage.exists_many([record['storageKey'] for record in records])
+    records = [record for record in records if present.get(record['storageKey'])]
+    found_ids = {record['fileId'] for record in records}
+    missing_files = [file_id for file_id in file_ids if file_id not in found_ids]
     
-    if not file_paths:
+    if not records:
         return jsonify({
             'success': False,
             'error': {
@@ -179,7 +215,9 @@ def download_batch():
     
     try:
         # Create ZIP archive with custom names
-        zip_path = create_zip_archive(file_paths, zip_name, file_path_to_name if file_path_to_name else None)
+        with ZIP_SECONDS.time():
+            zip_path = create_zip_archive(records, zip_name, file_names_map)
+        FILES_SERVED.labels('archived').inc(len(records))
         
         # Send ZIP file
         response = send_file(
@@ -214,9 +252,9 @@ def download_batch():
 @app.route('/api/files/<file_id>/info', methods=['GET'])
 def get_file_info(file_id):
     """Get information about a converted file."""
-    file_path = find_file(file_id)
+    record = find_file(file_id)
     
-    if not file_path or not os.path.exists(file_path):
+    if not record or not storage.exists(record['storageKey']):
         return jsonify({
             'success': False,
             'error': {
@@ -226,16 +264,15 @@ def get_file_info(file_id):
         }), 404
     
     try:
-        stat = os.stat(file_path)
-        
         return jsonify({
             'success': True,
             'data': {
                 'fileId': file_id,
-                'filename': os.path.basename(file_path),
-                'size': stat.st_size,
-                'createdAt': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                'modifiedAt': datetime.fromtimestamp(stat.st_mtime).isoformat()
+                'filename': record['filename'],
+                'size': record['size'],
+                # Converted files are written once, so both timestamps match
+                'createdAt': record['createdAt'],
+                'modifiedAt': record['createdAt']
             },
             'timestamp': datetime.utcnow().isoformat()
         })
@@ -252,9 +289,10 @@ def get_file_info(file_id):
 @app.route('/api/cleanup/<job_id>', methods=['DELETE'])
 def cleanup_job(job_id):
     """Clean up all files associated with a conversion job."""
+    job_outputs = file_metadata.get('jobs', job_id)
     job_folder = os.path.join(CONVERTED_FOLDER, job_id)
     
-    if not os.path.exists(job_folder):
+    if job_outputs is None and not (LOCAL_STORAGE and os.path.isdir(job_folder)):
         return jsonify({
             'success': False,
             'error': {
@@ -264,9 +302,16 @@ def cleanup_job(job_id):
         }), 404
     
     try:
-        # Remove entire job folder
-        import shutil
-        shutil.rmtree(job_folder)
+        if job_outputs is not None:
+            # Bulk delete of the job's outputs and their download records
+            storage.delete_many(job_outputs['storageKeys'])
+            for converted_file_id in job_outputs['convertedFileIds']:
+                file_metadata.delete('converted', converted_file_id)
+            file_metadata.delete('jobs', job_id)
+        
+        # Remove what is left of the local job folder
+        if LOCAL_STORAGE and os.path.isdir(job_folder):
+            shutil.rmtree(job_folder)
         
         return jsonify({
             'success': True,
@@ -286,4 +331,5 @@ def cleanup_job(job_id):
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5003, debug=True)
+    # Development server; production runs under scripts/serve.py
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5003)), debug=os.getenv('FLASK_DEBUG') == '1')
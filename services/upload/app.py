@@ -3,40 +3,326 @@ Upload Service
 Handles file uploads, validation, and temporary storage.
 Port: 5001
 """
+import json
 import os
+import sys
+import threading
+import urllib.request
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 import tempfile
 
+# Make the repository-level shared package importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from shared.constants import (
+    INTERNAL_TOKEN_HEADER, MAX_FILES_PER_REQUEST, METADATA_PREFIX, RATE_LIMIT_STORE_FILE, RATE_LIMIT_UPLOADS, RETENTION_SWEEP_INTERVAL,
+    UPLOAD_PREFIX, UPLOAD_QUOTA, UPLOAD_TTL
+)
+from shared.metadata import MetadataStore
+from shared.metrics import REGISTRY, instrument_app
+from shared.ratelimit import create_rate_limiter, retry_after
+from shared.retention import RetentionManager
+from shared.storage import LocalStorageBackend, get_storage_backend
+from chunked import ChunkedUploadError, ChunkedUploadSessions
+from streaming import ContentStore, HashingFileWriter, StreamingRequest
+
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
+instrument_app(app)
 
 # Configuration
-UPLOAD_FOLDER = os.path.join(tempfile.gettempdir(), 'pdf-to-csv-uploads')
+STORAGE_ROOT = tempfile.gettempdir()
+UPLOAD_FOLDER = os.path.join(STORAGE_ROOT, UPLOAD_PREFIX)
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 ALLOWED_EXTENSIONS = {'pdf'}
 
+INCOMING_FOLDER = os.path.join(UPLOAD_FOLDER, 'incoming')
+SESSIONS_FOLDER = os.path.join(UPLOAD_FOLDER, 'sessions')
+UPLOAD_TTL_SECONDS = int(os.getenv('UPLOAD_TTL_SECONDS', UPLOAD_TTL))
+MULTIPART_OVERHEAD = 64 * 1024  # Allowance for multipart boundaries and headers
+CONVERSION_SERVICE_URL = os.getenv('CONVERSION_SERVICE_URL', 'http://localhost:5002')
+SPECULATIVE_EXTRACTION = os.getenv('SPECULATIVE_EXTRACTION', 'false').lower() == 'true'
+# Lets the conversion service trust the client id forwarded with a conversion
+INTERNAL_SERVICE_TOKEN = os.getenv('INTERNAL_SERVICE_TOKEN', '')
+RATE_LIMIT_UPLOADS_PER_HOUR = int(os.getenv('RATE_LIMIT_UPLOADS', RATE_LIMIT_UPLOADS))
+# Requests streaming a body to disk at the same time, per process; more are turned away
+UPLOAD_MAX_IN_FLIGHT = int(os.getenv('UPLOAD_MAX_IN_FLIGHT', 32))
+BUSY_RETRY_AFTER = 5  # seconds
+BODY_ENDPOINTS = {'upload', 'upload_batch', 'upload_chunk'}
+
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Stream file parts to disk while hashing, instead of spooling them first
+app.request_class = StreamingRequest
+app.config['UPLOAD_INCOMING_FOLDER'] = INCOMING_FOLDER
+app.config['UPLOAD_MAX_FILE_SIZE'] = MAX_FILE_SIZE
+
+# Uploaded PDFs and metadata live in the configured StorageBackend (STORAGE_BACKEND).
+# The local backend is rooted at the temp dir, so keys map onto UPLOAD_FOLDER.
+storage = get_storage_backend(base_path=STORAGE_ROOT)
+LOCAL_STORAGE = isinstance(storage, LocalStorageBackend)
+
+# Content-addressed storage: identical PDFs are stored once and hard-linked per fileId
+# (local storage only; object stores keep one object per fileId)
+content_store = ContentStore(UPLOAD_FOLDER)
+
+# Resumable chunked upload sessions
+upload_sessions = ChunkedUploadSessions(SESSIONS_FOLDER, MAX_FILE_SIZE)
+
+# Commits the files of a batch upload concurrently
+batch_executor = ThreadPoolExecutor(max_workers=MAX_FILES_PER_REQUEST, thread_name_prefix='batch-upload')
+
+# Sends speculative pre-extraction hints without delaying upload responses
+prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch-hint')
+
 # In-memory storage for uploaded file metadata
 uploaded_files = {}
 
+# Persistent fileId -> upload metadata, read directly by the conversion service
+file_metadata = MetadataStore(storage, prefix=METADATA_PREFIX)
+
+# Per-client upload budget (token bucket), shared by every service process on the host
+rate_limiter = create_rate_limiter(
+    os.getenv('RATE_LIMIT_STORE', 'sqlite'),
+    os.getenv('RATE_LIMIT_STORE_PATH', os.path.join(tempfile.gettempdir(), RATE_LIMIT_STORE_FILE))
+)
+
+# Bounds the upload bodies being received at once
+upload_slots = threading.BoundedSemaphore(UPLOAD_MAX_IN_FLIGHT)
+
+UPLOADED_FILES = REGISTRY.counter('upload_files_total', 'Files uploaded', ('deduplicated',))
+UPLOADED_BYTES = REGISTRY.counter('upload_bytes_total', 'Bytes of uploaded files')
+
+
+def _get_upload(file_id):
+    """Look up upload metadata, falling back to the persistent store."""
+    file_info = uploaded_files.get(file_id)
+    if file_info is None:
+        file_info = file_metadata.get('files', file_id)
+        if file_info is not None:
+            uploaded_files[file_id] = file_info
+    return file_info
+
+
+def _on_upload_evicted(path):
+    """Drop metadata for an upload removed by the retention manager."""
+    if os.path.dirname(path) != UPLOAD_FOLDER:
+        # Content blobs and chunked upload sessions are not fileIds; a blob is
+        # evicted together with its <fileId>_<filename> links
+        return
+    file_id = os.path.basename(path).split('_', 1)[0]
+    uploaded_files.pop(file_id, None)
+    file_metadata.delete('files', file_id)
+
+
+def _prune_missing_uploads():
+    """Drop metadata for uploads whose file no longer exists on disk."""
+    if not LOCAL_STORAGE:
+        return
+    for file_id, file_info in list(uploaded_files.items()):
+        if not os.path.exists(file_info['filepath']):
+            uploaded_files.pop(file_id, None)
+            file_metadata.delete('files', file_id)
+
+
+def _is_upload_in_progress(path):
+    """Protect files still being written and chunked upload sessions in use."""
+    return path in HashingFileWriter.active_paths or upload_sessions.is_active(path, UPLOAD_TTL_SECONDS)
+
+
+# Background TTL sweeper and disk quota manager for uploaded files
+retention = RetentionManager(
+    {UPLOAD_FOLDER: UPLOAD_TTL_SECONDS},
+    quota_bytes=int(os.getenv('UPLOAD_QUOTA_BYTES', UPLOAD_QUOTA)),
+    interval=int(os.getenv('RETENTION_SWEEP_INTERVAL', RETENTION_SWEEP_INTERVAL)),
+    on_evict=_on_upload_evicted,
+    on_sweep=_prune_missing_uploads,
+    protect=_is_upload_in_progress
+)
+retention.start()
+
 
 def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def get_file_size(file_storage):
-    """Get file size from FileStorage object."""
-    file_storage.seek(0, 2)  # Seek to end
-    size = file_storage.tell()
-    file_storage.seek(0)  # Reset to beginning
-    return size
+def file_too_large_response():
+    """Error response for uploads over MAX_FILE_SIZE."""
+    return jsonify({
+        'success': False,
+        'error': {
+            'code': 'FILE_TOO_LARGE',
+            'message': f'File size exceeds {MAX_FILE_SIZE / (1024 * 1024)}MB limit'
+        }
+    }), 400
+
+
+def _client_id():
+    """Client a request is limited against: its remote address."""
+    return request.remote_addr or 'anonymous'
+
+
+def _check_rate_limit(files=1):
+    """
+    Take files uploads from the client's hourly budget.
+
+    Returns:
+        None if allowed, otherwise a 429 response with Retry-After
+    """
+    allowed, wait = rate_limiter.acquire(f"upload:{_client_id()}", RATE_LIMIT_UPLOADS_PER_HOUR, cost=files)
+    if allowed:
+        return None
+    return jsonify({
+        'success': False,
+        'error': {
+            'code': 'RATE_LIMIT_EXCEEDED',
+            'message': f'Upload limit of {RATE_LIMIT_UPLOADS_PER_HOUR} files per hour reached'
+        }
+    }), 429, {'Retry-After': retry_after(wait)}
+
+
+def register_upload(path, sha256, size, filename):
+    """
+    Commit a complete upload to storage and record its metadata.
+
+    Args:
+        path: Temp file holding the uploaded bytes (consumed)
+        sha256: SHA-256 hex digest of the file
+        size: File size in bytes
+        filename: Original client filename
+
+    Returns:
+        Metadata dictionary for the new fileId
+    """
+    # Generate unique file ID
+    file_id = uuid.uuid4().hex
+
+    # Secure the filename
+    original_filename = secure_filename(filename)
+
+    # Store the content under a unique key with file_id prefix
+    storage_key = f"{UPLOAD_PREFIX}/{file_id}_{original_filename}"
+    if LOCAL_STORAGE:
+        filepath = storage.storage_path(storage_key)
+        deduplicated = content_store.commit(path, sha256, filepath)
+    else:
+        filepath = storage.put_file(storage_key, path)
+        os.remove(path)
+        deduplicated = False
+
+    # Store metadata
+    uploaded_files[file_id] = {
+        'fileId': file_id,
+        'filename': original_filename,
+        'filepath': filepath,
+        'storageKey': storage_key,
+        'size': size,
+        'sha256': sha256,
+        'deduplicated': deduplicated,
+        'uploadedAt': datetime.utcnow().isoformat(),
+        'status': 'uploaded'
+    }
+    file_metadata.put('files', file_id, uploaded_files[file_id])
+    UPLOADED_FILES.labels(str(deduplicated).lower()).inc()
+    UPLOADED_BYTES.inc(size)
+
+    if SPECULATIVE_EXTRACTION:
+        prefetch_executor.submit(_request_prefetch, [file_id])
+    return uploaded_files[file_id]
+
+
+def _request_prefetch(file_ids):
+    """Ask the conversion service to pre-extract tables for new uploads (best effort)."""
+    req = urllib.request.Request(
+        f"{CONVERSION_SERVICE_URL}/api/prefetch",
+        data=json.dumps({'fileIds': file_ids}).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=5):
+            pass
+    except OSError:
+        pass
+
+
+def _upload_response_data(file_info):
+    """Public fields of an upload record."""
+    return {
+        'fileId': file_info['fileId'],
+        'filename': file_info['filename'],
+        'size': file_info['size'],
+        'sha256': file_info['sha256'],
+        'deduplicated': file_info['deduplicated'],
+        'uploadedAt': file_info['uploadedAt']
+    }
+
+
+def _commit_streamed_file(file):
+    """Register a fully streamed multipart file part."""
+    writer = file.stream
+    writer.close()
+    file_info = register_upload(writer.path, writer.sha256, writer.size, file.filename)
+    writer.committed = True
+    return file_info
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def handle_too_large(e):
+    """Reject uploads that exceed the size limit while streaming."""
+    return file_too_large_response()
+
+
+@app.errorhandler(ChunkedUploadError)
+def handle_chunked_upload_error(e):
+    """Return chunked upload errors in the standard error format."""
+    return jsonify({
+        'success': False,
+        'error': {
+            'code': e.code,
+            'message': e.message
+        }
+    }), e.status
+
+
+@app.before_request
+def limit_uploads_in_flight():
+    """Turn away upload bodies beyond UPLOAD_MAX_IN_FLIGHT instead of queueing threads."""
+    if request.endpoint not in BODY_ENDPOINTS:
+        return None
+    if not upload_slots.acquire(blocking=False):
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'SERVICE_BUSY',
+                'message': 'Too many uploads in progress, try again shortly'
+            }
+        }), 503, {'Retry-After': str(BUSY_RETRY_AFTER)}
+    request.holds_upload_slot = True
+    return None
+
+
+@app.teardown_request
+def release_upload_slot(exc):
+    """Free the in-flight slot taken by limit_uploads_in_flight."""
+    if getattr(request, 'holds_upload_slot', False):
+        request.holds_upload_slot = False
+        upload_slots.release()
+
+
+@app.teardown_request
+def discard_uncommitted_uploads(exc):
+    """Remove temp files of streamed parts that were not committed."""
+    for writer in getattr(request, 'upload_writers', []):
+        writer.discard()
 
 
 @app.route('/api/health', methods=['GET'])
@@ -45,6 +331,7 @@ def health():
     return jsonify({
         'status': 'healthy',
         'service': 'upload',
+        'retention': retention.stats(),
         'timestamp': datetime.utcnow().isoformat()
     })
 
@@ -55,7 +342,11 @@ def upload():
     Upload a single PDF file.
     Returns file metadata including unique file ID.
     """
-    # Check if file is present
+    # Reject obviously oversized bodies before reading them
+    if request.content_length and request.content_length > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+        return file_too_large_response()
+
+    # Check if file is present (the body is streamed to disk while parsing)
     if 'file' not in request.files:
         return jsonify({
             'success': False,
@@ -87,52 +378,257 @@ def upload():
             }
         }), 400
 
-    # Check file size
-    file_size = get_file_size(file)
-    if file_size > MAX_FILE_SIZE:
+    # Only valid files are charged against the client's budget
+    limited = _check_rate_limit()
+    if limited:
+        return limited
+
+    try:
+        file_info = _commit_streamed_file(file)
+
+        return jsonify({
+            'success': True,
+            'data': _upload_response_data(file_info),
+            'timestamp': datetime.utcnow().isoformat()
+        }), 200
+
+    except Exception as e:
         return jsonify({
             'success': False,
             'error': {
-                'code': 'FILE_TOO_LARGE',
-                'message': f'File size exceeds {MAX_FILE_SIZE / (1024 * 1024)}MB limit'
+                'code': 'UPLOAD_FAILED',
+                'message': str(e)
+            }
+        }), 500
+
+
+def _start_conversion(file_ids, options):
+    """
+    Ask the conversion service to start a job for freshly uploaded files,
+    on behalf of the client that uploaded them (for fair scheduling).
+    """
+    body = json.dumps({
+        'fileIds': file_ids,
+        'parser': options.get('parser', 'pdfplumber'),
+        'merge': options.get('merge', 'false').lower() == 'true',
+        'outputFormat': options.get('outputFormat', 'csv'),
+        'priority': options.get('priority')
+    }).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    if INTERNAL_SERVICE_TOKEN:
+        headers.update({'X-Client-Id': _client_id(), INTERNAL_TOKEN_HEADER: INTERNAL_SERVICE_TOKEN})
+    req = urllib.request.Request(
+        f"{CONVERSION_SERVICE_URL}/api/convert",
+        data=body,
+        headers=headers,
+        method='POST'
+    )
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return json.loads(response.read())['data']
+
+
+@app.route('/api/upload/batch', methods=['POST'])
+def upload_batch():
+    """
+    Upload several PDF files in one multipart request.
+    Each file part is streamed to storage as it arrives and the files are
+    committed concurrently. Returns all fileIds at once.
+
+    Form fields:
+    - files: one or more PDF files (up to MAX_FILES_PER_REQUEST)
+    - convert: "true" to start a conversion job for the uploaded files
+    - parser, merge, outputFormat, priority: conversion options when convert is "true"
+    """
+    max_body = MAX_FILES_PER_REQUEST * (MAX_FILE_SIZE + MULTIPART_OVERHEAD)
+    if request.content_length and request.content_length > max_body:
+        return file_too_large_response()
+
+    # The first file is paid for up front, so a spent budget is refused before the body is read
+    limited = _check_rate_limit()
+    if limited:
+        return limited
+
+    files = request.files.getlist('files') or request.files.getlist('file')
+
+    if not files:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'NO_FILE',
+                'message': 'No files provided'
             }
         }), 400
 
-    try:
-        # Generate unique file ID
-        file_id = uuid.uuid4().hex
+    if len(files) > MAX_FILES_PER_REQUEST:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'TOO_MANY_FILES',
+                'message': f'At most {MAX_FILES_PER_REQUEST} files can be uploaded per request'
+            }
+        }), 400
 
-        # Secure the filename
-        original_filename = secure_filename(file.filename)
-        
-        # Create unique filename with file_id prefix
-        filename = f"{file_id}_{original_filename}"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-
-        # Save file
-        file.save(filepath)
-
-        # Store metadata
-        uploaded_files[file_id] = {
-            'fileId': file_id,
-            'filename': original_filename,
-            'filepath': filepath,
-            'size': file_size,
-            'uploadedAt': datetime.utcnow().isoformat(),
-            'status': 'uploaded'
-        }
+    errors = []
+    accepted = []
+    for file in files:
+        if file.filename == '' or not allowed_file(file.filename):
+            errors.append({
+                'filename': file.filename,
+                'code': 'INVALID_FILE_TYPE',
+                'message': 'Only PDF files are allowed'
+            })
+        else:
+            accepted.append(file)
+
+    if len(accepted) > 1:
+        limited = _check_rate_limit(len(accepted) - 1)
+        if limited:
+            return limited
+
+    uploaded = []
+    futures = [(file, batch_executor.submit(_commit_streamed_file, file)) for file in accepted]
+    for file, future in futures:
+        try:
+            uploaded.append(_upload_response_data(future.result()))
+        except Exception as e:
+            errors.append({
+                'filename': file.filename,
+                'code': 'UPLOAD_FAILED',
+                'message': str(e)
+            })
+
+    data = {
+        'files': uploaded,
+        'fileIds': [file_info['fileId'] for file_info in uploaded],
+        'errors': errors
+    }
+
+    if uploaded and request.form.get('convert', 'false').lower() == 'true':
+        try:
+            data['conversion'] = _start_conversion(data['fileIds'], request.form)
+        except Exception as e:
+            errors.append({
+                'code': 'CONVERSION_NOT_STARTED',
+                'message': str(e)
+            })
+
+    return jsonify({
+        'success': bool(uploaded),
+        'data': data,
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200 if uploaded else 400
+
+
+def _parse_chunk_range():
+    """Get (offset, length) of a chunk from ?offset= or a Content-Range header."""
+    length = request.content_length
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        content_range = request.headers.get('Content-Range', '')
+        # e.g. "bytes 0-5242879/52428800"
+        if content_range.startswith('bytes ') and '-' in content_range:
+            start, _, rest = content_range[6:].partition('-')
+            end = rest.split('/', 1)[0]
+            if start.isdigit() and end.isdigit():
+                offset = int(start)
+                length = length if length is not None else int(end) - offset + 1
+    return offset, length
+
+
+@app.route('/api/uploads', methods=['POST'])
+def init_chunked_upload():
+    """
+    Start a resumable chunked upload.
+
+    Request body:
+    {
+        "filename": "scan.pdf",
+        "size": 52428800,
+        "chunkSize": 5242880,  // optional
+        "sha256": "..."  // optional, verified on completion
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    filename = data.get('filename', '')
 
+    if not filename or not allowed_file(filename):
         return jsonify({
-            'success': True,
-            'data': {
-                'fileId': file_id,
-                'filename': original_filename,
-                'size': file_size,
-                'uploadedAt': uploaded_files[file_id]['uploadedAt']
-            },
-            'timestamp': datetime.utcnow().isoformat()
-        }), 200
+            'success': False,
+            'error': {
+                'code': 'INVALID_FILE_TYPE',
+                'message': 'Only PDF files are allowed'
+            }
+        }), 400
+
+    # A chunked upload counts once, when it starts
+    limited = _check_rate_limit()
+    if limited:
+        return limited
+
+    session = upload_sessions.create(filename, data.get('size'), data.get('chunkSize'), data.get('sha256'))
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'uploadId': session['uploadId'],
+            'size': session['size'],
+            'chunkSize': session['chunkSize']
+        },
+        'timestamp': datetime.utcnow().isoformat()
+    }), 201
+
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """
+    Upload one chunk of a resumable upload.
+    The raw request body is written in place at ?offset=<bytes>
+    (or the start of a "Content-Range: bytes start-end/total" header).
+    Chunks may be sent in any order and in parallel.
+    """
+    offset, length = _parse_chunk_range()
+    status = upload_sessions.write_chunk(upload_id, offset, request.stream, length)
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'uploadId': upload_id,
+            'bytesReceived': status['bytesReceived'],
+            'complete': status['complete']
+        },
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_chunked_upload(upload_id):
+    """Get progress of a resumable upload, including the missing byte ranges."""
+    status = upload_sessions.status(upload_id)
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'uploadId': upload_id,
+            'filename': status['filename'],
+            'size': status['size'],
+            'chunkSize': status['chunkSize'],
+            'bytesReceived': status['bytesReceived'],
+            'receivedRanges': status['receivedRanges'],
+            'missingRanges': status['missingRanges'],
+            'complete': status['complete']
+        },
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
 
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    """Finalize a resumable upload once all chunks have arrived."""
+    status, part_path, sha256 = upload_sessions.finalize(upload_id)
+
+    try:
+        file_info = register_upload(part_path, sha256, status['size'], status['filename'])
+        upload_sessions.remove(upload_id)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -142,11 +638,32 @@ def upload():
             }
         }), 500
 
+    return jsonify({
+        'success': True,
+        'data': _upload_response_data(file_info),
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def abort_chunked_upload(upload_id):
+    """Abort a resumable upload and discard the received chunks."""
+    upload_sessions.remove(upload_id)
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'message': 'Upload aborted'
+        },
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
 
 @app.route('/api/files/<file_id>', methods=['GET'])
 def get_file_info(file_id):
     """Get metadata for an uploaded file."""
-    if file_id not in uploaded_files:
+    file_info = _get_upload(file_id)
+    if file_info is None:
         return jsonify({
             'success': False,
             'error': {
@@ -155,7 +672,6 @@ def get_file_info(file_id):
             }
         }), 404
 
-    file_info = uploaded_files[file_id]
     return jsonify({
         'success': True,
         'data': {
@@ -172,7 +688,8 @@ def get_file_info(file_id):
 @app.route('/api/files/<file_id>', methods=['DELETE'])
 def delete_file(file_id):
     """Delete an uploaded file."""
-    if file_id not in uploaded_files:
+    file_info = _get_upload(file_id)
+    if file_info is None:
         return jsonify({
             'success': False,
             'error': {
@@ -182,14 +699,15 @@ def delete_file(file_id):
         }), 404
 
     try:
-        file_info = uploaded_files[file_id]
-        
-        # Delete physical file
-        if os.path.exists(file_info['filepath']):
-            os.remove(file_info['filepath'])
+        if LOCAL_STORAGE:
+            # Delete this fileId's link, and the stored content if no other upload shares it
+            content_store.release(file_info['filepath'], file_info.get('sha256'))
+        elif file_info.get('storageKey'):
+            storage.delete(file_info['storageKey'])
         
         # Remove from metadata
-        del uploaded_files[file_id]
+        uploaded_files.pop(file_id, None)
+        file_metadata.delete('files', file_id)
 
         return jsonify({
             'success': True,
@@ -210,4 +728,5 @@ def delete_file(file_id):
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Development server; production runs under scripts/serve.py
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5001)), debug=os.getenv('FLASK_DEBUG') == '1')
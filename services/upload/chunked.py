@@ -0,0 +1,242 @@
+"""
+Chunked Upload Module
+Resumable uploads: a session is initialised with the final file size, chunks
+are written in place at their byte offset (in any order, possibly in
+parallel), and the session is finalized once every byte has arrived.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+
+COPY_BUFFER_SIZE = 1024 * 1024  # 1MB
+DEFAULT_CHUNK_SIZE = 5 * 1024 * 1024  # 5MB
+MIN_CHUNK_SIZE = 256 * 1024  # 256KB
+MAX_CHUNK_SIZE = 16 * 1024 * 1024  # 16MB
+
+_VALID_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ChunkedUploadError(Exception):
+    """Raised for invalid chunked upload operations."""
+
+    def __init__(self, code, message, status=400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+class ChunkedUploadSessions:
+    """
+    File-backed resumable upload sessions.
+
+    Each session consists of a preallocated ``<id>.part`` file, a ``<id>.json``
+    descriptor and a ``<id>.ranges`` folder holding one empty marker file per
+    received chunk. Recording a chunk never rewrites shared state, so chunks
+    can be uploaded concurrently, even to different worker processes. Every
+    chunk touches the descriptor, whose mtime is the session's last activity.
+    """
+
+    def __init__(self, root, max_size):
+        self.root = root
+        self.max_size = max_size
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, upload_id):
+        if not _VALID_UPLOAD_ID.match(upload_id or ''):
+            raise ChunkedUploadError('UPLOAD_NOT_FOUND', 'Upload session not found', 404)
+        base = os.path.join(self.root, upload_id)
+        return f"{base}.json", f"{base}.part", f"{base}.ranges"
+
+    def _load(self, upload_id):
+        session_path, part_path, ranges_dir = self._paths(upload_id)
+        try:
+            with open(session_path, 'r', encoding='utf-8') as f:
+                return json.load(f), part_path, ranges_dir
+        except FileNotFoundError:
+            raise ChunkedUploadError('UPLOAD_NOT_FOUND', 'Upload session not found', 404)
+
+    def create(self, filename, size, chunk_size=None, sha256=None):
+        """
+        Start a new upload session and preallocate its target file.
+
+        Args:
+            filename: Original client filename
+            size: Total file size in bytes
+            chunk_size: Preferred chunk size (clamped to the allowed range)
+            sha256: Optional expected digest, verified on finalize
+
+        Returns:
+            Session dictionary
+        """
+        if not isinstance(size, int) or size <= 0:
+            raise ChunkedUploadError('INVALID_SIZE', 'File size must be a positive integer')
+        if size > self.max_size:
+            raise ChunkedUploadError(
+                'FILE_TOO_LARGE', f'File size exceeds {self.max_size / (1024 * 1024)}MB limit'
+            )
+
+        chunk_size = min(max(int(chunk_size or DEFAULT_CHUNK_SIZE), MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
+        upload_id = uuid.uuid4().hex
+        session_path, part_path, ranges_dir = self._paths(upload_id)
+
+        session = {
+            'uploadId': upload_id,
+            'filename': filename,
+            'size': size,
+            'chunkSize': chunk_size,
+            'sha256': sha256.lower() if sha256 else None,
+            'createdAt': datetime.utcnow().isoformat()
+        }
+
+        os.makedirs(ranges_dir, exist_ok=True)
+        with open(part_path, 'wb') as f:
+            f.truncate(size)
+        tmp_path = f"{session_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(session, f)
+        os.replace(tmp_path, session_path)
+        return session
+
+    def write_chunk(self, upload_id, offset, stream, length):
+        """
+        Write a chunk in place at its byte offset.
+
+        Args:
+            upload_id: Session identifier
+            offset: Byte offset of the chunk within the file
+            stream: Readable stream with the chunk body
+            length: Number of bytes in the chunk
+
+        Returns:
+            Session status after the write
+        """
+        session, part_path, ranges_dir = self._load(upload_id)
+        if offset is None or length is None or offset < 0 or length <= 0:
+            raise ChunkedUploadError('INVALID_RANGE', 'A non-empty chunk with a valid offset is required')
+        if offset + length > session['size']:
+            raise ChunkedUploadError('INVALID_RANGE', 'Chunk extends beyond the declared file size')
+
+        session_path = self._paths(upload_id)[0]
+        written = 0
+        try:
+            f = open(part_path, 'r+b')
+        except FileNotFoundError:
+            raise ChunkedUploadError('UPLOAD_NOT_FOUND', 'Upload session expired', 404)
+        with f:
+            f.seek(offset)
+            while written < length:
+                data = stream.read(min(COPY_BUFFER_SIZE, length - written))
+                if not data:
+                    break
+                f.write(data)
+                written += len(data)
+
+        if written != length:
+            # Incomplete chunk: nothing is recorded, the client resends it
+            raise ChunkedUploadError('INCOMPLETE_CHUNK', f'Received {written} of {length} bytes')
+
+        # The folder is recreated if a sweep pruned it while it was still empty
+        os.makedirs(ranges_dir, exist_ok=True)
+        open(os.path.join(ranges_dir, f"{offset}-{offset + length}"), 'wb').close()
+        try:
+            os.utime(session_path)
+        except FileNotFoundError:
+            raise ChunkedUploadError('UPLOAD_NOT_FOUND', 'Upload session expired', 404)
+        return self.status(upload_id)
+
+    def status(self, upload_id):
+        """Return the session with received bytes and missing byte ranges."""
+        session, part_path, ranges_dir = self._load(upload_id)
+
+        try:
+            names = os.listdir(ranges_dir)
+        except FileNotFoundError:
+            # No chunk received yet and the empty folder was pruned
+            names = []
+        ranges = []
+        for name in names:
+            start, _, end = name.partition('-')
+            ranges.append((int(start), int(end)))
+        ranges.sort()
+
+        received = []
+        for start, end in ranges:
+            if received and start <= received[-1][1]:
+                received[-1][1] = max(received[-1][1], end)
+            else:
+                received.append([start, end])
+
+        missing = []
+        cursor = 0
+        for start, end in received:
+            if start > cursor:
+                missing.append([cursor, start])
+            cursor = max(cursor, end)
+        if cursor < session['size']:
+            missing.append([cursor, session['size']])
+
+        return {
+            **session,
+            'bytesReceived': sum(end - start for start, end in received),
+            'receivedRanges': received,
+            'missingRanges': missing,
+            'complete': not missing
+        }
+
+    def finalize(self, upload_id):
+        """
+        Verify that every byte arrived and hash the assembled file.
+
+        Returns:
+            Tuple of (session status, assembled file path, sha256 hex digest)
+        """
+        status = self.status(upload_id)
+        if not status['complete']:
+            raise ChunkedUploadError('UPLOAD_INCOMPLETE', 'Some byte ranges are still missing', 409)
+
+        _, part_path, _ = self._paths(upload_id)
+        digest = hashlib.sha256()
+        with open(part_path, 'rb') as f:
+            for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+
+        if status['sha256'] and status['sha256'] != sha256:
+            raise ChunkedUploadError('CHECKSUM_MISMATCH', 'Uploaded content does not match sha256', 422)
+        return status, part_path, sha256
+
+    def is_active(self, path, max_idle):
+        """
+        Whether path belongs to a session that is still in use, so the
+        retention manager must leave it alone: the sessions folder itself, or
+        a file or folder of a session that received data within max_idle
+        seconds. Idle sessions expire with the files of their folder.
+        """
+        relative = os.path.relpath(path, self.root)
+        if relative == os.curdir:
+            return True
+        upload_id = relative.split(os.sep, 1)[0].split('.', 1)[0]
+        if relative.startswith(os.pardir) or not _VALID_UPLOAD_ID.match(upload_id):
+            return False
+        try:
+            return time.time() - os.stat(self._paths(upload_id)[0]).st_mtime <= max_idle
+        except FileNotFoundError:
+            return False
+
+    def remove(self, upload_id):
+        """Delete a session and any bytes received so far."""
+        session_path, part_path, ranges_dir = self._paths(upload_id)
+        if not os.path.exists(session_path):
+            raise ChunkedUploadError('UPLOAD_NOT_FOUND', 'Upload session not found', 404)
+        for path in (session_path, part_path):
+            if os.path.exists(path):
+                os.remove(path)
+        if os.path.isdir(ranges_dir):
+            for name in os.listdir(ranges_dir):
+                os.remove(os.path.join(ranges_dir, name))
+            os.rmdir(ranges_dir)
@@ -0,0 +1,153 @@
+"""
+Streaming Upload Module
+Streams multipart file parts straight to disk while hashing and size-checking,
+and stores the results content-addressed so identical PDFs are kept once.
+"""
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+class HashingFileWriter:
+    """
+    File-like sink for a single uploaded file part.
+
+    Bytes are written to a temporary file as they arrive from the client while
+    the SHA-256 digest and size are computed, so the upload is never buffered
+    in memory and oversized files are rejected as soon as they cross the limit.
+    """
+
+    # Paths of files still being written, so the retention sweeper leaves them alone
+    active_paths = set()
+    _active_lock = threading.Lock()
+
+    def __init__(self, directory, max_size, filename=None):
+        os.makedirs(directory, exist_ok=True)
+        self.filename = filename
+        self.max_size = max_size
+        self.path = os.path.join(directory, f"{uuid.uuid4().hex}.part")
+        self.size = 0
+        self.committed = False
+        self._hash = hashlib.sha256()
+        with self._active_lock:
+            self.active_paths.add(self.path)
+        self._file = open(self.path, 'w+b')
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise RequestEntityTooLarge()
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    @property
+    def sha256(self):
+        """Hex digest of everything written so far."""
+        return self._hash.hexdigest()
+
+    def close(self):
+        """Close the underlying temp file (the file itself is kept)."""
+        if not self._file.closed:
+            self._file.close()
+        with self._active_lock:
+            self.active_paths.discard(self.path)
+
+    def discard(self):
+        """Close and remove the temp file unless it has been committed."""
+        self.close()
+        if not self.committed and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class StreamingRequest(Request):
+    """Request that streams file parts into HashingFileWriters instead of spooling them."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        writer = HashingFileWriter(
+            current_app.config['UPLOAD_INCOMING_FOLDER'],
+            current_app.config['UPLOAD_MAX_FILE_SIZE'],
+            filename
+        )
+        if not hasattr(self, 'upload_writers'):
+            self.upload_writers = []
+        self.upload_writers.append(writer)
+        return writer
+
+
+class ContentStore:
+    """Content-addressed PDF storage with per-fileId hard links."""
+
+    def __init__(self, root):
+        self.root = root
+        self.blob_root = os.path.join(root, 'blobs')
+        os.makedirs(self.blob_root, exist_ok=True)
+
+    def blob_path(self, digest):
+        """Path of the stored blob for a SHA-256 digest."""
+        return os.path.join(self.blob_root, digest[:2], f"{digest}.pdf")
+
+    def commit(self, path, digest, link_path):
+        """
+        Move a finished upload into storage and link it to a fileId-specific path.
+
+        Args:
+            path: Temp file holding the complete upload (consumed)
+            digest: SHA-256 hex digest of the file
+            link_path: Path that should refer to the stored content
+
+        Returns:
+            True if identical content was already stored (deduplicated)
+        """
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+
+        deduplicated = os.path.exists(blob)
+        if deduplicated:
+            os.remove(path)
+            # Refresh the blob so TTL and LRU eviction treat it as recently used
+            os.utime(blob)
+        else:
+            os.replace(path, blob)
+
+        try:
+            os.link(blob, link_path)
+        except FileExistsError:
+            os.remove(link_path)
+            os.link(blob, link_path)
+        except OSError:
+            # Filesystem without hard links: fall back to a private copy
+            shutil.copyfile(blob, link_path)
+        return deduplicated
+
+    def release(self, link_path, digest=None):
+        """Remove a fileId link, and the blob once nothing else links to it."""
+        if os.path.exists(link_path):
+            os.remove(link_path)
+        if digest:
+            blob = self.blob_path(digest)
+            try:
+                if os.stat(blob).st_nlink <= 1:
+                    os.remove(blob)
+            except FileNotFoundError:
+                pass
@@ -2,7 +2,27 @@
 
 __version__ = "1.0.0"
 
-from .storage import StorageBackend, LocalStorageBackend, S3StorageBackend, get_storage_backend
+from .storage import (
+    StorageBackend,
+    LocalStorageBackend,
+    S3StorageBackend,
+    CachedStorageBackend,
+    get_storage_backend
+)
+from .async_storage import (
+    AsyncStorageBackend,
+    AsyncLocalStorageBackend,
+    AsyncS3StorageBackend
+)
+from .metadata import MetadataStore
+from .metrics import MetricsRegistry, REGISTRY, instrument_app
+from .tracing import Trace, activate, span, traced
+from .ratelimit import (
+    RateLimiter,
+    MemoryRateLimiter,
+    SQLiteRateLimiter,
+    create_rate_limiter
+)
 from .utils import (
     generate_file_id,
     generate_hash,
@@ -15,7 +35,23 @@ __all__ = [
     'StorageBackend',
     'LocalStorageBackend',
     'S3StorageBackend',
+    'CachedStorageBackend',
     'get_storage_backend',
+    'AsyncStorageBackend',
+    'AsyncLocalStorageBackend',
+    'AsyncS3StorageBackend',
+    'MetadataStore',
+    'MetricsRegistry',
+    'REGISTRY',
+    'instrument_app',
+    'Trace',
+    'activate',
+    'span',
+    'traced',
+    'RateLimiter',
+    'MemoryRateLimiter',
+    'SQLiteRateLimiter',
+    'create_rate_limiter',
     'generate_file_id',
     'generate_hash',
     'get_timestamp',
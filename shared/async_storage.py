@@ -0,0 +1,176 @@
+"""Asyncio counterpart of the storage backends."""
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Optional
+
+from .storage import (
+    STREAM_BUFFER_SIZE,
+    LocalStorageBackend,
+    S3StorageBackend,
+    StorageBackend
+)
+
+# Threads used to run blocking disk and S3 calls off the event loop
+ASYNC_IO_MAX_WORKERS = 32
+
+
+class AsyncStorageBackend(ABC):
+    """Abstract base class for asyncio storage backends."""
+
+    @abstractmethod
+    async def save(self, key: str, data: bytes) -> str:
+        """Save data to storage and return the storage path."""
+        pass
+
+    @abstractmethod
+    async def load(self, key: str) -> bytes:
+        """Load data from storage."""
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete data from storage."""
+        pass
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Check if key exists in storage."""
+        pass
+
+    @abstractmethod
+    def iter_read(self, key: str, chunk_size: int = STREAM_BUFFER_SIZE) -> AsyncIterator[bytes]:
+        """Stream a stored object in chunks of at most chunk_size bytes."""
+        pass
+
+    @abstractmethod
+    async def write_stream(self, key: str, chunks: AsyncIterable[bytes]) -> None:
+        """
+        Store an object from an async stream of chunks.
+
+        The object becomes visible once the stream is exhausted; if the stream
+        raises, the partial object is discarded.
+        """
+        pass
+
+    async def save_many(self, items: Dict[str, bytes]) -> Dict[str, str]:
+        """Save several objects concurrently; returns key -> storage path."""
+        keys = list(items)
+        paths = await asyncio.gather(*(self.save(key, items[key]) for key in keys))
+        return dict(zip(keys, paths))
+
+    async def load_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """Load several objects concurrently; keys that do not exist are omitted."""
+        keys = list(set(keys))
+        results = await asyncio.gather(*(self.load(key) for key in keys), return_exceptions=True)
+        loaded = {}
+        for key, result in zip(keys, results):
+            if isinstance(result, FileNotFoundError):
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            loaded[key] = result
+        return loaded
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        """Delete several objects concurrently."""
+        await asyncio.gather(*(self.delete(key) for key in set(keys)))
+
+    async def exists_many(self, keys: Iterable[str]) -> Dict[str, bool]:
+        """Check several keys concurrently; returns key -> exists."""
+        keys = list(set(keys))
+        results = await asyncio.gather(*(self.exists(key) for key in keys))
+        return dict(zip(keys, results))
+
+
+class ThreadedAsyncStorageBackend(AsyncStorageBackend):
+    """
+    Async adapter that runs a synchronous backend's calls on a thread pool.
+
+    The event loop only waits on futures, so one worker can serve many
+    concurrent clients while disk and S3 I/O happen in the pool.
+    """
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, backend: StorageBackend, executor: Optional[ThreadPoolExecutor] = None):
+        self.backend = backend
+        self.executor = executor or self._default_executor()
+
+    @classmethod
+    def _default_executor(cls) -> ThreadPoolExecutor:
+        # Separate from the bulk-operation pool, which the wrapped backend may use itself
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=ASYNC_IO_MAX_WORKERS, thread_name_prefix='storage-async'
+                )
+            return cls._executor
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def save(self, key: str, data: bytes) -> str:
+        return await self._run(self.backend.save, key, data)
+
+    async def load(self, key: str) -> bytes:
+        return await self._run(self.backend.load, key)
+
+    async def delete(self, key: str) -> None:
+        await self._run(self.backend.delete, key)
+
+    async def exists(self, key: str) -> bool:
+        return await self._run(self.backend.exists, key)
+
+    async def get_etag(self, key: str) -> Optional[str]:
+        return await self._run(self.backend.get_etag, key)
+
+    async def iter_read(self, key: str, chunk_size: int = STREAM_BUFFER_SIZE) -> AsyncIterator[bytes]:
+        f = await self._run(self.backend.open_read, key)
+        try:
+            while True:
+                chunk = await self._run(f.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            await self._run(f.close)
+
+    async def write_stream(self, key: str, chunks: AsyncIterable[bytes]) -> None:
+        f = await self._run(self.backend.open_write, key)
+        try:
+            async for chunk in chunks:
+                await self._run(f.write, chunk)
+        except BaseException:
+            await self._run(f.abort)
+            raise
+        await self._run(f.close)
+
+    # The sync backends already batch and parallelize these (e.g. S3 DeleteObjects)
+    async def save_many(self, items: Dict[str, bytes]) -> Dict[str, str]:
+        return await self._run(self.backend.save_many, items)
+
+    async def load_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        return await self._run(self.backend.load_many, list(keys))
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        await self._run(self.backend.delete_many, list(keys))
+
+    async def exists_many(self, keys: Iterable[str]) -> Dict[str, bool]:
+        return await self._run(self.backend.exists_many, list(keys))
+
+
+class AsyncLocalStorageBackend(ThreadedAsyncStorageBackend):
+    """Async local filesystem storage."""
+
+    def __init__(self, base_path: str = "./data"):
+        super().__init__(LocalStorageBackend(base_path))
+
+
+class AsyncS3StorageBackend(ThreadedAsyncStorageBackend):
+    """Async AWS S3 storage (shares the pooled S3 client of the sync backend)."""
+
+    def __init__(self, bucket: Optional[str] = None, client=None):
+        super().__init__(S3StorageBackend(bucket=bucket, client=client))
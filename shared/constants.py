@@ -17,11 +17,15 @@ API_PREFIX = f'/api/{API_VERSION}'
 # Rate limiting
 RATE_LIMIT_UPLOADS = 100  # per hour
 RATE_LIMIT_CONVERSIONS = 50  # per hour
+RATE_LIMIT_STORE_FILE = 'pdf-to-csv-ratelimit.db'  # in the temp dir, shared by all services
+INTERNAL_TOKEN_HEADER = 'X-Internal-Token'  # proves a forwarded X-Client-Id comes from a service
 
 # Conversion settings
 DEFAULT_PARSER = 'pdfplumber'
 CONVERSION_TIMEOUT = 300  # seconds
+PAGE_TIMEOUT = 30  # seconds
 POLLING_INTERVAL = 1000  # milliseconds
+STREAM_KEEPALIVE_INTERVAL = 15  # seconds
 
 # Status codes
 STATUS_UPLOADING = 'uploading'
@@ -38,3 +42,16 @@ ERROR_CONVERSION_FAILED = 'CONVERSION_FAILED'
 ERROR_FILE_NOT_FOUND = 'FILE_NOT_FOUND'
 ERROR_INVALID_PARSER = 'INVALID_PARSER'
 ERROR_RATE_LIMIT_EXCEEDED = 'RATE_LIMIT_EXCEEDED'
+
+# Retention
+UPLOAD_TTL = 24 * 60 * 60  # seconds
+CONVERTED_TTL = 24 * 60 * 60  # seconds
+TABLE_CACHE_TTL = 24 * 60 * 60  # seconds
+UPLOAD_QUOTA = 5 * 1024 * 1024 * 1024  # 5GB
+CONVERTED_QUOTA = 5 * 1024 * 1024 * 1024  # 5GB
+RETENTION_SWEEP_INTERVAL = 300  # seconds
+
+# Storage keys (relative to the local storage root or the S3 bucket)
+UPLOAD_PREFIX = 'pdf-to-csv-uploads'
+CONVERTED_PREFIX = 'pdf-to-csv-converted'
+METADATA_PREFIX = f'{UPLOAD_PREFIX}/.metadata'
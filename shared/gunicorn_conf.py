@@ -0,0 +1,71 @@
+"""
+Gunicorn configuration of the services (see serving.py).
+
+    SERVICE_NAME=conversion gunicorn -c /path/to/shared/gunicorn_conf.py app:app
+
+run from the service's folder; scripts/serve.py does this for every service.
+"""
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+
+# Gunicorn executes this file by path, so the package is not importable yet
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from shared.serving import mark_supervised, server_settings, shutdown  # noqa: E402
+
+_settings = server_settings(os.environ.get('SERVICE_NAME', ''))
+
+bind = f"0.0.0.0:{_settings['port']}"
+workers = _settings['workers']
+# Threads per worker: status streams and downloads hold a thread for as long as they run
+worker_class = 'gthread'
+threads = _settings['threads']
+max_requests = _settings['max_requests']
+max_requests_jitter = _settings['max_requests_jitter']
+graceful_timeout = _settings['graceful_timeout']
+timeout = _settings['timeout']
+keepalive = _settings['keepalive']
+# The apps start background threads at import, which must happen in each worker
+preload_app = False
+proc_name = f"pdf-to-csv-{os.environ.get('SERVICE_NAME')}"
+accesslog = '-'
+
+# Workers share their metrics through this folder, so whichever of them
+# answers a scrape reports all of them (shared/metrics.py)
+os.environ.setdefault(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), f"pdf-to-csv-metrics-{os.environ.get('SERVICE_NAME')}")
+)
+
+
+def on_starting(server):
+    # Snapshots left by the workers of an earlier run would be added to this one's
+    shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
+
+
+def post_fork(server, worker):
+    # Before the app is imported, so it knows a master will replace this process
+    mark_supervised()
+
+
+def post_worker_init(worker):
+    # Start draining as soon as the worker is asked to exit, alongside the
+    # requests it is still finishing, rather than after them
+    handle_exit = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(sig, frame):
+        threading.Thread(target=shutdown, args=(graceful_timeout,), name='shutdown', daemon=True).start()
+        handle_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+
+
+def worker_exit(server, worker):
+    # Also reached when the worker exits on its own (max_requests) or quits.
+    # The master calls it too, for workers that died; workers forked later
+    # inherit the master's state, so it must not shut down there.
+    if worker.pid == os.getpid():
+        shutdown(graceful_timeout)
@@ -0,0 +1,45 @@
+"""Persistent metadata records shared between services."""
+import json
+import re
+from typing import Optional
+
+from .storage import StorageBackend
+
+_VALID_ID = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+
+class MetadataStore:
+    """
+    JSON record store keyed by record kind and id.
+
+    Each record lives under its own storage key (``[prefix/]<kind>/<id>.json``),
+    so a lookup is a single direct read regardless of how many records exist.
+    """
+
+    def __init__(self, storage: StorageBackend, prefix: str = ''):
+        self.storage = storage
+        self.prefix = f"{prefix.strip('/')}/" if prefix else ''
+
+    def _key(self, kind: str, record_id: str) -> str:
+        if not _VALID_ID.match(kind) or not _VALID_ID.match(record_id):
+            raise ValueError(f"Invalid metadata key: {kind}/{record_id}")
+        return f"{self.prefix}{kind}/{record_id}.json"
+
+    def put(self, kind: str, record_id: str, record: dict) -> None:
+        """Create or replace a record."""
+        self.storage.save(self._key(kind, record_id), json.dumps(record).encode('utf-8'))
+
+    def get(self, kind: str, record_id: str) -> Optional[dict]:
+        """Return a record, or None if it does not exist (or the id is invalid)."""
+        try:
+            data = self.storage.load(self._key(kind, record_id))
+        except (ValueError, FileNotFoundError):
+            return None
+        return json.loads(data)
+
+    def delete(self, kind: str, record_id: str) -> None:
+        """Delete a record if it exists."""
+        try:
+            self.storage.delete(self._key(kind, record_id))
+        except ValueError:
+            pass
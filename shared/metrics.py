@@ -0,0 +1,471 @@
+"""Prometheus-style metrics kept in process memory.
+
+Counters, gauges and histograms are updated in place under a per-metric
+lock, and rendered in the Prometheus text format only when ``/metrics`` is
+scraped. Values computed from existing state (queue depth, cache counters)
+are registered as callbacks and read at scrape time instead of being kept
+up to date on every change.
+
+Worker processes of one service can share a folder of snapshots
+(``MetricsRegistry.share``), so whichever worker answers a scrape reports
+the totals of all of them.
+"""
+import atexit
+import bisect
+import glob
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds for latencies in seconds, from a quick request to a long conversion
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Seconds between the snapshots a process writes to a shared metrics folder
+SHARE_INTERVAL = 5.0
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _is_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # It exists but belongs to someone else
+        return True
+    return True
+
+
+class _Value:
+    """A single counter or gauge value."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class _HistogramValue:
+    """Bucket counts, sum and count of one histogram series."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self._lock = threading.Lock()
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last bucket is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the with block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+    def add(self, counts: Sequence[int], total: float) -> None:
+        """Add the bucket counts and sum of another series with the same bounds."""
+        with self._lock:
+            for index, count in enumerate(counts):
+                self.counts[index] += count
+            self.sum += total
+
+
+class Metric:
+    """A named metric with one series per combination of label values."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[LabelValues, object] = {}
+
+    def _new_series(self):
+        return _Value()
+
+    def labels(self, *values) -> object:
+        """Return the series for the given label values, in labelnames order."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, self._new_series())
+        return series
+
+    def samples(self) -> Iterator[Sample]:
+        for key, series in list(self._series.items()):
+            yield self.name, dict(zip(self.labelnames, key)), series.value
+
+    def export(self) -> list:
+        """Series as [label values, value] pairs, for a snapshot."""
+        return [[list(key), series.value] for key, series in list(self._series.items())]
+
+
+class Counter(Metric):
+    """Monotonically increasing total."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    """Distribution of observations over fixed buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_series(self):
+        return _HistogramValue(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def samples(self) -> Iterator[Sample]:
+        for key, series in list(self._series.items()):
+            labels = dict(zip(self.labelnames, key))
+            counts, total = series.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, 'le': _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+    def export(self) -> list:
+        return [[list(key), *series.snapshot()] for key, series in list(self._series.items())]
+
+
+class CallbackMetric(Metric):
+    """
+    Metric read from a function at scrape time. The function returns a
+    number, or a dict mapping tuples of label values to numbers.
+
+    A per-process value (one worker's own counters) is summed over the
+    processes sharing a registry folder; any other value is read from shared
+    state and taken from the process answering the scrape.
+    """
+
+    def __init__(self, name: str, documentation: str,
+                 function: Callable[[], Union[float, Dict[LabelValues, float]]],
+                 labelnames: Sequence[str] = (), kind: str = 'gauge', per_process: bool = False):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+        self.kind = kind
+        self.per_process = per_process
+
+    def _values(self) -> Dict[LabelValues, float]:
+        values = self.function()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return {key: value for key, value in values.items() if value is not None}
+
+    def samples(self) -> Iterator[Sample]:
+        for key, value in self._values().items():
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+    def export(self) -> list:
+        return [[list(key), value] for key, value in self._values().items()]
+
+
+class MetricsRegistry:
+    """
+    Metrics of one process, by name.
+
+    Asking for a metric that already exists returns it, so modules can
+    declare the metrics they update at import time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+        self.shared_dir: Optional[str] = None
+        self._shared_path: Optional[str] = None
+        self._share_lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def callback(self, name: str, documentation: str,
+                 function: Callable[[], Union[float, Dict[LabelValues, float]]],
+                 labelnames: Sequence[str] = (), kind: str = 'gauge', per_process: bool = False) -> CallbackMetric:
+        """Register (or replace) a metric read from function at scrape time."""
+        metric = CallbackMetric(name, documentation, function, labelnames, kind, per_process)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, dict]:
+        """The values this process adds to a shared registry, by metric name."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        snapshot = {}
+        for metric in metrics:
+            if isinstance(metric, CallbackMetric) and not metric.per_process:
+                continue
+            try:
+                series = metric.export()
+            except Exception:
+                continue
+            snapshot[metric.name] = {
+                'kind': metric.kind, 'documentation': metric.documentation,
+                'labelnames': list(metric.labelnames), 'bounds': list(getattr(metric, 'bounds', ())),
+                'series': series
+            }
+        return snapshot
+
+    def share(self, directory: str, interval: float = SHARE_INTERVAL) -> None:
+        """
+        Add up this registry with those of the other processes sharing directory.
+
+        The process writes its snapshot to the folder every interval seconds,
+        at exit and before each scrape, and a scrape sums the snapshots of all
+        processes. Counters and histograms of processes that have exited are
+        kept, so totals never go down; their gauges are dropped.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._shared_path = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+        self.shared_dir = directory
+        atexit.register(self._write_snapshot)
+        threading.Thread(target=self._share_loop, args=(interval,), name='metrics-share', daemon=True).start()
+
+    def _share_loop(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                self._write_snapshot()
+            except OSError:
+                pass
+
+    def _write_snapshot(self) -> None:
+        with self._share_lock:
+            temp_path = f"{self._shared_path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({'pid': os.getpid(), 'metrics': self.snapshot()}, f)
+            os.replace(temp_path, self._shared_path)
+
+    def _add_snapshot(self, name: str, entry: dict) -> None:
+        if entry['kind'] == 'histogram':
+            metric = self.histogram(name, entry['documentation'], entry['labelnames'], entry['bounds'])
+            for key, counts, total in entry['series']:
+                if len(counts) == len(metric.bounds) + 1:
+                    metric.labels(*key).add(counts, total)
+        else:
+            metric = self._get_or_create(Gauge if entry['kind'] == 'gauge' else Counter,
+                                         name, entry['documentation'], entry['labelnames'])
+            for key, value in entry['series']:
+                metric.labels(*key).inc(value)
+
+    def _merged(self) -> 'MetricsRegistry':
+        """A registry summing the snapshots in the shared folder."""
+        # Written first: every value one scrape reports is on disk for the next
+        self._write_snapshot()
+        merged = MetricsRegistry()
+        for path in sorted(glob.glob(os.path.join(self.shared_dir, '*.json'))):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _is_alive(snapshot['pid'])
+            for name, entry in snapshot['metrics'].items():
+                if entry['kind'] == 'gauge' and not alive:
+                    continue
+                try:
+                    merged._add_snapshot(name, entry)
+                except ValueError:
+                    # Registered with another kind by a different version of the code
+                    continue
+        with self._lock:
+            for metric in self._metrics.values():
+                if isinstance(metric, CallbackMetric) and not metric.per_process:
+                    merged._metrics[metric.name] = metric
+        return merged
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        if self.shared_dir is not None:
+            return self._merged().render()
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                # A failing callback must not break the whole scrape
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in samples:
+                if labels:
+                    label_text = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                    name = f"{name}{{{label_text}}}"
+                lines.append(f"{name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+# Registry of the current process, served by instrument_app()
+REGISTRY = MetricsRegistry()
+
+
+def _count_bytes(iterable, counter) -> Iterator[bytes]:
+    """Pass a streamed response body through, counting the bytes sent."""
+    try:
+        for chunk in iterable:
+            counter.inc(len(chunk))
+            yield chunk
+    finally:
+        close = getattr(iterable, 'close', None)
+        if close:
+            close()
+
+
+def instrument_app(app, registry: Optional[MetricsRegistry] = None) -> None:
+    """
+    Record latency and traffic of every request to a Flask app, per route,
+    and serve the registry at ``GET /metrics``. With ``METRICS_DIR`` set,
+    the registry is shared with the other workers of the service through
+    that folder.
+
+    Latency is measured until the response is handed to the server, so for
+    streamed responses it is the time to the first byte.
+    """
+    from flask import Response, g, request
+
+    registry = registry or REGISTRY
+    # Set for the workers of a gunicorn master (gunicorn_conf.py)
+    shared_dir = os.environ.get('METRICS_DIR')
+    if shared_dir and registry.shared_dir is None:
+        registry.share(shared_dir)
+    latency = registry.histogram(
+        'http_request_duration_seconds', 'HTTP request latency', ('method', 'route', 'status')
+    )
+    in_flight = registry.gauge('http_requests_in_flight', 'HTTP requests being handled')
+    bytes_in = registry.counter('http_request_bytes_total', 'Request body bytes received', ('route',))
+    bytes_out = registry.counter('http_response_bytes_total', 'Response body bytes sent', ('route',))
+
+    def route():
+        # The URL rule rather than the path keeps ids out of the label values
+        return request.url_rule.rule if request.url_rule else 'unmatched'
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        in_flight.inc()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        in_flight.dec()
+        rule = route()
+        latency.labels(request.method, rule, response.status_code).observe(time.perf_counter() - started)
+        if request.content_length:
+            bytes_in.labels(rule).inc(request.content_length)
+        if response.content_length is None and response.is_streamed:
+            response.response = _count_bytes(response.response, bytes_out.labels(rule))
+            response.direct_passthrough = False
+        else:
+            bytes_out.labels(rule).inc(response.content_length or 0)
+        return response
+
+    @app.teardown_request
+    def finish_failed_request(exc):
+        # after_request does not run when a view raised
+        if g.pop('metrics_started', None) is not None:
+            in_flight.dec()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus scrape endpoint."""
+        return Response(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,176 @@
+"""Token-bucket rate limits shared by the service processes on one host.
+
+Every key (e.g. ``convert:<client>``) has a bucket holding up to ``burst``
+tokens that refills at ``rate_per_hour``. A request takes one token per unit
+of work; when the bucket is short, the caller is told how long to wait.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+# Buckets that have refilled completely are dropped at most this often
+PRUNE_INTERVAL = 60  # seconds
+
+
+def _take(tokens: float, updated: float, now: float, rate_per_hour: float,
+          burst: float, cost: float) -> Tuple[float, bool, float]:
+    """
+    Refill a bucket up to now and try to take cost tokens from it.
+
+    Returns:
+        Tuple of (tokens left, allowed, seconds until cost tokens are available)
+    """
+    per_second = rate_per_hour / 3600
+    tokens = min(burst, tokens + max(now - updated, 0) * per_second)
+    cost = min(cost, burst)  # A request larger than the bucket waits for a full one
+    if tokens >= cost:
+        return tokens - cost, True, 0.0
+    return tokens, False, (cost - tokens) / per_second
+
+
+def _full_at(tokens: float, now: float, rate_per_hour: float, burst: float) -> float:
+    """Time at which a bucket is full again, after which it need not be stored."""
+    return now + (burst - tokens) / (rate_per_hour / 3600)
+
+
+def retry_after(seconds: float) -> str:
+    """Format a wait as a Retry-After header value (whole seconds, at least 1)."""
+    return str(max(1, math.ceil(seconds)))
+
+
+class RateLimiter(ABC):
+    """Token buckets keyed by client and endpoint."""
+
+    @abstractmethod
+    def acquire(self, key: str, rate_per_hour: float, burst: Optional[float] = None,
+                cost: float = 1) -> Tuple[bool, float]:
+        """
+        Take cost tokens from the bucket of key.
+
+        Args:
+            key: Bucket key, e.g. ``upload:<client>``
+            rate_per_hour: Tokens added per hour; 0 or less disables the limit
+            burst: Bucket size (defaults to rate_per_hour)
+            cost: Tokens this request needs
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds); retry_after_seconds is 0
+            when the request is allowed
+        """
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        """Refill the bucket of key."""
+
+
+class MemoryRateLimiter(RateLimiter):
+    """Buckets in process memory; each process of a service limits on its own."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}  # key -> (tokens, updated, full_at)
+        self._last_prune = time.time()
+
+    def acquire(self, key: str, rate_per_hour: float, burst: Optional[float] = None,
+                cost: float = 1) -> Tuple[bool, float]:
+        if rate_per_hour <= 0:
+            return True, 0.0
+        burst = burst or rate_per_hour
+        now = time.time()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens, allowed, wait = _take(tokens, updated, now, rate_per_hour, burst, cost)
+            self._buckets[key] = (tokens, now, _full_at(tokens, now, rate_per_hour, burst))
+            if now - self._last_prune >= PRUNE_INTERVAL:
+                self._last_prune = now
+                for stale in [k for k, bucket in self._buckets.items() if bucket[2] <= now]:
+                    del self._buckets[stale]
+        return allowed, wait
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """
+    Buckets in an embedded SQLite database (WAL mode).
+
+    Every process of every service on the host that opens the same file
+    shares the buckets; a bucket is read and updated in one immediate
+    transaction, so concurrent requests never spend the same token.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._last_prune = 0.0
+
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            ' key TEXT PRIMARY KEY,'
+            ' tokens REAL NOT NULL,'
+            ' updated REAL NOT NULL,'
+            ' full_at REAL NOT NULL)'
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str, rate_per_hour: float, burst: Optional[float] = None,
+                cost: float = 1) -> Tuple[bool, float]:
+        if rate_per_hour <= 0:
+            return True, 0.0
+        burst = burst or rate_per_hour
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens, allowed, wait = _take(tokens, updated, now, rate_per_hour, burst, cost)
+            conn.execute(
+                'INSERT INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)'
+                ' ON CONFLICT(key) DO UPDATE SET'
+                ' tokens = excluded.tokens, updated = excluded.updated, full_at = excluded.full_at',
+                (key, tokens, now, _full_at(tokens, now, rate_per_hour, burst))
+            )
+            if now - self._last_prune >= PRUNE_INTERVAL:
+                self._last_prune = now
+                conn.execute('DELETE FROM buckets WHERE full_at <= ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, wait
+
+    def reset(self, key: str) -> None:
+        self._conn().execute('DELETE FROM buckets WHERE key = ?', (key,))
+
+
+def create_rate_limiter(backend: str = 'sqlite', path: Optional[str] = None) -> RateLimiter:
+    """
+    Create the rate limiter selected by RATE_LIMIT_STORE.
+
+    Args:
+        backend: 'sqlite' (shared by all processes on the host) or 'memory'
+        path: SQLite database file (sqlite only)
+    """
+    if backend == 'memory':
+        return MemoryRateLimiter()
+    if backend == 'sqlite':
+        return SQLiteRateLimiter(path)
+    raise ValueError(f"Unknown rate limit store: {backend}")
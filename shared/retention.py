@@ -0,0 +1,231 @@
+"""Background retention management for service storage folders.
+
+Removes files older than a per-directory TTL and, when a disk quota is
+configured, evicts the least recently used files until the managed folders
+fit within it again. Hard links to the same content share their size and
+are evicted together: removing only some of them frees nothing.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionManager:
+    """Periodically sweeps folders, applying TTLs and an LRU disk quota."""
+
+    def __init__(
+        self,
+        policies: Dict[str, int],
+        quota_bytes: Optional[int] = None,
+        interval: int = 300,
+        on_evict: Optional[Callable[[str], None]] = None,
+        on_sweep: Optional[Callable[[], None]] = None,
+        protect: Optional[Callable[[str], bool]] = None,
+    ):
+        """
+        Initialize the retention manager.
+
+        Args:
+            policies: Mapping of folder path to TTL in seconds
+            quota_bytes: Maximum total size of all managed folders (None disables)
+            interval: Seconds between background sweeps
+            on_evict: Called with the path of every removed file
+            on_sweep: Called after every sweep, e.g. to prune in-memory metadata
+            protect: Returns True for paths (files, and folders that would be
+                pruned once empty) that must not be removed yet
+        """
+        self.policies = {os.path.abspath(path): ttl for path, ttl in policies.items()}
+        self.quota_bytes = quota_bytes
+        self.interval = interval
+        self.on_evict = on_evict
+        self.on_sweep = on_sweep
+        self.protect = protect
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            'sweeps': 0,
+            'filesRemoved': 0,
+            'removeFailures': 0,
+            'bytesReclaimed': 0,
+            'bytesReclaimedTtl': 0,
+            'bytesReclaimedQuota': 0,
+            'currentBytes': 0,
+            'lastSweepAt': None,
+            'lastSweepSeconds': 0.0,
+            'lastError': None,
+        }
+
+    def start(self) -> None:
+        """Start the background sweeper thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='retention-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background sweeper thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> dict:
+        """Return a snapshot of retention metrics."""
+        with self._lock:
+            return dict(self._stats)
+
+    def sweep(self) -> dict:
+        """
+        Run a single retention pass over all managed folders.
+
+        Returns:
+            Dictionary with the files and bytes removed during this pass
+        """
+        started = time.monotonic()
+        now = time.time()
+        removed = 0
+        reclaimed_ttl = 0
+        reclaimed_quota = 0
+
+        entries = []
+        for root, ttl in self.policies.items():
+            entries.extend((entry, ttl) for entry in self._scan(root))
+
+        # Hard links to the same inode are counted, and evicted, as one unit
+        units = {}
+        for entry, ttl in entries:
+            if ttl and now - entry['lastUsed'] > ttl and not self._is_protected(entry['path']):
+                freed = self._remove(entry['path'])
+                if freed is not None:
+                    reclaimed_ttl += freed
+                    removed += 1
+                continue
+            units.setdefault(entry['inode'], []).append(entry)
+        total_bytes = sum(unit[0]['size'] for unit in units.values())
+
+        if self.quota_bytes is not None and total_bytes > self.quota_bytes:
+            for unit in sorted(units.values(), key=lambda u: max(e['lastUsed'] for e in u)):
+                if total_bytes <= self.quota_bytes:
+                    break
+                # Links outside the managed folders would keep the content alive
+                if unit[0]['links'] > len(unit):
+                    continue
+                if any(self._is_protected(entry['path']) for entry in unit):
+                    continue
+                for entry in unit:
+                    freed = self._remove(entry['path'])
+                    if freed is not None:
+                        reclaimed_quota += freed
+                        total_bytes -= freed
+                        removed += 1
+
+        for root in self.policies:
+            self._prune_empty_dirs(root)
+
+        if self.on_sweep:
+            self.on_sweep()
+
+        with self._lock:
+            self._stats['sweeps'] += 1
+            self._stats['filesRemoved'] += removed
+            self._stats['bytesReclaimed'] += reclaimed_ttl + reclaimed_quota
+            self._stats['bytesReclaimedTtl'] += reclaimed_ttl
+            self._stats['bytesReclaimedQuota'] += reclaimed_quota
+            self._stats['currentBytes'] = total_bytes
+            self._stats['lastSweepAt'] = now
+            self._stats['lastSweepSeconds'] = round(time.monotonic() - started, 4)
+
+        return {
+            'filesRemoved': removed,
+            'bytesReclaimed': reclaimed_ttl + reclaimed_quota,
+            'currentBytes': total_bytes,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                with self._lock:
+                    self._stats['lastError'] = str(e)
+
+    def _scan(self, root: str) -> List[dict]:
+        """Collect file entries under root, skipping hidden files and folders."""
+        entries = []
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for item in it:
+                        if item.name.startswith('.'):
+                            continue
+                        try:
+                            if item.is_dir(follow_symlinks=False):
+                                stack.append(item.path)
+                            elif item.is_file(follow_symlinks=False):
+                                st = item.stat(follow_symlinks=False)
+                                if not st.st_ino:
+                                    # Windows directory listings leave out inode and link count
+                                    st = os.stat(item.path, follow_symlinks=False)
+                                entries.append({
+                                    'path': item.path,
+                                    'size': st.st_size,
+                                    'links': st.st_nlink,
+                                    'inode': (st.st_dev, st.st_ino),
+                                    'lastUsed': max(st.st_atime, st.st_mtime),
+                                })
+                        except FileNotFoundError:
+                            continue
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def _is_protected(self, path: str) -> bool:
+        return bool(self.protect and self.protect(path))
+
+    def _remove(self, path: str) -> Optional[int]:
+        """
+        Remove a file.
+
+        Returns:
+            Bytes freed (0 while other hard links remain), None if it was
+            already gone or could not be removed
+        """
+        try:
+            # Link count as of now: links may have been added or removed since the scan
+            st = os.stat(path, follow_symlinks=False)
+            os.remove(path)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            # One file that cannot be removed must not stop the sweep
+            logger.warning("Retention could not remove %s: %s", path, e)
+            with self._lock:
+                self._stats['removeFailures'] += 1
+                self._stats['lastError'] = f"{path}: {e}"
+            return None
+        if self.on_evict:
+            self.on_evict(path)
+        return st.st_size if st.st_nlink <= 1 else 0
+
+    def _prune_empty_dirs(self, root: str) -> None:
+        """Remove empty unprotected subdirectories below root (root itself is kept)."""
+        for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+            if dirpath == root:
+                continue
+            if any(part.startswith('.') for part in os.path.relpath(dirpath, root).split(os.sep)):
+                continue
+            if self._is_protected(dirpath):
+                continue
+            try:
+                if not os.listdir(dirpath):
+                    os.rmdir(dirpath)
+            except OSError:
+                continue
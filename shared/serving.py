@@ -0,0 +1,166 @@
+"""Production serving of the services.
+
+scripts/serve.py runs each service under gunicorn with gunicorn_conf.py:
+pre-forked worker processes, each handling requests on a pool of threads
+(gthread), recycled after a number of requests. On Windows, where gunicorn
+does not run, a service is served by waitress in a single process.
+
+Settings come from the environment. A variable prefixed with the service
+name (``CONVERSION_WEB_CONCURRENCY``) wins over the unprefixed one
+(``WEB_CONCURRENCY``), which wins over the service default.
+
+Services register what must happen before a worker exits with
+on_shutdown(); the conversion service drains its running jobs there. A
+worker that should be replaced (the conversion service after
+MAX_JOBS_PER_WORKER jobs) calls request_recycle(), which only works when a
+gunicorn master is there to start its replacement.
+"""
+import os
+import signal
+import threading
+from typing import Callable, Dict, List, Mapping, Optional
+
+from .constants import CONVERSION_TIMEOUT
+
+SERVICES = ('upload', 'conversion', 'download')
+
+
+def _default_workers() -> int:
+    return min(2 * (os.cpu_count() or 1) + 1, 8)
+
+
+# Defaults per service; the conversion service runs CONVERSION_WORKERS jobs in
+# each of its workers, keeps a thread per open status stream (up to
+# MAX_STATUS_STREAMS, see its app), and needs the time of a whole job to drain.
+SERVICE_DEFAULTS: Dict[str, Dict[str, Callable[[], int]]] = {
+    'upload': {
+        'port': lambda: 5001,
+        'workers': _default_workers,
+        'threads': lambda: 8,
+        'max_requests': lambda: 1000,
+        'graceful_timeout': lambda: 30,
+    },
+    'conversion': {
+        'port': lambda: 5002,
+        'workers': lambda: 2,
+        'threads': lambda: 64,
+        'max_requests': lambda: 10000,
+        'graceful_timeout': lambda: CONVERSION_TIMEOUT + 30,
+    },
+    'download': {
+        'port': lambda: 5003,
+        'workers': _default_workers,
+        'threads': lambda: 8,
+        'max_requests': lambda: 1000,
+        'graceful_timeout': lambda: 30,
+    },
+}
+
+# Setting -> (environment variable, minimum)
+SETTINGS = {
+    'port': ('PORT', 1),
+    'workers': ('WEB_CONCURRENCY', 1),
+    'threads': ('WEB_THREADS', 1),
+    'max_requests': ('MAX_REQUESTS_PER_WORKER', 0),
+    'max_requests_jitter': ('MAX_REQUESTS_JITTER', 0),
+    'graceful_timeout': ('GRACEFUL_TIMEOUT', 1),
+    'timeout': ('WORKER_TIMEOUT', 1),
+    'keepalive': ('KEEPALIVE', 0),
+}
+
+
+def server_settings(service: str, environ: Optional[Mapping[str, str]] = None) -> Dict[str, int]:
+    """
+    Server settings of a service from the environment.
+
+    Raises:
+        ValueError: Unknown service, or a setting that is not a number or out of range
+    """
+    if service not in SERVICE_DEFAULTS:
+        raise ValueError(f"Unknown service {service!r}; expected one of {', '.join(SERVICES)}")
+    environ = os.environ if environ is None else environ
+    settings = {}
+    for name, (variable, minimum) in SETTINGS.items():
+        prefixed = f"{service.upper()}_{variable}"
+        raw = environ.get(prefixed) or environ.get(variable)
+        if not raw:
+            continue
+        try:
+            value = int(raw)
+        except ValueError:
+            raise ValueError(f"{prefixed} / {variable} must be an integer, got {raw!r}") from None
+        if value < minimum:
+            raise ValueError(f"{prefixed} / {variable} must be at least {minimum}, got {value}")
+        settings[name] = value
+
+    for name, default in SERVICE_DEFAULTS[service].items():
+        settings.setdefault(name, default())
+    settings.setdefault('max_requests_jitter', settings['max_requests'] // 10)
+    # A worker draining its jobs no longer sends heartbeats; the master must not kill it first
+    settings.setdefault('timeout', settings['graceful_timeout'] + 30)
+    settings.setdefault('keepalive', 5)
+
+    if settings['max_requests_jitter'] > settings['max_requests']:
+        raise ValueError('MAX_REQUESTS_JITTER must not exceed MAX_REQUESTS_PER_WORKER')
+    if settings['timeout'] < settings['graceful_timeout']:
+        raise ValueError('WORKER_TIMEOUT must be at least GRACEFUL_TIMEOUT, or draining workers get killed')
+    return settings
+
+
+_lock = threading.Lock()
+_shutdown_callbacks: List[Callable[[float], None]] = []
+_shutdown_done = threading.Event()
+_shutdown_started = False
+_supervised = False
+
+
+def on_shutdown(callback: Callable[[float], None]) -> None:
+    """Register callback(timeout) to run before the worker process exits."""
+    with _lock:
+        _shutdown_callbacks.append(callback)
+
+
+def shutdown(timeout: float) -> None:
+    """
+    Run the shutdown callbacks (once per process, in registration order).
+    Later calls wait for the first one to finish.
+    """
+    global _shutdown_started
+    with _lock:
+        first = not _shutdown_started
+        _shutdown_started = True
+        callbacks = list(_shutdown_callbacks)
+    if not first:
+        _shutdown_done.wait(timeout)
+        return
+    try:
+        for callback in callbacks:
+            try:
+                callback(timeout)
+            except Exception:
+                pass
+    finally:
+        _shutdown_done.set()
+
+
+def mark_supervised() -> None:
+    """Record that a process manager replaces this worker when it exits."""
+    global _supervised
+    _supervised = True
+
+
+def is_supervised() -> bool:
+    return _supervised
+
+
+def request_recycle() -> bool:
+    """
+    Ask for this worker to be replaced: it finishes its requests, drains and
+    exits, and the gunicorn master starts a fresh one. Returns False (and
+    does nothing) without a master.
+    """
+    if not _supervised:
+        return False
+    # SIGTERM is a gunicorn worker's graceful exit
+    os.kill(os.getpid(), signal.SIGTERM)
+    return True
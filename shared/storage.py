@@ -1,16 +1,91 @@
 """Storage backend abstraction for local and S3 storage."""
+import hashlib
+import io
+import json
+import mmap
 import os
+import shutil
+import threading
+import time
+import uuid
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
 
 try:
     import boto3
+    from botocore.config import Config
     from botocore.exceptions import ClientError
     S3_AVAILABLE = True
 except ImportError:
     S3_AVAILABLE = False
 
+# Read-ahead for streaming reads and part size for S3 multipart uploads
+STREAM_BUFFER_SIZE = 1024 * 1024  # 1MB
+S3_MULTIPART_PART_SIZE = 8 * 1024 * 1024  # 8MB (S3 minimum is 5MB)
+
+# Concurrency of bulk operations (also the S3 connection pool size)
+BULK_MAX_WORKERS = 16
+S3_DELETE_BATCH_SIZE = 1000  # S3 DeleteObjects limit
+
+# Temp files of the read-through cache older than this were left by a failed
+# fetch or a process that died (a running fetch keeps writing to its file)
+CACHE_STALE_SECONDS = 24 * 60 * 60
+
+_bulk_executor = None
+_shared_s3_clients = {}
+_shared_lock = threading.Lock()
+
+
+def _get_bulk_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by all bulk storage operations in the process."""
+    global _bulk_executor
+    with _shared_lock:
+        if _bulk_executor is None:
+            _bulk_executor = ThreadPoolExecutor(max_workers=BULK_MAX_WORKERS, thread_name_prefix='storage-bulk')
+        return _bulk_executor
+
+
+def _get_shared_s3_client(region: str, endpoint_url: Optional[str]):
+    """
+    Return a process-wide S3 client for the given region and endpoint.
+    
+    boto3 clients are thread-safe, so one client with a connection pool sized
+    for bulk operations is reused by every S3StorageBackend instance.
+    """
+    cache_key = (region, endpoint_url)
+    with _shared_lock:
+        client = _shared_s3_clients.get(cache_key)
+        if client is None:
+            client = boto3.client(
+                's3',
+                region_name=region,
+                endpoint_url=endpoint_url,
+                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                config=Config(max_pool_connections=BULK_MAX_WORKERS)
+            )
+            _shared_s3_clients[cache_key] = client
+        return client
+
+
+def map_file(path) -> BinaryIO:
+    """
+    Memory-map a file read-only.
+    
+    The returned object is both a buffer and a seekable file, so it can be
+    handed to parsers without copying; pages are read lazily by the OS.
+    Empty files cannot be mapped and come back as an empty BytesIO.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return io.BytesIO()
+        # The mapping stays valid after the descriptor is closed
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
 
 class StorageBackend(ABC):
     """Abstract base class for storage backends."""
@@ -34,6 +109,138 @@ class StorageBackend(ABC):
     def exists(self, key: str) -> bool:
         """Check if key exists in storage."""
         pass
+    
+    def get_etag(self, key: str) -> Optional[str]:
+        """
+        Return an opaque version tag that changes whenever the object changes.
+        
+        Raises FileNotFoundError if the key does not exist. Backends without
+        cheap version information return None.
+        """
+        if not self.exists(key):
+            raise FileNotFoundError(f"Key not found: {key}")
+        return None
+    
+    def open_read(self, key: str) -> BinaryIO:
+        """
+        Open a stored object for streaming reads.
+        
+        The default implementation buffers the whole object; backends
+        override it to read incrementally.
+        """
+        return io.BytesIO(self.load(key))
+    
+    def open_write(self, key: str) -> BinaryIO:
+        """
+        Open a stored object for streaming writes.
+        
+        The object becomes visible when the returned file is closed. Closing
+        it from a ``with`` block that raised discards the partial object.
+        """
+        return _BufferedSaveWriter(self, key)
+    
+    def put_file(self, key: str, path: str) -> str:
+        """Store the contents of a local file (left in place) and return the storage path."""
+        with open(path, 'rb') as src, self.open_write(key) as dst:
+            shutil.copyfileobj(src, dst, STREAM_BUFFER_SIZE)
+        return self.storage_path(key)
+    
+    def storage_path(self, key: str) -> str:
+        """Location of key as reported by save()."""
+        return key
+    
+    def save_many(self, items: Dict[str, bytes]) -> Dict[str, str]:
+        """Save several objects concurrently; returns key -> storage path."""
+        executor = _get_bulk_executor()
+        futures = {key: executor.submit(self.save, key, data) for key, data in items.items()}
+        return {key: future.result() for key, future in futures.items()}
+    
+    def load_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """Load several objects concurrently; keys that do not exist are omitted."""
+        executor = _get_bulk_executor()
+        futures = {key: executor.submit(self.load, key) for key in set(keys)}
+        result = {}
+        for key, future in futures.items():
+            try:
+                result[key] = future.result()
+            except FileNotFoundError:
+                continue
+        return result
+    
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Delete several objects concurrently."""
+        executor = _get_bulk_executor()
+        for future in [executor.submit(self.delete, key) for key in set(keys)]:
+            future.result()
+    
+    def exists_many(self, keys: Iterable[str]) -> Dict[str, bool]:
+        """Check several keys concurrently; returns key -> exists."""
+        executor = _get_bulk_executor()
+        futures = {key: executor.submit(self.exists, key) for key in set(keys)}
+        return {key: future.result() for key, future in futures.items()}
+
+
+class _BufferedSaveWriter(io.BytesIO):
+    """Fallback writer that collects data in memory and saves it on close."""
+    
+    def __init__(self, backend: StorageBackend, key: str):
+        super().__init__()
+        self._backend = backend
+        self._key = key
+        self._aborted = False
+    
+    def abort(self) -> None:
+        """Discard everything written so far."""
+        self._aborted = True
+        super().close()
+    
+    def close(self) -> None:
+        if not self.closed and not self._aborted:
+            self._backend.save(self._key, self.getvalue())
+        super().close()
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False
+
+
+class _AtomicFileWriter(io.RawIOBase):
+    """Writes to a temporary sibling file and renames it into place on close."""
+    
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._path = path
+        self._tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self._file = open(self._tmp_path, 'wb')
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        return self._file.write(data)
+    
+    def abort(self) -> None:
+        """Discard the partial file."""
+        if not self._file.closed:
+            self._file.close()
+            os.remove(self._tmp_path)
+        super().close()
+    
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+            os.replace(self._tmp_path, self._path)
+        super().close()
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False
 
 
 class LocalStorageBackend(StorageBackend):
@@ -46,7 +253,10 @@ class LocalStorageBackend(StorageBackend):
     def save(self, key: str, data: bytes) -> str:
         file_path = self.base_path / key
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_bytes(data)
+        # Write to a sibling temp file and rename so readers never see partial data
+        tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, file_path)
         return str(file_path)
     
     def load(self, key: str) -> bytes:
@@ -60,22 +270,55 @@ class LocalStorageBackend(StorageBackend):
     
     def exists(self, key: str) -> bool:
         return (self.base_path / key).exists()
+    
+    def get_etag(self, key: str) -> Optional[str]:
+        st = (self.base_path / key).stat()
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    
+    def open_read(self, key: str) -> BinaryIO:
+        return open(self.base_path / key, 'rb')
+    
+    def load_mmap(self, key: str) -> BinaryIO:
+        """Zero-copy alternative to load(): a read-only memory map of the object."""
+        return map_file(self.base_path / key)
+    
+    def storage_path(self, key: str) -> str:
+        return str(self.base_path / key)
+    
+    def local_path(self, key: str) -> str:
+        """Path of the file holding key; raises FileNotFoundError if it does not exist."""
+        file_path = self.base_path / key
+        if not file_path.is_file():
+            raise FileNotFoundError(f"Key not found: {key}")
+        return str(file_path)
+    
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        """Path of the file holding key for the duration of the block (see CachedStorageBackend)."""
+        yield self.local_path(key)
+    
+    def open_write(self, key: str) -> BinaryIO:
+        return _AtomicFileWriter(self.base_path / key)
 
 
 class S3StorageBackend(StorageBackend):
     """Amazon S3 storage backend."""
     
-    def __init__(self):
+    def __init__(self, bucket: Optional[str] = None, client=None):
+        """
+        Args:
+            bucket: Bucket name (defaults to S3_BUCKET)
+            client: Preconfigured boto3 S3 client, e.g. for a local S3 stand-in
+        """
         if not S3_AVAILABLE:
             raise ImportError("boto3 is required for S3 storage")
         
-        self.s3_client = boto3.client(
-            's3',
-            region_name=os.getenv('S3_REGION', 'us-east-1'),
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
+        # S3_ENDPOINT_URL points the client at an S3-compatible server such as MinIO
+        self.s3_client = client or _get_shared_s3_client(
+            os.getenv('S3_REGION', 'us-east-1'),
+            os.getenv('S3_ENDPOINT_URL') or None
         )
-        self.bucket = os.getenv('S3_BUCKET')
+        self.bucket = bucket or os.getenv('S3_BUCKET')
         
         if not self.bucket:
             raise ValueError("S3_BUCKET environment variable is required")
@@ -86,8 +329,16 @@ class S3StorageBackend(StorageBackend):
             Key=key,
             Body=data
         )
+        return self.storage_path(key)
+    
+    def storage_path(self, key: str) -> str:
         return f"s3://{self.bucket}/{key}"
     
+    def put_file(self, key: str, path: str) -> str:
+        # Managed transfer: large files are sent as concurrent multipart parts
+        self.s3_client.upload_file(path, self.bucket, key)
+        return self.storage_path(key)
+    
     def load(self, key: str) -> bytes:
         try:
             response = self.s3_client.get_object(
@@ -112,23 +363,504 @@ class S3StorageBackend(StorageBackend):
             return True
         except ClientError:
             return False
+    
+    def get_etag(self, key: str) -> Optional[str]:
+        try:
+            return self.s3_client.head_object(Bucket=self.bucket, Key=key)['ETag']
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(f"Key not found: {key}")
+            raise
+    
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Delete objects with multi-object DeleteObjects requests (1000 keys each)."""
+        keys = sorted(set(keys))
+        errors: List[dict] = []
+        for start in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+            batch = keys[start:start + S3_DELETE_BATCH_SIZE]
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+            errors.extend(response.get('Errors', []))
+        if errors:
+            failed = ', '.join(f"{e['Key']} ({e['Code']})" for e in errors[:10])
+            raise IOError(f"Failed to delete {len(errors)} object(s): {failed}")
+    
+    def open_read(self, key: str) -> BinaryIO:
+        return io.BufferedReader(_S3ObjectReader(self.s3_client, self.bucket, key), STREAM_BUFFER_SIZE)
+    
+    def open_write(self, key: str) -> BinaryIO:
+        return _S3MultipartWriter(self.s3_client, self.bucket, key)
+
+
+class _S3ObjectReader(io.RawIOBase):
+    """Seekable reader that streams an S3 object with ranged GETs."""
+    
+    def __init__(self, client, bucket: str, key: str):
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        try:
+            head = client.head_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(f"Key not found: {key}")
+            raise
+        self.size = head['ContentLength']
+        self.etag = head.get('ETag')
+        self._pos = 0
+        self._body = None
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset != self._pos:
+            self._close_body()
+            self._pos = max(0, offset)
+        return self._pos
+    
+    def readinto(self, buffer) -> int:
+        if self._pos >= self.size:
+            return 0
+        if self._body is None:
+            # One open-ended ranged GET serves all sequential reads until the next seek
+            params = {'Bucket': self._bucket, 'Key': self._key, 'Range': f"bytes={self._pos}-"}
+            if self.etag:
+                # Fail instead of mixing bytes from two versions of the object
+                params['IfMatch'] = self.etag
+            response = self._client.get_object(**params)
+            self._body = response['Body']
+        data = self._body.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        self._pos += n
+        return n
+    
+    def _close_body(self) -> None:
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+    
+    def close(self) -> None:
+        self._close_body()
+        super().close()
 
 
-def get_storage_backend(backend_type: Optional[str] = None) -> StorageBackend:
+class _S3MultipartWriter(io.RawIOBase):
+    """
+    Streams writes to S3 using a multipart upload.
+    
+    Only one part is buffered at a time; objects smaller than a single part
+    are sent with a plain ``put_object`` on close.
+    """
+    
+    def __init__(self, client, bucket: str, key: str, part_size: int = S3_MULTIPART_PART_SIZE):
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._part_size = part_size
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        while len(self._buffer) >= self._part_size:
+            self._upload_part(bytes(self._buffer[:self._part_size]))
+            del self._buffer[:self._part_size]
+        return len(data)
+    
+    def _upload_part(self, chunk: bytes) -> None:
+        if self._upload_id is None:
+            response = self._client.create_multipart_upload(Bucket=self._bucket, Key=self._key)
+            self._upload_id = response['UploadId']
+        part_number = len(self._parts) + 1
+        response = self._client.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=chunk
+        )
+        self._parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+    
+    def abort(self) -> None:
+        """Abort the upload; nothing becomes visible."""
+        if self.closed:
+            return
+        if self._upload_id is not None:
+            self._client.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=self._upload_id
+            )
+        self._buffer = bytearray()
+        super().close()
+    
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                self._client.put_object(Bucket=self._bucket, Key=self._key, Body=bytes(self._buffer))
+            else:
+                if self._buffer:
+                    self._upload_part(bytes(self._buffer))
+                self._client.complete_multipart_upload(
+                    Bucket=self._bucket,
+                    Key=self._key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={'Parts': self._parts}
+                )
+        except Exception:
+            self.abort()
+            raise
+        self._buffer = bytearray()
+        super().close()
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False
+
+
+class CachedStorageBackend(StorageBackend):
+    """
+    Read-through local disk cache in front of any StorageBackend.
+    
+    Objects are fetched once into ``cache_dir`` and served from there until
+    they are evicted (least recently used first, bounded by ``max_bytes``) or
+    the remote version tag no longer matches. Concurrent misses for the same
+    key share a single fetch. Writes and deletes go straight to the wrapped
+    backend and invalidate the cached copy.
+    
+    Every process using ``cache_dir`` evicts on its own, so a path returned by
+    ``local_path`` can disappear at any time; ``local_copy`` hands out a hard
+    link that stays in place until the caller is done with it.
+    """
+    
+    def __init__(self, backend: StorageBackend, cache_dir: str,
+                 max_bytes: int = 1024 * 1024 * 1024, revalidate_after: float = 30.0):
+        """
+        Args:
+            backend: Backend holding the authoritative copies
+            cache_dir: Local folder for cached objects
+            max_bytes: Maximum total size of cached objects
+            revalidate_after: Seconds a cached entry is trusted before its
+                version tag is checked against the backend again
+        """
+        self.backend = backend
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> entry dict, least recently used first
+        self._inflight = {}  # key -> threading.Event for a fetch in progress
+        self._total_bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'revalidations': 0}
+        # Hard links handed out by local_copy, outside the index
+        self._pinned_dir = self.cache_dir / '.pinned'
+        self._pinned_dir.mkdir(exist_ok=True)
+        self._load_index()
+    
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    def _remove_stale_files(self) -> None:
+        """Delete temp files and hand-outs left behind by failed fetches and dead processes."""
+        cutoff = time.time() - CACHE_STALE_SECONDS
+        pinned = self._pinned_dir.iterdir() if self._pinned_dir.is_dir() else []
+        for path in [*self.cache_dir.glob('*.tmp'), *pinned]:
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+    
+    def _load_index(self) -> None:
+        """Re-adopt entries cached by a previous process (checksummed before first use)."""
+        self._remove_stale_files()
+        entries = []
+        for meta_path in self.cache_dir.glob('*.meta'):
+            data_path = meta_path.with_suffix('')
+            try:
+                entry = json.loads(meta_path.read_text())
+                if data_path.stat().st_size != entry['size']:
+                    raise ValueError('size mismatch')
+            except (OSError, ValueError, KeyError):
+                meta_path.unlink(missing_ok=True)
+                data_path.unlink(missing_ok=True)
+                continue
+            entry.update(path=data_path, validatedAt=0.0, verified=False,
+                         usedAt=data_path.stat().st_atime)
+            entries.append(entry)
+        for entry in sorted(entries, key=lambda e: e['usedAt']):
+            self._entries[entry['key']] = entry
+            self._total_bytes += entry['size']
+        self._evict()
+    
+    def _fetch(self, key: str) -> dict:
+        """Copy an object from the backend into the cache, hashing it on the way."""
+        etag = self.backend.get_etag(key)
+        path = self._entry_path(key)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with self.backend.open_read(key) as src, open(tmp_path, 'wb') as dst:
+                for block in iter(lambda: src.read(STREAM_BUFFER_SIZE), b''):
+                    digest.update(block)
+                    dst.write(block)
+                    size += len(block)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        
+        entry = {'key': key, 'etag': etag, 'size': size, 'sha256': digest.hexdigest()}
+        path.with_suffix('.meta').write_text(json.dumps(entry))
+        entry.update(path=path, validatedAt=time.monotonic(), verified=True, usedAt=time.time())
+        return entry
+    
+    def _is_valid(self, entry: dict) -> bool:
+        """Check a cached entry against its checksum and the backend version tag."""
+        if not entry['verified']:
+            digest = hashlib.sha256()
+            try:
+                with open(entry['path'], 'rb') as f:
+                    for block in iter(lambda: f.read(STREAM_BUFFER_SIZE), b''):
+                        digest.update(block)
+            except FileNotFoundError:
+                return False
+            if digest.hexdigest() != entry['sha256']:
+                return False
+            entry['verified'] = True
+        
+        if time.monotonic() - entry['validatedAt'] > self.revalidate_after:
+            with self._lock:
+                self._stats['revalidations'] += 1
+            if entry['etag'] is None or self.backend.get_etag(entry['key']) != entry['etag']:
+                return False
+            entry['validatedAt'] = time.monotonic()
+        return True
+    
+    def local_path(self, key: str) -> str:
+        """
+        Return the path of a valid local copy of key, fetching it if needed.
+        The file may be evicted at any time; use local_copy to read it later.
+        
+        Raises FileNotFoundError if the key does not exist in the backend.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                event = self._inflight.get(key)
+                if entry is None and event is None:
+                    # This thread fetches; others wait for it
+                    event = self._inflight[key] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+            
+            if entry is not None:
+                if self._is_valid(entry):
+                    with self._lock:
+                        if key in self._entries:
+                            self._entries.move_to_end(key)
+                            self._stats['hits'] += 1
+                    entry['usedAt'] = time.time()
+                    return str(entry['path'])
+                self._invalidate(key)
+                continue
+            
+            if not owner:
+                event.wait()
+                continue
+            
+            try:
+                with self._lock:
+                    self._stats['misses'] += 1
+                entry = self._fetch(key)
+                with self._lock:
+                    self._entries[key] = entry
+                    self._total_bytes += entry['size']
+                    self._evict(keep=key)
+                return str(entry['path'])
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+    
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        """
+        Path of a valid local copy of key that stays in place until the block
+        exits, even if the cache entry is evicted meanwhile: a hard link to the
+        entry, removed afterwards.
+        
+        Raises FileNotFoundError if the key does not exist in the backend.
+        """
+        link = self._pinned_dir / f"{uuid.uuid4().hex}{Path(key).suffix}"
+        for _ in range(3):
+            # Raises FileNotFoundError for a key missing from the backend
+            path = self.local_path(key)
+            try:
+                os.link(path, link)
+                break
+            except FileNotFoundError:
+                # Evicted between the lookup and the link: look it up again
+                self._pinned_dir.mkdir(exist_ok=True)
+        else:
+            raise FileNotFoundError(f"Cached copy of {key} was evicted while pinning it")
+        try:
+            yield str(link)
+        finally:
+            link.unlink(missing_ok=True)
+    
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Drop least recently used entries until the cache fits (lock held)."""
+        evicted = False
+        for key in list(self._entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._drop(key)
+            self._stats['evictions'] += 1
+            evicted = True
+        if evicted:
+            self._remove_stale_files()
+    
+    def _drop(self, key: str) -> None:
+        """Remove an entry and its files (lock held)."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry['size']
+        Path(entry['path']).unlink(missing_ok=True)
+        Path(entry['path']).with_suffix('.meta').unlink(missing_ok=True)
+    
+    def _invalidate(self, key: str) -> None:
+        with self._lock:
+            self._drop(key)
+    
+    def stats(self) -> dict:
+        """Return cache hit/miss counters and current size."""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hitRatio': round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes
+            }
+    
+    def save(self, key: str, data: bytes) -> str:
+        self._invalidate(key)
+        return self.backend.save(key, data)
+    
+    def load(self, key: str) -> bytes:
+        with self.local_copy(key) as path:
+            return Path(path).read_bytes()
+    
+    def delete(self, key: str) -> None:
+        self._invalidate(key)
+        self.backend.delete(key)
+    
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry['validatedAt'] <= self.revalidate_after:
+            return True
+        return self.backend.exists(key)
+    
+    def get_etag(self, key: str) -> Optional[str]:
+        return self.backend.get_etag(key)
+    
+    def storage_path(self, key: str) -> str:
+        return self.backend.storage_path(key)
+    
+    def put_file(self, key: str, path: str) -> str:
+        self._invalidate(key)
+        return self.backend.put_file(key, path)
+    
+    def save_many(self, items: Dict[str, bytes]) -> Dict[str, str]:
+        for key in items:
+            self._invalidate(key)
+        return self.backend.save_many(items)
+    
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = set(keys)
+        for key in keys:
+            self._invalidate(key)
+        self.backend.delete_many(keys)
+    
+    def open_read(self, key: str) -> BinaryIO:
+        # The open file outlives the hand-out and any eviction
+        with self.local_copy(key) as path:
+            return open(path, 'rb')
+    
+    def load_mmap(self, key: str) -> BinaryIO:
+        """Read-only memory map of the local copy of key (see LocalStorageBackend)."""
+        with self.local_copy(key) as path:
+            return map_file(path)
+    
+    def open_write(self, key: str) -> BinaryIO:
+        self._invalidate(key)
+        return self.backend.open_write(key)
+
+
+def get_storage_backend(backend_type: Optional[str] = None,
+                        cache_dir: Optional[str] = None,
+                        asynchronous: bool = False,
+                        base_path: Optional[str] = None):
     """
     Get storage backend instance based on configuration.
     
     Args:
         backend_type: Override backend type ('local' or 's3')
+        cache_dir: Local read-through cache folder for remote backends
+            (defaults to STORAGE_CACHE_DIR; no cache when unset)
+        base_path: Root folder of the local backend
+            (defaults to STORAGE_LOCAL_PATH, then ./data)
+        asynchronous: Return an AsyncStorageBackend for use from asyncio code
     
     Returns:
-        StorageBackend instance
+        StorageBackend instance (AsyncStorageBackend if asynchronous)
     """
     backend = backend_type or os.getenv('STORAGE_BACKEND', 'local')
+    cache_dir = cache_dir or os.getenv('STORAGE_CACHE_DIR')
     
     if backend == 's3':
-        return S3StorageBackend()
+        storage = S3StorageBackend()
+        if cache_dir:
+            storage = CachedStorageBackend(
+                storage,
+                cache_dir,
+                max_bytes=int(os.getenv('STORAGE_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+            )
     elif backend == 'local':
-        return LocalStorageBackend()
+        storage = LocalStorageBackend(base_path or os.getenv('STORAGE_LOCAL_PATH', './data'))
     else:
         raise ValueError(f"Unknown storage backend: {backend}")
+    
+    if asynchronous:
+        from .async_storage import ThreadedAsyncStorageBackend
+        return ThreadedAsyncStorageBackend(storage)
+    return storage
@@ -0,0 +1,283 @@
+"""
+Benchmark the conversion pipeline on the synthetic corpus (pdf_corpus.py).
+
+Every case runs in a fresh Python process, so its peak RSS is its own. The
+stages are timed as the worker runs them, in-process:
+
+- extract: table extraction, with the text fallback when no table is found
+- analyze: table validation and structure analysis
+- write.csv, write.excel, write.json, write.text: each writer on its own
+  (the writers repeat the analysis they need, so it is included)
+- zip: a batch download archive of every output
+
+Each stage's time is the median of --repeat runs, which a single slow or
+lucky run does not move. Results are compared with the baseline
+(benchmark_baseline.json): a stage is a regression when it is slower than its
+baseline by more than the time threshold and by more than minSeconds, and
+peak RSS when it grew by more than the RSS threshold. The exit status is 1
+when anything regressed.
+
+Usage:
+    python benchmark.py                      # run and compare with the baseline
+    python benchmark.py --cases cv,unruled   # only some cases
+    python benchmark.py --update-baseline    # record the results as the new baseline
+
+Baselines depend on the machine: the committed baseline only holds for the
+machine it was recorded on. Regenerate it with --update-baseline on the
+machine that runs the comparisons before trusting a regression; a baseline
+from another environment is reported but never fails the run.
+"""
+import argparse
+import gc
+import json
+import statistics
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Medians of repeated runs on a shared machine still vary by up to about 50%
+# between runs, and by more for stages of a few milliseconds
+DEFAULT_THRESHOLDS = {
+    'time': 0.5,  # fraction slower than the baseline
+    'rss': 0.20,  # fraction more peak memory than the baseline
+    'minSeconds': 0.05  # differences below this are noise
+}
+DEFAULT_REPEAT = 5
+WRITERS = ('csv', 'excel', 'json', 'text')
+
+
+def _peak_rss_mib():
+    """Peak resident set size of this process in MiB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _median_of(repeat, function):
+    """
+    Median duration of repeat calls and the result of the last one. A first,
+    untimed call warms up imports and caches; like timeit, the timed calls run
+    with the garbage collector off, after collecting what earlier calls left.
+    """
+    result = function()
+    durations = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            result = function()
+            durations.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+    return statistics.median(durations), result
+
+
+def run_case(name, repeat):
+    """Benchmark one corpus case in this process and return its results."""
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.join(ROOT, 'services', 'conversion'))
+    from analyzers import analyze_table_structure, validate_table_data
+    from converters import save_tables_to_csv, save_tables_to_excel, save_tables_to_json, save_tables_to_text
+    from extractors import extract_tables_pdfplumber, extract_text_lines
+    from pdf_corpus import write_corpus
+    from shared.storage import STREAM_BUFFER_SIZE, map_file
+
+    writers = {
+        'csv': lambda tables, out, pdf: save_tables_to_csv(tables, out, name),
+        'excel': lambda tables, out, pdf: save_tables_to_excel(tables, out, name),
+        'json': lambda tables, out, pdf: save_tables_to_json(tables, out, name, pdf_path=pdf),
+        'text': lambda tables, out, pdf: save_tables_to_text(tables, out, name, pdf_path=pdf),
+    }
+
+    workdir = tempfile.mkdtemp(prefix='pdf-to-csv-bench-')
+    try:
+        pdf_path = write_corpus(workdir, [name])[name]
+        pages = [0]
+
+        def on_page(page_num, total_pages):
+            pages[0] = total_pages
+
+        def extract():
+            # As the worker does it: memory-mapped, tables first, then the text fallback
+            with map_file(pdf_path) as pdf_data:
+                tables = extract_tables_pdfplumber(pdf_data, on_page)
+                if not tables:
+                    tables = extract_text_lines(pdf_data, on_page)
+            return tables
+
+        def analyze():
+            validate_table_data(tables)
+            return [analyze_table_structure(table) for table in tables]
+
+        stages = {}
+        stages['extract'], tables = _median_of(repeat, extract)
+        stages['analyze'], _ = _median_of(repeat, analyze)
+
+        outputs = []
+        for writer in WRITERS:
+            output_dir = os.path.join(workdir, writer)
+
+            def write():
+                shutil.rmtree(output_dir, ignore_errors=True)
+                os.makedirs(output_dir)
+                return writers[writer](tables, output_dir, pdf_path)
+
+            stages[f"write.{writer}"], paths = _median_of(repeat, write)
+            outputs.extend(paths)
+
+        def archive():
+            # As the download service builds a batch archive
+            with zipfile.ZipFile(os.path.join(workdir, 'batch.zip'), 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for path in outputs:
+                    with open(path, 'rb') as src, zipf.open(os.path.relpath(path, workdir), 'w') as dst:
+                        shutil.copyfileobj(src, dst, STREAM_BUFFER_SIZE)
+
+        stages['zip'], _ = _median_of(repeat, archive)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    rows = sum(len(table) for table in tables)
+    return {
+        'pages': pages[0],
+        'tables': len(tables),
+        'rows': rows,
+        'stages': {stage: round(seconds, 4) for stage, seconds in stages.items()},
+        'pagesPerSecond': round(pages[0] / stages['extract'], 1) if stages['extract'] else None,
+        'rowsPerSecond': {
+            writer: round(rows / stages[f"write.{writer}"]) if stages[f"write.{writer}"] else None
+            for writer in WRITERS
+        },
+        'peakRssMiB': _peak_rss_mib()
+    }
+
+
+def run_isolated(name, repeat):
+    """Benchmark a case in a fresh interpreter, so peak RSS is not shared."""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-case', name, '--repeat', str(repeat)],
+        check=True, stdout=subprocess.PIPE, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def environment():
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'machine': platform.machine()}
+
+
+def compare(results, baseline):
+    """
+    Compare results with a baseline.
+
+    Returns:
+        List of (case, metric, current, baseline, change) regressions
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get('thresholds', {})}
+    regressions = []
+    for case, result in results.items():
+        base = baseline.get('cases', {}).get(case)
+        if not base:
+            continue
+        for stage, seconds in result['stages'].items():
+            base_seconds = base['stages'].get(stage)
+            if base_seconds is None:
+                continue
+            if seconds > base_seconds * (1 + thresholds['time']) and seconds - base_seconds > thresholds['minSeconds']:
+                regressions.append((case, stage, seconds, base_seconds, seconds / base_seconds - 1))
+        rss, base_rss = result.get('peakRssMiB'), base.get('peakRssMiB')
+        if rss and base_rss and rss > base_rss * (1 + thresholds['rss']):
+            regressions.append((case, 'peakRssMiB', rss, base_rss, rss / base_rss - 1))
+    return regressions
+
+
+def print_results(results, baseline):
+    cases = baseline.get('cases', {})
+    for case, result in results.items():
+        print(f"\n{case}: {result['pages']} pages, {result['tables']} tables, {result['rows']} rows, "
+              f"{result['pagesPerSecond']} pages/s, peak RSS {result['peakRssMiB']} MiB")
+        base = cases.get(case, {}).get('stages', {})
+        for stage, seconds in result['stages'].items():
+            line = f"  {stage:<12} {seconds * 1000:9.1f} ms"
+            if base.get(stage):
+                line += f"   baseline {base[stage] * 1000:9.1f} ms  {(seconds / base[stage] - 1) * 100:+6.1f}%"
+            if stage.startswith('write.'):
+                line += f"   {result['rowsPerSecond'][stage[len('write.'):]]} rows/s"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the conversion pipeline on a synthetic corpus.')
+    parser.add_argument('--cases', help='Comma-separated corpus cases (default: all)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Runs per stage; the median is kept')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON file')
+    parser.add_argument('--update-baseline', action='store_true', help='Record the results as the baseline')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.repeat)))
+        return 0
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from pdf_corpus import CORPUS
+    names = args.cases.split(',') if args.cases else list(CORPUS)
+    unknown = [name for name in names if name not in CORPUS]
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(unknown)} (known: {', '.join(CORPUS)})")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    for name in names:
+        print(f"Benchmarking {name}...", flush=True)
+        results[name] = run_isolated(name, args.repeat)
+    print_results(results, baseline)
+
+    if args.update_baseline:
+        # Cases that were not run keep their previous baseline
+        cases = {**baseline.get('cases', {}), **results}
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'environment': environment(),
+                'repeat': args.repeat,
+                'thresholds': baseline.get('thresholds', DEFAULT_THRESHOLDS),
+                'cases': cases
+            }, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("\nNo baseline to compare with; record one with --update-baseline")
+        return 0
+    regressions = compare(results, baseline)
+    if baseline.get('environment') != environment():
+        print(f"\n⚠️ Baseline recorded on {baseline.get('environment')}, not on this machine; "
+              f"{len(regressions)} apparent regression(s) ignored. Regenerate it here with --update-baseline.")
+        return 0
+    if regressions:
+        print("\n❌ Regressions:")
+        for case, metric, current, base, change in regressions:
+            print(f"  {case} {metric}: {current} vs baseline {base} ({change * 100:+.1f}%)")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
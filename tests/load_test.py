@@ -0,0 +1,375 @@
+"""
+Load test of the three services: concurrent users upload a PDF, convert it,
+follow the job until it finishes, download the outputs as a batch ZIP and
+clean up, over and over.
+
+The PDFs come from the synthetic benchmark corpus (pdf_corpus.py), picked by
+weight from --mix. Every upload is made unique by a trailing PDF comment, so
+uploads are not deduplicated and conversions do not hit the table cache;
+--repeat-documents uploads the corpus files as they are. Everything runs against localhost; with --start-services
+the services are launched through scripts/run_services.py (with the
+per-client rate limits raised, so the load is not simply turned away) and
+stopped at the end.
+
+Reported per endpoint: requests, throughput, error rate (with status codes)
+and p50/p95/p99/max latency. "job" is a whole iteration, from the upload to
+the downloaded ZIP.
+
+Usage:
+    python load_test.py --users 8 --duration 60
+    python load_test.py --users 4 --iterations 10 --mix ruled-small:3,cv:1 --status stream
+    python load_test.py --start-services --users 16 --duration 120 --json report.json
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pdf_corpus import CORPUS, generate
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RUN_SERVICES = os.path.join(ROOT, 'scripts', 'run_services.py')
+
+UPLOAD_URL = 'http://localhost:5001'
+CONVERSION_URL = 'http://localhost:5002'
+DOWNLOAD_URL = 'http://localhost:5003'
+
+FINISHED_STATUSES = ('completed', 'error', 'cancelled')
+# Rate limits of services started by this script
+LOAD_TEST_ENV = {
+    'RATE_LIMIT_UPLOADS': '1000000',
+    'RATE_LIMIT_CONVERSIONS': '1000000',
+    'QUEUE_LIMIT_PER_CLIENT': '100000',
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+# Error messages kept per endpoint for the report
+SAMPLE_ERRORS = 5
+
+
+class Recorder:
+    """Latencies and outcomes of the requests made, by endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.sample_errors = defaultdict(list)
+
+    def record(self, endpoint, seconds, status, ok, detail=None):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][str(status)] += 1
+            if not ok:
+                self.errors[endpoint] += 1
+                if detail and len(self.sample_errors[endpoint]) < SAMPLE_ERRORS:
+                    self.sample_errors[endpoint].append(detail)
+
+    def report(self, elapsed):
+        endpoints = {}
+        with self._lock:
+            for endpoint, values in self.latencies.items():
+                values = sorted(values)
+                count = len(values)
+                endpoints[endpoint] = {
+                    'requests': count,
+                    'throughput': round(count / elapsed, 2) if elapsed else None,
+                    'errorRate': round(self.errors[endpoint] / count, 4),
+                    'statuses': dict(self.statuses[endpoint]),
+                    'sampleErrors': list(self.sample_errors[endpoint]),
+                    'p50': round(percentile(values, 0.50) * 1000, 1),
+                    'p95': round(percentile(values, 0.95) * 1000, 1),
+                    'p99': round(percentile(values, 0.99) * 1000, 1),
+                    'max': round(values[-1] * 1000, 1),
+                }
+        return endpoints
+
+
+class IterationFailed(Exception):
+    """A step of an iteration failed; the rest of it is skipped."""
+
+
+class VirtualUser:
+    """Runs upload → convert → follow → batch download → cleanup iterations."""
+
+    def __init__(self, index, args, recorder, documents):
+        self.args = args
+        self.recorder = recorder
+        self.documents = documents
+        self.rng = random.Random(args.seed + index)
+        self.session = requests.Session()
+        self.session.headers['X-Client-Id'] = f"load-test-{index}"
+
+    def call(self, endpoint, method, url, expect=(200,), **kwargs):
+        """Make a timed request and record it; raise IterationFailed on a bad status."""
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=self.args.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.recorder.record(endpoint, time.perf_counter() - started, type(e).__name__, False, str(e))
+            raise IterationFailed(f"{endpoint}: {e}")
+        ok = response.status_code in expect
+        self.recorder.record(
+            endpoint, time.perf_counter() - started, response.status_code, ok, None if ok else response.text[:300]
+        )
+        if not ok:
+            raise IterationFailed(f"{endpoint}: HTTP {response.status_code}")
+        return response
+
+    def pick_document(self):
+        names, weights = zip(*self.args.mix.items())
+        name = self.rng.choices(names, weights)[0]
+        pdf = self.documents[name]
+        if not self.args.repeat_documents:
+            # Readers ignore what follows the end of the file; the hash changes.
+            # Not from the seeded rng: a rerun must not hit the previous run's cache
+            pdf += b"%%load-test %s\n" % uuid.uuid4().hex.encode()
+        return name, pdf
+
+    def run_iteration(self):
+        started = time.perf_counter()
+        name, pdf = self.pick_document()
+        file_id = job_id = None
+        try:
+            response = self.call(
+                'upload', 'POST', f"{self.args.upload_url}/api/upload",
+                files={'file': (f"{name}.pdf", pdf, 'application/pdf')}
+            )
+            file_id = response.json()['data']['fileId']
+
+            response = self.call(
+                'convert', 'POST', f"{self.args.conversion_url}/api/convert",
+                json={'fileIds': [file_id], 'outputFormat': self.args.output_format}
+            )
+            job_id = response.json()['data']['jobId']
+
+            job = self.stream_job(job_id) if self.args.status == 'stream' else self.poll_job(job_id)
+            if job['status'] != 'completed':
+                raise IterationFailed(f"job {job_id} {job['status']}: {job.get('error')}")
+
+            converted = [f['fileId'] for f in job.get('convertedFiles', [])]
+            if converted:
+                self.call(
+                    'download.batch', 'POST', f"{self.args.download_url}/api/download/batch",
+                    json={'fileIds': converted, 'zipName': f"{name}.zip"}
+                )
+            self.recorder.record('job', time.perf_counter() - started, 'completed', True)
+        except IterationFailed as e:
+            self.recorder.record('job', time.perf_counter() - started, 'failed', False, str(e))
+        finally:
+            if self.args.cleanup:
+                self.clean_up(file_id, job_id)
+
+    def poll_job(self, job_id):
+        deadline = time.monotonic() + self.args.job_timeout
+        while time.monotonic() < deadline:
+            job = self.call('status', 'GET', f"{self.args.conversion_url}/api/status/{job_id}").json()['data']
+            if job['status'] in FINISHED_STATUSES:
+                return job
+            time.sleep(self.args.poll_interval)
+        raise IterationFailed(f"job {job_id} did not finish in {self.args.job_timeout}s")
+
+    def stream_job(self, job_id):
+        """Follow the job's event stream; its latency is the time until the job finished."""
+        url = f"{self.args.conversion_url}/api/status/{job_id}/stream"
+        started = time.perf_counter()
+        try:
+            with self.session.get(url, stream=True, timeout=self.args.job_timeout) as response:
+                if response.status_code != 200:
+                    self.recorder.record('status.stream', time.perf_counter() - started, response.status_code, False)
+                    raise IterationFailed(f"status.stream: HTTP {response.status_code}")
+                event = None
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith('event:'):
+                        event = line[len('event:'):].strip()
+                    elif line.startswith('data:') and event == 'status':
+                        job = json.loads(line[len('data:'):])
+                        if job['status'] in FINISHED_STATUSES:
+                            self.recorder.record('status.stream', time.perf_counter() - started, 200, True)
+                            return job
+        except requests.RequestException as e:
+            self.recorder.record('status.stream', time.perf_counter() - started, type(e).__name__, False, str(e))
+            raise IterationFailed(f"status.stream: {e}")
+        self.recorder.record('status.stream', time.perf_counter() - started, 'closed', False)
+        raise IterationFailed(f"status.stream: closed before job {job_id} finished")
+
+    def clean_up(self, file_id, job_id):
+        try:
+            if job_id:
+                self.call('cleanup.outputs', 'DELETE', f"{self.args.download_url}/api/cleanup/{job_id}",
+                          expect=(200, 404))
+            if file_id:
+                self.call('cleanup.upload', 'DELETE', f"{self.args.upload_url}/api/files/{file_id}",
+                          expect=(200, 404))
+        except IterationFailed:
+            pass
+
+    def run(self, stop_at, iterations):
+        done = 0
+        while (iterations is None or done < iterations) and (stop_at is None or time.monotonic() < stop_at):
+            self.run_iteration()
+            done += 1
+
+
+def parse_mix(value):
+    """Parse 'case:weight,case:weight' (weight defaults to 1)."""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.strip().partition(':')
+        if name not in CORPUS:
+            raise argparse.ArgumentTypeError(f"Unknown case {name} (known: {', '.join(CORPUS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def wait_healthy(urls, timeout):
+    """Wait until every service answers its health check."""
+    deadline = time.monotonic() + timeout
+    pending = list(urls)
+    while pending:
+        url = pending[0]
+        try:
+            if requests.get(f"{url}/api/health", timeout=2).status_code == 200:
+                pending.pop(0)
+                continue
+        except requests.RequestException:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{url} is not healthy after {timeout}s")
+        time.sleep(0.5)
+
+
+def start_services(extra_args):
+    """Launch the services through scripts/run_services.py, in a process group of their own."""
+    env = {**os.environ, **LOAD_TEST_ENV}
+    if os.name == 'nt':
+        kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        kwargs = {'start_new_session': True}
+    return subprocess.Popen([sys.executable, RUN_SERVICES] + extra_args, env=env, **kwargs)
+
+
+def stop_services(process):
+    """Stop the services the way Ctrl+C in their terminal would."""
+    if os.name == 'nt':
+        process.send_signal(signal.CTRL_BREAK_EVENT)
+    else:
+        os.killpg(process.pid, signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        if os.name == 'nt':
+            process.kill()
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+
+
+def print_report(report):
+    print(f"\n{report['users']} users, {report['elapsed']}s, {report['iterations']} iterations, "
+          f"mix {report['mix']}")
+    header = f"{'endpoint':<16}{'requests':>9}{'req/s':>9}{'errors':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print('-' * len(header))
+    for endpoint, stats in sorted(report['endpoints'].items()):
+        print(f"{endpoint:<16}{stats['requests']:>9}{stats['throughput']:>9}{stats['errorRate'] * 100:>8.1f}%"
+              f"{stats['p50']:>10}{stats['p95']:>10}{stats['p99']:>10}{stats['max']:>10}")
+    for endpoint, stats in sorted(report['endpoints'].items()):
+        if stats['errorRate']:
+            print(f"  {endpoint} statuses: {stats['statuses']}")
+            for error in stats['sampleErrors']:
+                print(f"    {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the upload, conversion and download services.')
+    parser.add_argument('--users', type=int, default=4, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, help='Seconds to run (default: 30 unless --iterations)')
+    parser.add_argument('--iterations', type=int, help='Iterations per user')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('ruled-small:4,ruled-multi:2,unruled:1,cv:2'),
+                        help='Weighted corpus cases, e.g. ruled-small:3,cv:1')
+    parser.add_argument('--status', choices=('poll', 'stream'), default='poll',
+                        help='Follow jobs by polling the status or through its event stream')
+    parser.add_argument('--poll-interval', type=float, default=0.5, help='Seconds between status polls')
+    parser.add_argument('--output-format', default='csv', choices=('csv', 'excel', 'json', 'text'))
+    parser.add_argument('--job-timeout', type=float, default=300, help='Seconds a job may take')
+    parser.add_argument('--timeout', type=float, default=60, help='Seconds a request may take')
+    parser.add_argument('--no-cleanup', dest='cleanup', action='store_false',
+                        help='Keep uploads and outputs instead of deleting them after each iteration')
+    parser.add_argument('--repeat-documents', action='store_true',
+                        help='Upload the corpus files unchanged, so deduplication and the table cache apply')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the document choice')
+    parser.add_argument('--upload-url', default=UPLOAD_URL)
+    parser.add_argument('--conversion-url', default=CONVERSION_URL)
+    parser.add_argument('--download-url', default=DOWNLOAD_URL)
+    parser.add_argument('--start-services', action='store_true',
+                        help='Launch the services with scripts/run_services.py for the run')
+    parser.add_argument('--services-arg', action='append', default=[],
+                        help='Extra argument for run_services.py (repeatable)')
+    parser.add_argument('--json', help='Also write the report to this JSON file')
+    args = parser.parse_args()
+
+    iterations = args.iterations
+    duration = args.duration if args.duration or iterations else 30
+    documents = {name: generate(name) for name in args.mix}
+    urls = (args.upload_url, args.conversion_url, args.download_url)
+
+    services = None
+    try:
+        if args.start_services:
+            services = start_services(args.services_arg)
+        wait_healthy(urls, timeout=60 if services else 5)
+
+        recorder = Recorder()
+        users = [VirtualUser(index, args, recorder, documents) for index in range(args.users)]
+        print(f"Running {args.users} users for "
+              f"{f'{duration}s' if duration else f'{iterations} iterations each'}...", flush=True)
+        started = time.monotonic()
+        stop_at = started + duration if duration else None
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            for future in [pool.submit(user.run, stop_at, iterations) for user in users]:
+                future.result()
+        elapsed = time.monotonic() - started
+    finally:
+        if services is not None:
+            stop_services(services)
+
+    endpoints = recorder.report(elapsed)
+    report = {
+        'users': args.users,
+        'elapsed': round(elapsed, 1),
+        'iterations': endpoints.get('job', {}).get('requests', 0),
+        'mix': args.mix,
+        'status': args.status,
+        'outputFormat': args.output_format,
+        'endpoints': endpoints
+    }
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if endpoints.get('job', {}).get('errorRate', 1) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Synthetic PDF corpus for the benchmarks.
+
+Documents are written as raw PDF (Helvetica text, line art), so no PDF
+library is needed, and are fully determined by their case name: the same
+name always produces the same bytes.
+
+Run directly to write the corpus to a folder (default: the temp dir):
+    python pdf_corpus.py [output_dir]
+"""
+import os
+import random
+import sys
+import tempfile
+import zlib
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+MARGIN = 36
+
+# Benchmark cases: document shape by name
+CORPUS = {
+    # Ruled tables are found by pdfplumber's line detection
+    'ruled-small': {'kind': 'tables', 'pages': 2, 'tables_per_page': 1, 'columns': 5, 'rows': 25, 'ruled': True},
+    'ruled-wide': {'kind': 'tables', 'pages': 3, 'tables_per_page': 1, 'columns': 12, 'rows': 35, 'ruled': True},
+    'ruled-multi': {'kind': 'tables', 'pages': 5, 'tables_per_page': 2, 'columns': 4, 'rows': 12, 'ruled': True},
+    'ruled-long': {'kind': 'tables', 'pages': 20, 'tables_per_page': 1, 'columns': 6, 'rows': 40, 'ruled': True},
+    # Whitespace-aligned columns without lines go through the text fallback
+    'unruled': {'kind': 'tables', 'pages': 5, 'tables_per_page': 1, 'columns': 6, 'rows': 40, 'ruled': False},
+    'cv': {'kind': 'cv', 'pages': 2},
+}
+
+HEADERS = [
+    'Date', 'Reference', 'Description', 'Category', 'Qty', 'Unit Price', 'Amount', 'Tax',
+    'Account', 'Region', 'Status', 'Balance'
+]
+WORDS = [
+    'alpha', 'invoice', 'service', 'supply', 'north', 'south', 'office', 'travel', 'license',
+    'support', 'hardware', 'consulting', 'freight', 'rental', 'training', 'misc', 'online', 'retail'
+]
+SECTIONS = ['Profile', 'Experience', 'Education', 'Skills', 'Projects', 'Languages']
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _text(x, y, text, size):
+    return f"BT /F1 {size:g} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET"
+
+
+def _cell(rng, column, row):
+    """Deterministic cell value; the kind of value depends on the column."""
+    kind = column % 6
+    if kind == 0:
+        return f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    if kind == 1:
+        return f"R{row:05d}"
+    if kind == 2:
+        return rng.choice(WORDS)
+    if kind == 3:
+        return str(rng.randint(1, 500))
+    if kind == 4:
+        return f"{rng.uniform(1, 9999):.2f}"
+    return rng.choice(WORDS)[:6]
+
+
+def _table_ops(rng, top, columns, rows, ruled):
+    """Drawing operators of one table whose top edge is at y=top."""
+    width = PAGE_WIDTH - 2 * MARGIN
+    col_width = width / columns
+    row_height = 14
+    size = min(8, col_width / 6)
+    ops = []
+    for row in range(rows):
+        baseline = top - (row + 1) * row_height + 4
+        for column in range(columns):
+            value = HEADERS[column % len(HEADERS)] if row == 0 else _cell(rng, column, row)
+            # Keep the text inside its cell
+            value = value[:max(int(col_width / (size * 0.55)), 3)]
+            ops.append(_text(MARGIN + column * col_width + 2, baseline, value, size))
+    if ruled:
+        bottom = top - rows * row_height
+        ops.append('0.5 w')
+        for row in range(rows + 1):
+            y = top - row * row_height
+            ops.append(f"{MARGIN:.2f} {y:.2f} m {MARGIN + width:.2f} {y:.2f} l S")
+        for column in range(columns + 1):
+            x = MARGIN + column * col_width
+            ops.append(f"{x:.2f} {top:.2f} m {x:.2f} {bottom:.2f} l S")
+    return ops, rows * row_height
+
+
+def _table_page(rng, spec):
+    ops = []
+    top = PAGE_HEIGHT - MARGIN
+    for _ in range(spec['tables_per_page']):
+        table_ops, height = _table_ops(rng, top, spec['columns'], spec['rows'], spec['ruled'])
+        ops.extend(table_ops)
+        top -= height + 30
+    return ops
+
+
+def _cv_page(rng, page_index):
+    ops = []
+    y = PAGE_HEIGHT - MARGIN - 10
+    if page_index == 0:
+        ops.append(_text(MARGIN, y, 'Jordan Example', 18))
+        y -= 18
+        ops.append(_text(MARGIN, y, 'jordan@example.com | +1 555 0100 | Springfield', 9))
+        y -= 24
+    for section in rng.sample(SECTIONS, 3):
+        ops.append(_text(MARGIN, y, section, 12))
+        y -= 16
+        for _ in range(rng.randint(6, 10)):
+            sentence = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 12)))
+            ops.append(_text(MARGIN + 12, y, f"- {sentence.capitalize()}.", 9))
+            y -= 12
+        y -= 10
+    return ops
+
+
+def build_pdf(page_contents):
+    """
+    Assemble a PDF from the content streams of its pages.
+
+    Args:
+        page_contents: List of content streams (str), one per page
+
+    Returns:
+        PDF file bytes
+    """
+    page_count = len(page_contents)
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and its contents per page
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            ' '.join(f"{4 + 2 * i} 0 R" for i in range(page_count)), page_count
+        )).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, content in enumerate(page_contents):
+        # The content parser needs whitespace after the last operator
+        data = content.encode('latin-1') + b"\n"
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        ).encode())
+        objects.append(b"<< /Length %d >>\nstream\n%sendstream" % (len(data), data))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def generate(name):
+    """PDF bytes of a corpus case; deterministic for a given name."""
+    spec = CORPUS[name]
+    rng = random.Random(zlib.crc32(name.encode()))
+    pages = []
+    for page_index in range(spec['pages']):
+        ops = _cv_page(rng, page_index) if spec['kind'] == 'cv' else _table_page(rng, spec)
+        pages.append('\n'.join(ops))
+    return build_pdf(pages)
+
+
+def write_corpus(output_dir, names=None):
+    """
+    Write corpus cases to output_dir as <name>.pdf.
+
+    Returns:
+        Dict of case name -> file path
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for name in names or CORPUS:
+        paths[name] = os.path.join(output_dir, f"{name}.pdf")
+        with open(paths[name], 'wb') as f:
+            f.write(generate(name))
+    return paths
+
+
+if __name__ == '__main__':
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.gettempdir(), 'pdf-to-csv-corpus')
+    for name, path in write_corpus(output_dir).items():
+        print(f"{name}: {path} ({os.path.getsize(path)} bytes)")
@@ -0,0 +1,193 @@
+"""
+Test the batch upload endpoint (POST /api/upload/batch) in-process: partial
+failures, request limits, and files being committed concurrently.
+"""
+import importlib.util
+import io
+import itertools
+import json
+import os
+import sys
+import threading
+import uuid
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from shared.constants import MAX_FILES_PER_REQUEST
+
+
+def load_upload_service():
+    """Import services/upload/app.py with local storage and per-run rate limits."""
+    service_dir = os.path.join(ROOT, 'services', 'upload')
+    sys.path.insert(0, service_dir)
+    with mock.patch.dict(os.environ, {'STORAGE_BACKEND': 'local', 'RATE_LIMIT_STORE': 'memory'}):
+        spec = importlib.util.spec_from_file_location('upload_service_app', os.path.join(service_dir, 'app.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+service = load_upload_service()
+# Rate limits are per remote address, so every request comes from a new one
+addresses = (f"10.0.{n // 250}.{n % 250 + 1}" for n in itertools.count())
+
+
+def pdf_bytes():
+    """A distinct small PDF-like body, so uploads only deduplicate on purpose."""
+    return b'%PDF-1.4\n%' + uuid.uuid4().hex.encode() + b'\n%%EOF\n'
+
+
+def post_batch(files, **form):
+    """POST files [(bytes, filename)] to the batch endpoint as a fresh client."""
+    data = {'files': [(io.BytesIO(body), filename) for body, filename in files], **form}
+    return service.app.test_client().post(
+        '/api/upload/batch', data=data, content_type='multipart/form-data',
+        environ_overrides={'REMOTE_ADDR': next(addresses)}
+    )
+
+
+def test_partial_failure():
+    """Valid files are stored even when others in the batch are rejected."""
+    print("Testing partial failures...")
+    body = pdf_bytes()
+    r = post_batch([(body, 'a.pdf'), (b'not a pdf', 'notes.txt'), (body, 'b.pdf'), (pdf_bytes(), 'c.pdf')])
+    assert r.status_code == 200, r.get_data(as_text=True)
+    data = r.get_json()['data']
+
+    assert [f['filename'] for f in data['files']] == ['a.pdf', 'b.pdf', 'c.pdf']
+    assert data['fileIds'] == [f['fileId'] for f in data['files']]
+    # a.pdf and b.pdf are committed concurrently; whichever comes second is deduplicated
+    assert sorted(f['deduplicated'] for f in data['files'][:2]) == [False, True]
+    assert not data['files'][2]['deduplicated']
+    assert data['errors'] == [{'filename': 'notes.txt', 'code': 'INVALID_FILE_TYPE',
+                               'message': 'Only PDF files are allowed'}]
+    for file_id in data['fileIds']:
+        with open(service._get_upload(file_id)['filepath'], 'rb') as f:
+            assert f.read().startswith(b'%PDF-1.4')
+    print("✅ Test passed!")
+    return True
+
+
+def test_request_limits():
+    """Empty, all-invalid, oversized and over-budget batches are refused."""
+    print("Testing batch limits...")
+    r = post_batch([])
+    assert r.status_code == 400 and r.get_json()['error']['code'] == 'NO_FILE'
+
+    r = post_batch([(pdf_bytes(), f"file{index}.pdf") for index in range(MAX_FILES_PER_REQUEST + 1)])
+    assert r.status_code == 400 and r.get_json()['error']['code'] == 'TOO_MANY_FILES'
+
+    r = post_batch([(b'text', 'a.txt'), (b'text', 'b.doc')])
+    assert r.status_code == 400 and r.get_json()['success'] is False
+    assert [e['code'] for e in r.get_json()['data']['errors']] == ['INVALID_FILE_TYPE'] * 2
+
+    r = service.app.test_client().post(
+        '/api/upload/batch', data=b'', content_type='multipart/form-data; boundary=x',
+        environ_overrides={
+            'CONTENT_LENGTH': str(MAX_FILES_PER_REQUEST * (service.MAX_FILE_SIZE + service.MULTIPART_OVERHEAD) + 1)
+        }
+    )
+    assert r.get_json()['error']['code'] == 'FILE_TOO_LARGE'
+
+    # The whole batch is charged against the hourly budget
+    with mock.patch.object(service, 'RATE_LIMIT_UPLOADS_PER_HOUR', 2):
+        r = post_batch([(pdf_bytes(), f"file{index}.pdf") for index in range(3)])
+    assert r.status_code == 429 and r.headers['Retry-After']
+    print("✅ Test passed!")
+    return True
+
+
+def test_client_identity():
+    """Clients are limited by address: X-Client-Id does not buy a fresh budget."""
+    print("Testing client identity for rate limits...")
+    address = next(addresses)
+
+    def upload(body, filename, **headers):
+        return service.app.test_client().post(
+            '/api/upload', data={'file': (io.BytesIO(body), filename)}, content_type='multipart/form-data',
+            headers=headers, environ_overrides={'REMOTE_ADDR': address}
+        )
+
+    with mock.patch.object(service, 'RATE_LIMIT_UPLOADS_PER_HOUR', 1):
+        # Rejected files are not charged
+        assert upload(b'text', 'a.txt').get_json()['error']['code'] == 'INVALID_FILE_TYPE'
+        assert upload(pdf_bytes(), 'a.pdf').status_code == 200
+        r = upload(pdf_bytes(), 'b.pdf', **{'X-Client-Id': uuid.uuid4().hex})
+    assert r.status_code == 429 and r.headers['Retry-After']
+    print("✅ Test passed!")
+    return True
+
+
+def test_forwarded_client_id():
+    """Conversions carry the client address only with the internal token."""
+    print("Testing the client id forwarded to the conversion service...")
+    sent = []
+
+    def urlopen(req, timeout):
+        sent.append(dict(req.header_items()))
+        return io.BytesIO(json.dumps({'data': {'jobId': 'job1'}}).encode('utf-8'))
+
+    with service.app.test_request_context(environ_base={'REMOTE_ADDR': '10.1.0.1'}), \
+            mock.patch.object(service.urllib.request, 'urlopen', urlopen):
+        service._start_conversion(['file1'], {})
+        with mock.patch.object(service, 'INTERNAL_SERVICE_TOKEN', 'secret'):
+            service._start_conversion(['file1'], {})
+    assert 'X-client-id' not in sent[0]
+    assert sent[1]['X-client-id'] == '10.1.0.1' and sent[1]['X-internal-token'] == 'secret'
+    print("✅ Test passed!")
+    return True
+
+
+def test_concurrent_commits():
+    """Files are committed in parallel, and one failed commit spares the others."""
+    print("Testing concurrent commits...")
+    register_upload = service.register_upload
+    # Every commit waits for all of them: a sequential commit path would time out here
+    barrier = threading.Barrier(4, timeout=10)
+
+    def register_together(path, sha256, size, filename):
+        barrier.wait()
+        if filename == 'broken.pdf':
+            raise OSError('disk full')
+        return register_upload(path, sha256, size, filename)
+
+    with mock.patch.object(service, 'register_upload', register_together):
+        r = post_batch([(pdf_bytes(), name) for name in ('a.pdf', 'broken.pdf', 'b.pdf', 'c.pdf')])
+    assert r.status_code == 200, r.get_data(as_text=True)
+    data = r.get_json()['data']
+    assert [f['filename'] for f in data['files']] == ['a.pdf', 'b.pdf', 'c.pdf']
+    assert data['errors'] == [{'filename': 'broken.pdf', 'code': 'UPLOAD_FAILED', 'message': 'disk full'}]
+    # The failed part's temp file is discarded with the request
+    assert not any(service.HashingFileWriter.active_paths)
+    print("✅ Test passed!")
+    return True
+
+
+def test_conversion_not_started():
+    """The uploads stand when the conversion service cannot be reached."""
+    print("Testing convert=true without a conversion service...")
+    with mock.patch.object(service, 'CONVERSION_SERVICE_URL', 'http://127.0.0.1:9'):
+        r = post_batch([(pdf_bytes(), 'a.pdf')], convert='true')
+    data = r.get_json()['data']
+    assert r.status_code == 200 and len(data['fileIds']) == 1 and 'conversion' not in data
+    assert [e['code'] for e in data['errors']] == ['CONVERSION_NOT_STARTED']
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_partial_failure(),
+            test_request_limits(),
+            test_client_identity(),
+            test_forwarded_client_id(),
+            test_concurrent_commits(),
+            test_conversion_not_started(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
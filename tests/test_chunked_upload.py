@@ -0,0 +1,134 @@
+"""
+Test resumable chunked upload sessions: out-of-order chunks, finalize with
+checksum, and sessions surviving the retention sweeps of the upload folder.
+"""
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'services', 'upload'))
+
+from shared.retention import RetentionManager
+from chunked import MIN_CHUNK_SIZE, ChunkedUploadError, ChunkedUploadSessions
+
+TTL = 3600
+
+
+def make_sessions():
+    upload_folder = tempfile.mkdtemp()
+    sessions = ChunkedUploadSessions(os.path.join(upload_folder, 'sessions'), 10 * MIN_CHUNK_SIZE)
+    return upload_folder, sessions
+
+
+def make_retention(upload_folder, sessions, quota_bytes=None):
+    return RetentionManager(
+        {upload_folder: TTL}, quota_bytes=quota_bytes,
+        protect=lambda path: sessions.is_active(path, TTL)
+    )
+
+
+def send(sessions, upload_id, data, start, end):
+    return sessions.write_chunk(upload_id, start, io.BytesIO(data[start:end]), end - start)
+
+
+def test_chunks_and_finalize():
+    """Chunks arrive in any order; finalize checks completeness and the digest."""
+    print("Testing chunks and finalize...")
+    _, sessions = make_sessions()
+    data = os.urandom(2 * MIN_CHUNK_SIZE + 100)
+    session = sessions.create('doc.pdf', len(data), chunk_size=MIN_CHUNK_SIZE,
+                              sha256=hashlib.sha256(data).hexdigest())
+    upload_id = session['uploadId']
+
+    status = send(sessions, upload_id, data, MIN_CHUNK_SIZE, 2 * MIN_CHUNK_SIZE)
+    assert status['missingRanges'] == [[0, MIN_CHUNK_SIZE], [2 * MIN_CHUNK_SIZE, len(data)]]
+    try:
+        sessions.finalize(upload_id)
+        raise AssertionError('incomplete upload was finalized')
+    except ChunkedUploadError as e:
+        assert e.code == 'UPLOAD_INCOMPLETE'
+
+    send(sessions, upload_id, data, 2 * MIN_CHUNK_SIZE, len(data))
+    status = send(sessions, upload_id, data, 0, MIN_CHUNK_SIZE)
+    assert status['complete'] and status['bytesReceived'] == len(data)
+    _, part_path, sha256 = sessions.finalize(upload_id)
+    assert sha256 == hashlib.sha256(data).hexdigest()
+    with open(part_path, 'rb') as f:
+        assert f.read() == data
+    print("✅ Test passed!")
+    return True
+
+
+def test_session_survives_sweeps():
+    """A new session keeps its empty ranges folder and its part under quota pressure."""
+    print("Testing sessions during retention sweeps...")
+    upload_folder, sessions = make_sessions()
+    data = os.urandom(2 * MIN_CHUNK_SIZE)
+    upload_id = sessions.create('doc.pdf', len(data), chunk_size=MIN_CHUNK_SIZE)['uploadId']
+
+    # The preallocated part alone exceeds the quota
+    make_retention(upload_folder, sessions, quota_bytes=MIN_CHUNK_SIZE).sweep()
+    assert os.path.isdir(os.path.join(sessions.root, f"{upload_id}.ranges"))
+    send(sessions, upload_id, data, 0, MIN_CHUNK_SIZE)
+    make_retention(upload_folder, sessions, quota_bytes=MIN_CHUNK_SIZE).sweep()
+    status = send(sessions, upload_id, data, MIN_CHUNK_SIZE, len(data))
+    assert status['complete']
+    print("✅ Test passed!")
+    return True
+
+
+def test_missing_ranges_folder():
+    """A pruned ranges folder reads as no chunks received and is recreated."""
+    print("Testing a missing ranges folder...")
+    _, sessions = make_sessions()
+    data = os.urandom(MIN_CHUNK_SIZE)
+    upload_id = sessions.create('doc.pdf', len(data))['uploadId']
+    os.rmdir(os.path.join(sessions.root, f"{upload_id}.ranges"))
+
+    assert sessions.status(upload_id)['missingRanges'] == [[0, len(data)]]
+    assert send(sessions, upload_id, data, 0, len(data))['complete']
+    print("✅ Test passed!")
+    return True
+
+
+def test_idle_session_expires():
+    """A session idle for longer than the TTL is swept away and reported missing."""
+    print("Testing idle session expiry...")
+    upload_folder, sessions = make_sessions()
+    data = os.urandom(2 * MIN_CHUNK_SIZE)
+    upload_id = sessions.create('doc.pdf', len(data), chunk_size=MIN_CHUNK_SIZE)['uploadId']
+    send(sessions, upload_id, data, 0, MIN_CHUNK_SIZE)
+
+    idle = time.time() - TTL - 60
+    for dirpath, _, filenames in os.walk(sessions.root):
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), (idle, idle))
+    make_retention(upload_folder, sessions).sweep()
+
+    assert os.listdir(sessions.root) == []
+    try:
+        send(sessions, upload_id, data, MIN_CHUNK_SIZE, len(data))
+        raise AssertionError('chunk accepted for an expired session')
+    except ChunkedUploadError as e:
+        assert e.status == 404
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_chunks_and_finalize(),
+            test_session_survives_sweeps(),
+            test_missing_ranges_folder(),
+            test_idle_session_expires(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
@@ -0,0 +1,176 @@
+"""
+Test isolated page-by-page extraction: hung and crashing pages become page
+errors, and the job deadline stops extraction with partial results, also
+for the text fallback of the JSON and text writers.
+
+A stand-in child script replaces the real extractor so pages can be made to
+hang or crash on purpose.
+"""
+import json
+import os
+import sys
+import tempfile
+import textwrap
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'services', 'conversion'))
+
+import isolation
+import worker as worker_module
+from converters import save_tables_to_json
+from isolation import JobTimeout, extract_isolated
+from job_store import MemoryJobStore
+from worker import ConversionWorker
+
+# Three-page document whose page 2 hangs and page 3 (with CRASH set) kills the process
+FAKE_CHILD = textwrap.dedent("""
+    import json, os, sys, time
+    mode, start_page = sys.argv[2], int(sys.argv[3])
+    print(json.dumps({'open': 3}), flush=True)
+    for page in range(start_page, 4):
+        if page == 2:
+            time.sleep(60)
+        if page == 3 and os.getenv('CRASH'):
+            os._exit(9)
+        rows = f"Text of page {page}" if mode == 'page_text' else [[['page', str(page)]]]
+        print(json.dumps({'page': page, 'rows': rows}), flush=True)
+    print(json.dumps({'done': True}), flush=True)
+""")
+
+
+@contextmanager
+def fake_child():
+    """Run the stand-in script as the extraction child."""
+    path = os.path.join(tempfile.mkdtemp(), 'fake_child.py')
+    with open(path, 'w') as f:
+        f.write(FAKE_CHILD)
+    real_file, isolation.__file__ = isolation.__file__, path
+    try:
+        yield
+    finally:
+        isolation.__file__ = real_file
+
+
+def test_hung_page_is_skipped():
+    """A page over its time budget is killed and the next pages still extract."""
+    print("Testing page timeout...")
+    seen = []
+    started = time.monotonic()
+    with fake_child():
+        results, page_errors = extract_isolated(
+            'doc.pdf', 'tables', page_timeout=1, on_page=lambda page, total: seen.append(page)
+        )
+    assert sorted(results) == [1, 3] and seen == [1, 3]
+    assert page_errors == [{'page': 2, 'error': 'Page timed out after 1s'}]
+    assert time.monotonic() - started < 10
+    print("✅ Test passed!")
+    return True
+
+
+def test_crashed_page_is_reported():
+    """A page that kills the extraction process becomes a page error."""
+    print("Testing extraction crash...")
+    os.environ['CRASH'] = '1'
+    try:
+        with fake_child():
+            results, page_errors = extract_isolated('doc.pdf', 'tables', page_timeout=1)
+    finally:
+        del os.environ['CRASH']
+    assert sorted(results) == [1]
+    assert [error['page'] for error in page_errors] == [2, 3]
+    assert 'died' in page_errors[1]['error']
+    print("✅ Test passed!")
+    return True
+
+
+def test_deadline_returns_partial_results():
+    """The job deadline stops extraction and keeps the finished pages."""
+    print("Testing job deadline...")
+    try:
+        with fake_child():
+            extract_isolated('doc.pdf', 'tables', page_timeout=30, deadline=time.monotonic() + 1)
+        assert False, 'expected JobTimeout'
+    except JobTimeout as e:
+        assert e.page == 2 and sorted(e.results) == [1]
+    print("✅ Test passed!")
+    return True
+
+
+def test_text_fallback_is_isolated():
+    """The writers' text fallback extracts in the child, under the page timeout."""
+    print("Testing isolated text fallback...")
+    folder = tempfile.mkdtemp()
+    pdf_path = os.path.join(folder, 'doc.pdf')
+    with open(pdf_path, 'wb') as f:
+        f.write(b'%PDF-1.4')
+    worker = ConversionWorker(folder, os.path.join(folder, 'converted'), MemoryJobStore(), None, page_timeout=1)
+    fallback_errors = []
+
+    def extract_text(path):
+        page_texts, errors = worker._extract_page_texts(path)
+        fallback_errors.extend(errors)
+        return page_texts
+
+    with fake_child():
+        paths = save_tables_to_json([], folder, 'doc', pdf_path=pdf_path, extract_text=extract_text)
+    with open(paths[0], encoding='utf-8') as f:
+        pages = json.load(f)['pages']
+    assert [page['content'] for page in pages] == ['Text of page 1', 'Text of page 3']
+    assert fallback_errors == [{'page': 2, 'error': 'Page timed out after 1s'}]
+    print("✅ Test passed!")
+    return True
+
+
+def test_in_process_deadline():
+    """In-process extraction also stops at the deadline with the finished pages."""
+    print("Testing job deadline in process...")
+    folder = tempfile.mkdtemp()
+    pdf_path = os.path.join(folder, 'doc.pdf')
+    with open(pdf_path, 'wb') as f:
+        f.write(b'%PDF-1.4')
+    worker = ConversionWorker(folder, os.path.join(folder, 'converted'), MemoryJobStore(), None,
+                              isolate_extraction=False)
+    modes = []
+
+    def slow_pages(pdf_data, mode):
+        # Three pages, the first of which uses up the time budget
+        modes.append(mode)
+        for page in range(1, 4):
+            if page == 1:
+                time.sleep(0.3)
+            yield page, 3, ([[['page', str(page)]]] if mode == 'tables' else f"Text of page {page}")
+
+    time_limit = [{'page': 2, 'error': 'Conversion time limit reached; remaining pages skipped'}]
+    with mock.patch.object(worker_module, 'iter_page_results', slow_pages):
+        tables, page_errors = worker._run_extraction(pdf_path, 'pdfplumber', deadline=time.monotonic() + 0.1)
+        assert tables == [[['page', '1']]] and page_errors == time_limit
+        page_texts, page_errors = worker._extract_page_texts(pdf_path, deadline=time.monotonic() + 0.1)
+        assert page_texts == {1: 'Text of page 1'} and page_errors == time_limit
+    # The tables pass was cut short, so there was no text fallback
+    assert modes == ['tables', 'page_text']
+
+    # Once the time is up, no extraction child is started
+    with mock.patch.object(worker_module, 'extract_isolated', side_effect=AssertionError('child started')):
+        page_texts, page_errors = worker._extract_page_texts(pdf_path, deadline=time.monotonic(), isolated=True)
+    assert page_texts == {} and page_errors == [dict(time_limit[0], page=1)]
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_hung_page_is_skipped(),
+            test_crashed_page_is_reported(),
+            test_deadline_returns_partial_results(),
+            test_text_fallback_is_isolated(),
+            test_in_process_deadline(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
@@ -0,0 +1,88 @@
+"""
+Test server-sent event streams of conversion job status.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'services', 'conversion')))
+
+from events import JobEvents, parse_last_event_id, stream_job_events
+from job_store import MemoryJobStore
+
+FINISHED = ('completed', 'error', 'cancelled')
+
+
+def make_store():
+    store, events = MemoryJobStore(), JobEvents()
+    store.subscribe(events.notify)
+    store.create({'jobId': 'job1', 'status': 'pending', 'progress': 0, 'createdAt': '2024-01-01T00:00:00'})
+    return store, events
+
+
+def status_events(chunks):
+    return [chunk for chunk in chunks if 'event: status' in chunk]
+
+
+def test_pushes_changes_until_finished():
+    """Writes wake the stream at once and the stream ends with the job."""
+    print("Testing pushed status events...")
+    store, events = make_store()
+
+    def run_job():
+        for progress in (50, 100):
+            time.sleep(0.1)
+            store.update('job1', {'status': 'converting', 'progress': progress})
+        store.update('job1', {'status': 'completed'})
+
+    threading.Thread(target=run_job).start()
+    started = time.monotonic()
+    chunks = list(stream_job_events(store, events, ['job1'], lambda job: job, FINISHED))
+    sent = status_events(chunks)
+    assert sent[0].startswith('id: job1:1\n') and sent[-1].startswith('id: job1:4\n')
+    assert '"completed"' in sent[-1]
+    assert time.monotonic() - started < 0.9  # woken by the writes, not the poll interval
+    print("✅ Test passed!")
+    return True
+
+
+def test_resume_and_unknown_jobs():
+    """Last-Event-ID skips versions the client has; unknown jobs are reported gone."""
+    print("Testing resume...")
+    store, events = make_store()
+    store.update('job1', {'status': 'completed'})
+
+    resumed = list(stream_job_events(
+        store, events, ['job1', 'missing'], lambda job: job, FINISHED,
+        last_versions=parse_last_event_id('job1:2')
+    ))
+    assert status_events(resumed) == []
+    assert any('event: gone' in chunk for chunk in resumed)
+    assert parse_last_event_id('garbage') == {}
+    print("✅ Test passed!")
+    return True
+
+
+def test_keepalive():
+    """Idle streams send comment lines."""
+    print("Testing keep-alive...")
+    store, events = make_store()
+    stream = stream_job_events(store, events, ['job1'], lambda job: job, FINISHED, keepalive_interval=0)
+    assert 'event: status' in next(stream)
+    assert next(stream) == ': keep-alive\n\n'
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_pushes_changes_until_finished(),
+            test_resume_and_unknown_jobs(),
+            test_keepalive(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
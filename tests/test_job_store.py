@@ -0,0 +1,132 @@
+"""
+Test the SQLite conversion job store.
+
+Two store instances on one database file stand in for two service processes.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'services', 'conversion')))
+
+from job_store import MemoryJobStore, SQLiteJobStore
+
+
+def make_job(job_id, created_at, status='pending'):
+    return {'jobId': job_id, 'status': status, 'progress': 0, 'createdAt': created_at, 'errors': []}
+
+
+def test_shared_between_processes():
+    """Jobs written by one store are visible to another on the same file."""
+    print("Testing job sharing between processes...")
+    path = os.path.join(tempfile.mkdtemp(), 'jobs.db')
+    writer, reader = SQLiteJobStore(path), SQLiteJobStore(path)
+
+    writer.create(make_job('job1', '2024-01-01T00:00:00'))
+    writer.update('job1', {'status': 'completed', 'progress': 100})
+
+    job = reader.get('job1')
+    assert job['status'] == 'completed' and job['version'] == 2
+    assert writer._conn().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    print("✅ Test passed!")
+    return True
+
+
+def test_batched_progress():
+    """Progress updates are coalesced until the next flush or regular write."""
+    print("Testing batched progress writes...")
+    path = os.path.join(tempfile.mkdtemp(), 'jobs.db')
+    writer, reader = SQLiteJobStore(path, flush_interval=3600), SQLiteJobStore(path)
+    writer.create(make_job('job1', '2024-01-01T00:00:00'))
+
+    for progress in (10, 20, 30):
+        writer.update('job1', {'progress': progress}, batch=True)
+    assert reader.get('job1')['progress'] == 0
+    # The writing process reads them merged in memory, without writing them
+    job = writer.get('job1')
+    assert job['progress'] == 30 and job['version'] == 4
+    assert reader.get('job1')['progress'] == 0
+
+    writer.update('job1', {'progress': 40}, batch=True)
+    writer.update('job1', {'status': 'completed'})
+    job = reader.get('job1')
+    assert job['progress'] == 40 and job['status'] == 'completed' and job['version'] == 6
+    assert writer.get('job1') == job
+    print("✅ Test passed!")
+    return True
+
+
+def test_batched_progress_flushed_on_timer():
+    """The last batched update is written once the interval has passed."""
+    print("Testing timed flushes of batched progress...")
+    path = os.path.join(tempfile.mkdtemp(), 'jobs.db')
+    writer, reader = SQLiteJobStore(path, flush_interval=0.5), SQLiteJobStore(path)
+    writer.create(make_job('job1', '2024-01-01T00:00:00'))
+    for progress in (10, 20):
+        writer.update('job1', {'progress': progress}, batch=True)
+    assert reader.get('job1')['progress'] == 0
+
+    # No further update comes to flush them
+    deadline = time.monotonic() + 5
+    while reader.get('job1')['progress'] != 20 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    job = reader.get('job1')
+    assert job['progress'] == 20 and job['version'] == 3
+    print("✅ Test passed!")
+    return True
+
+
+def test_conditional_transition():
+    """A transition only applies while the job has one of the expected statuses."""
+    print("Testing conditional transitions...")
+    path = os.path.join(tempfile.mkdtemp(), 'jobs.db')
+    for store in (SQLiteJobStore(path, flush_interval=3600), MemoryJobStore()):
+        store.create(make_job('job1', '2024-01-01T00:00:00', 'converting'))
+        store.update('job1', {'progress': 50}, batch=True)
+
+        # A worker finishes the job before the cancellation is written
+        store.update('job1', {'status': 'completed'})
+        assert not store.transition('job1', {'status': 'cancelling'}, ('converting',))
+        assert not store.transition('missing', {'status': 'cancelling'}, ('converting',))
+        job = store.get('job1')
+        assert job['status'] == 'completed' and job['progress'] == 50 and job['version'] == 3
+
+        store.update('job1', {'progress': 60}, batch=True)
+        assert store.transition('job1', {'status': 'cancelled'}, ('completed',))
+        job = store.get('job1')
+        assert job['status'] == 'cancelled' and job['progress'] == 60 and job['version'] == 5
+    assert SQLiteJobStore(path).get('job1')['progress'] == 60
+    print("✅ Test passed!")
+    return True
+
+
+def test_list_jobs():
+    """Jobs can be filtered by status and creation time."""
+    print("Testing job listing...")
+    store = SQLiteJobStore(os.path.join(tempfile.mkdtemp(), 'jobs.db'))
+    store.create(make_job('old', '2024-01-01T00:00:00', 'completed'))
+    store.create(make_job('new', '2024-06-01T00:00:00', 'completed'))
+    store.create(make_job('running', '2024-01-01T00:00:00', 'converting'))
+
+    old = store.list_jobs(statuses=('completed', 'error'), created_before='2024-03-01T00:00:00')
+    assert [job['jobId'] for job in old] == ['old']
+    store.delete('old')
+    assert store.get('old') is None and len(store.list_jobs()) == 2
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_shared_between_processes(),
+            test_batched_progress(),
+            test_batched_progress_flushed_on_timer(),
+            test_conditional_transition(),
+            test_list_jobs(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
@@ -0,0 +1,141 @@
+"""
+Test the in-process metrics registry and the Flask instrumentation behind
+the services' /metrics endpoints.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, Response
+
+from shared.metrics import MetricsRegistry, instrument_app
+
+
+def test_render_text_format():
+    """Counters, histograms and callbacks render in the Prometheus text format."""
+    print("Testing metrics rendering...")
+    registry = MetricsRegistry()
+    jobs = registry.counter('jobs_total', 'Jobs finished', ('status',))
+    jobs.labels('completed').inc()
+    jobs.labels('completed').inc(2)
+    jobs.labels('error "x"').inc()
+    assert registry.counter('jobs_total', 'Jobs finished', ('status',)) is jobs
+
+    latency = registry.histogram('stage_seconds', 'Stage latency', buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        latency.observe(value)
+    registry.callback('queue_tasks', 'Queue depth', lambda: {('bulk',): 4}, ('priority',))
+    registry.callback('broken', 'Failing callback', lambda: 1 / 0)
+
+    text = registry.render()
+    assert '# TYPE jobs_total counter' in text
+    assert 'jobs_total{status="completed"} 3' in text
+    assert 'jobs_total{status="error \\"x\\""} 1' in text
+    assert 'stage_seconds_bucket{le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{le="1"} 3' in text
+    assert 'stage_seconds_bucket{le="+Inf"} 4' in text
+    assert 'stage_seconds_sum 6.05' in text and 'stage_seconds_count 4' in text
+    assert 'queue_tasks{priority="bulk"} 4' in text
+    assert 'broken' not in text
+
+    try:
+        registry.gauge('jobs_total', 'Not a gauge')
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+    print("✅ Test passed!")
+    return True
+
+
+def test_instrumented_app():
+    """Requests are timed per route and their bytes counted, streamed bodies included."""
+    print("Testing request instrumentation...")
+    registry = MetricsRegistry()
+    app = Flask(__name__)
+    instrument_app(app, registry)
+
+    @app.route('/api/files/<file_id>', methods=['POST'])
+    def upload(file_id):
+        return 'stored'
+
+    @app.route('/api/stream')
+    def stream():
+        return Response((chunk for chunk in (b'abc', b'defg')), mimetype='text/plain')
+
+    client = app.test_client()
+    for file_id in ('a', 'b'):
+        assert client.post(f'/api/files/{file_id}', data=b'x' * 10).status_code == 200
+    assert client.get('/api/stream').data == b'abcdefg'
+    assert client.get('/missing').status_code == 404
+
+    response = client.get('/metrics')
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{method="POST",route="/api/files/<file_id>",status="200"} 2' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1' in text
+    assert 'http_request_bytes_total{route="/api/files/<file_id>"} 20' in text
+    assert 'http_response_bytes_total{route="/api/stream"} 7' in text
+    # The scrape itself is the one request in flight
+    assert 'http_requests_in_flight 1' in text
+    print("✅ Test passed!")
+    return True
+
+
+def test_shared_registries():
+    """Workers sharing a folder report their summed metrics from any of them."""
+    print("Testing metrics shared between worker processes...")
+    folder = tempfile.mkdtemp()
+    workers = [MetricsRegistry(), MetricsRegistry()]
+    for index, registry in enumerate(workers, 1):
+        registry.share(folder, interval=3600)
+        registry.counter('jobs_total', 'Jobs finished', ('status',)).labels('completed').inc(index)
+        registry.gauge('in_flight', 'Requests in flight').set(index)
+        registry.histogram('stage_seconds', 'Stage latency', buckets=(1,)).observe(index - 0.5)
+        registry.callback('consumers', 'Consumers', lambda: 2, per_process=True)
+        registry.callback('queue_tasks', 'Queue depth', lambda index=index: 10 * index)
+
+    # A worker that has exited: its counters stay, its gauges go
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    with open(os.path.join(folder, f"{exited.pid}-old.json"), 'w') as f:
+        json.dump({'pid': exited.pid, 'metrics': {
+            'jobs_total': {'kind': 'counter', 'documentation': 'Jobs finished', 'labelnames': ['status'],
+                           'bounds': [], 'series': [[['completed'], 4]]},
+            'in_flight': {'kind': 'gauge', 'documentation': 'Requests in flight', 'labelnames': [],
+                          'bounds': [], 'series': [[[], 7]]}
+        }}, f)
+
+    # Both workers have written a snapshot, as they do every interval
+    workers[1].render()
+    for registry, queue_tasks in zip(workers, (10, 20)):
+        text = registry.render()
+        assert 'jobs_total{status="completed"} 7' in text
+        assert 'in_flight 3' in text
+        assert 'stage_seconds_bucket{le="1"} 1' in text and 'stage_seconds_count 2' in text
+        assert 'consumers 4' in text
+        # Shared state is read by the worker answering the scrape
+        assert f'queue_tasks {queue_tasks}' in text
+
+    # Updates reach the other worker's scrapes once written
+    workers[0].counter('jobs_total', 'Jobs finished', ('status',)).labels('completed').inc()
+    assert 'jobs_total{status="completed"} 8' in workers[0].render()
+    assert 'jobs_total{status="completed"} 8' in workers[1].render()
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_render_text_format(),
+            test_instrumented_app(),
+            test_shared_registries(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
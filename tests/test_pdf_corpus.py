@@ -0,0 +1,55 @@
+"""
+Test the synthetic benchmark corpus: documents are deterministic and extract
+with the shapes the benchmark cases describe.
+"""
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'services', 'conversion'))
+
+from extractors import extract_tables_pdfplumber, extract_text_lines
+from pdf_corpus import CORPUS, generate
+
+
+def test_corpus_is_deterministic():
+    """The same case name always produces the same bytes."""
+    print("Testing corpus determinism...")
+    for name in CORPUS:
+        assert generate(name) == generate(name), name
+    assert generate('ruled-small') != generate('ruled-wide')
+    print("✅ Test passed!")
+    return True
+
+
+def test_corpus_shapes():
+    """Ruled cases extract as tables of the given size; the others fall back to text."""
+    print("Testing corpus shapes...")
+    for name in ('ruled-small', 'ruled-multi'):
+        spec = CORPUS[name]
+        tables = extract_tables_pdfplumber(generate(name))
+        assert len(tables) == spec['pages'] * spec['tables_per_page'], name
+        assert all(len(table) == spec['rows'] for table in tables), name
+        assert all(len(row) == spec['columns'] for table in tables for row in table), name
+        assert tables[0][0][0] == 'Date'
+
+    for name in ('unruled', 'cv'):
+        pdf = generate(name)
+        assert extract_tables_pdfplumber(pdf) == [], name
+        lines = extract_text_lines(pdf)
+        assert len(lines) == 1 and len(lines[0]) > 20, name
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_corpus_is_deterministic(),
+            test_corpus_shapes(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
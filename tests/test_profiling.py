@@ -0,0 +1,119 @@
+"""
+Test on-demand job profiling: profile files, sampled stacks and allocation
+stats, and a profiled conversion publishing them alongside its outputs.
+"""
+import os
+import pstats
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'services', 'conversion'))
+
+from job_store import MemoryJobStore
+from profiling import PROFILE_FILES, JobProfiler
+from worker import ConversionWorker
+
+# Minimal single-page PDF with a few lines of text
+DUMMY_PDF = b"""%PDF-1.4
+1 0 obj
+<< /Type /Catalog /Pages 2 0 R >>
+endobj
+2 0 obj
+<< /Type /Pages /Kids [3 0 R] /Count 1 >>
+endobj
+3 0 obj
+<< /Type /Page /Parent 2 0 R /Resources 4 0 R /MediaBox [0 0 612 792] /Contents 5 0 R >>
+endobj
+4 0 obj
+<< /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >>
+endobj
+5 0 obj
+<< /Length 72 >>
+stream
+BT
+/F1 12 Tf
+50 700 Td
+(Hello World) Tj
+0 -20 Td
+(Second line) Tj
+ET
+endstream
+endobj
+trailer
+<< /Size 6 /Root 1 0 R >>
+%%EOF
+"""
+
+
+
+def busy_work():
+    return sum(len(str(i) * 50) for i in range(200000))
+
+
+def test_profile_files():
+    """The profiler writes cProfile stats, reports and flamegraph stacks."""
+    print("Testing profile files...")
+    profiler = JobProfiler(sample_interval=0.001)
+    profiler.start()
+    busy_work()
+    paths = profiler.save(tempfile.mkdtemp())
+    profiler.stop()  # Already stopped; a second call is a no-op
+    assert [os.path.basename(path) for path in paths] == list(PROFILE_FILES)
+
+    stats_path, report_path, allocations_path, stacks_path = paths
+    functions = {name for _, _, name in pstats.Stats(stats_path).stats}
+    assert 'busy_work' in functions
+    with open(report_path) as f:
+        assert 'busy_work' in f.read()
+    with open(allocations_path) as f:
+        assert f.readline().startswith('Peak traced memory:')
+
+    with open(stacks_path) as f:
+        lines = f.read().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0
+    assert any('busy_work (test_profiling.py:' in line for line in lines)
+    print("✅ Test passed!")
+    return True
+
+
+def test_profiled_conversion():
+    """A profiled job publishes its profile files next to the converted ones."""
+    print("Testing a profiled conversion...")
+    folder = tempfile.mkdtemp()
+    pdf_path = os.path.join(folder, 'doc.pdf')
+    with open(pdf_path, 'wb') as f:
+        f.write(DUMMY_PDF)
+
+    jobs = MemoryJobStore()
+    jobs.create({'jobId': 'job1', 'status': 'pending', 'progress': 0, 'createdAt': '2024-01-01T00:00:00'})
+    worker = ConversionWorker(folder, os.path.join(folder, 'converted'), jobs, None)
+    file_infos = [{'fileId': 'file1', 'filename': 'doc.pdf', 'filepath': pdf_path}]
+    worker.process_conversion('job1', file_infos, 'pdfplumber', False, 'csv', profile=True)
+
+    job = jobs.get('job1')
+    assert job['status'] == 'completed', job
+    assert [f['filename'] for f in job['convertedFiles']] == ['doc_table1.csv']
+    assert [f['filename'] for f in job['profileFiles']] == list(PROFILE_FILES)
+    assert all(f['fileId'] == f"job1_{f['filename']}" and f['size'] > 0 for f in job['profileFiles'])
+    # Extraction ran in the job's thread, so the profile covers it
+    stats = pstats.Stats(job['profileFiles'][0]['filepath'])
+    assert 'extract_page_text_lines' in {name for _, _, name in stats.stats}
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_profile_files(),
+            test_profiled_conversion(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
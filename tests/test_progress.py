@@ -0,0 +1,93 @@
+"""
+Test page- and row-level conversion progress.
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'services', 'conversion'))
+
+import converters
+from converters import save_tables_to_csv, save_tables_to_json
+from job_store import MemoryJobStore
+from progress import JobProgress
+
+
+def make_progress(total_files, interval=0):
+    store = MemoryJobStore()
+    store.create({'jobId': 'job1', 'status': 'converting', 'progress': 0, 'createdAt': '2024-01-01T00:00:00'})
+    return store, JobProgress(store, 'job1', total_files, interval=interval)
+
+
+def test_page_progress_and_eta():
+    """Pages move the progress within a file and drive the time estimate."""
+    print("Testing page progress...")
+    store, progress = make_progress(total_files=2)
+    progress.start_file()
+    for page in range(1, 11):
+        time.sleep(0.01)
+        progress.on_page(page, 10)
+    job = store.get('job1')
+    assert job['pagesDone'] == 10 and job['pagesTotal'] == 10
+    assert job['progress'] == 45  # 90% of the first of two files
+    # The second file is expected to be as long as the first
+    assert 0 < job['etaSeconds'] <= 10 / job['pagesPerSecond'] + 0.1
+
+    progress.start_writing([[['a']] * 50])
+    progress.on_rows(50)
+    progress.finish_file()
+    assert store.get('job1')['progress'] == 50
+    print("✅ Test passed!")
+    return True
+
+
+def test_updates_are_throttled():
+    """Only the first update within the interval reaches the store."""
+    print("Testing throttling...")
+    store, progress = make_progress(total_files=1, interval=3600)
+    progress.start_file()
+    for page in range(1, 101):
+        progress.on_page(page, 100)
+    assert store.get('job1')['version'] == 2
+    progress.finish_file()
+    assert store.get('job1')['version'] == 3 and store.get('job1')['pagesDone'] == 100
+    print("✅ Test passed!")
+    return True
+
+
+def test_writers_report_row_batches():
+    """Writers call on_rows after every batch of rows."""
+    print("Testing row batches...")
+    reported, reported_json, reported_merged = [], [], []
+    table = [[str(i), 'x'] for i in range(25)]
+    priced = [['Name', 'Quantity', 'Price']] + [[f"Widget {i}", str(i), f"{i}.50"] for i in range(24)]
+    batch_size, converters.ROW_BATCH_SIZE = converters.ROW_BATCH_SIZE, 10
+    try:
+        save_tables_to_csv([table], tempfile.mkdtemp(), 'out', on_rows=reported.append)
+        save_tables_to_json([priced, priced], tempfile.mkdtemp(), 'out', on_rows=reported_json.append)
+        save_tables_to_json([priced, priced], tempfile.mkdtemp(), 'out', merge=True,
+                            on_rows=reported_merged.append)
+    finally:
+        converters.ROW_BATCH_SIZE = batch_size
+    assert reported == [10, 10, 5]
+    # JSON rows are counted as they are converted, not once per table up front
+    assert reported_json == [10, 10, 5, 10, 10, 5]
+    assert reported_merged == [10] * 5
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_page_progress_and_eta(),
+            test_updates_are_throttled(),
+            test_writers_report_row_batches(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
@@ -0,0 +1,88 @@
+"""
+Test the token-bucket rate limiters: bursts, refill and Retry-After, and
+buckets shared between processes through SQLite.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from shared.ratelimit import MemoryRateLimiter, SQLiteRateLimiter, retry_after
+
+
+def make_sqlite_limiter():
+    return SQLiteRateLimiter(os.path.join(tempfile.mkdtemp(), 'ratelimit.db'))
+
+
+def test_burst_then_refill():
+    """A full bucket allows a burst, then refills at the hourly rate."""
+    print("Testing burst and refill...")
+    for limiter in (MemoryRateLimiter(), make_sqlite_limiter()):
+        # 7200 per hour is one token every 0.5s, slow enough for a loaded machine
+        assert limiter.acquire('upload:a', 7200, burst=2) == (True, 0.0)
+        assert limiter.acquire('upload:a', 7200, burst=2) == (True, 0.0)
+        allowed, wait = limiter.acquire('upload:a', 7200, burst=2)
+        assert not allowed and 0 < wait <= 0.5
+        assert retry_after(wait) == '1'
+
+        # Other clients and endpoints have their own buckets
+        assert limiter.acquire('upload:b', 7200, burst=2)[0]
+        assert limiter.acquire('convert:a', 7200, burst=2)[0]
+
+        time.sleep(0.6)
+        assert limiter.acquire('upload:a', 7200, burst=2)[0]
+    print("✅ Test passed!")
+    return True
+
+
+def test_cost_and_disabled_limit():
+    """Requests can take several tokens; a rate of 0 disables the limit."""
+    print("Testing request cost...")
+    limiter = MemoryRateLimiter()
+    assert limiter.acquire('upload:a', 100, cost=60)[0]
+    allowed, wait = limiter.acquire('upload:a', 100, cost=60)
+    # 20 tokens short at 100 per hour
+    assert not allowed and abs(wait - 720) < 1
+
+    limiter.reset('upload:a')
+    assert limiter.acquire('upload:a', 100, cost=60)[0]
+    assert all(limiter.acquire('upload:a', 0)[0] for _ in range(1000))
+    print("✅ Test passed!")
+    return True
+
+
+def test_sqlite_buckets_are_shared():
+    """Limiters on one SQLite file (one per process) never spend the same token twice."""
+    print("Testing shared SQLite buckets...")
+    first = make_sqlite_limiter()
+    second = SQLiteRateLimiter(first.path)
+    allowed = []
+
+    def spend(limiter):
+        for _ in range(10):
+            allowed.append(limiter.acquire('convert:a', 50)[0])
+
+    threads = [threading.Thread(target=spend, args=(limiter,)) for limiter in (first, second) * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert allowed.count(True) == 50 and len(allowed) == 80
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_burst_then_refill(),
+            test_cost_and_disabled_limit(),
+            test_sqlite_buckets_are_shared(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
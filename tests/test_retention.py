@@ -0,0 +1,166 @@
+"""
+Test the retention manager: TTL expiry, LRU quota eviction (also of
+deduplicated, hard-linked uploads), protected paths and pruning of empty
+folders.
+"""
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'services', 'upload'))
+
+from shared.retention import RetentionManager
+from streaming import ContentStore
+
+
+def write_file(folder, name, size, age=0):
+    """Write a file of size bytes last used age seconds ago."""
+    path = os.path.join(folder, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    used = time.time() - age
+    os.utime(path, (used, used))
+    return path
+
+
+def test_ttl_expiry():
+    """Files older than their folder's TTL are removed; others are kept."""
+    print("Testing TTL expiry...")
+    short, long = tempfile.mkdtemp(), tempfile.mkdtemp()
+    old = write_file(short, 'old.pdf', 100, age=120)
+    fresh = write_file(short, 'fresh.pdf', 100, age=10)
+    kept = write_file(long, 'old.pdf', 100, age=120)
+    evicted = []
+
+    manager = RetentionManager({short: 60, long: 3600}, on_evict=evicted.append)
+    result = manager.sweep()
+    assert result == {'filesRemoved': 1, 'bytesReclaimed': 100, 'currentBytes': 200}, result
+    assert not os.path.exists(old) and os.path.exists(fresh) and os.path.exists(kept)
+    assert evicted == [old]
+    assert manager.stats()['bytesReclaimedTtl'] == 100
+    print("✅ Test passed!")
+    return True
+
+
+def test_quota_evicts_least_recently_used():
+    """Over quota, the least recently used files go first until it fits."""
+    print("Testing LRU quota eviction...")
+    folder = tempfile.mkdtemp()
+    paths = [write_file(folder, f"file{index}.pdf", 1000, age=100 - index * 10) for index in range(5)]
+
+    manager = RetentionManager({folder: 0}, quota_bytes=2500)
+    result = manager.sweep()
+    assert result == {'filesRemoved': 3, 'bytesReclaimed': 3000, 'currentBytes': 2000}, result
+    assert [os.path.exists(path) for path in paths] == [False, False, False, True, True]
+    assert manager.stats()['bytesReclaimedQuota'] == 3000
+    print("✅ Test passed!")
+    return True
+
+
+def test_quota_over_deduplicated_uploads():
+    """A blob and its fileId links are evicted together and free their size once."""
+    print("Testing quota eviction of deduplicated uploads...")
+    folder = tempfile.mkdtemp()
+    store = ContentStore(folder)
+    links = []
+    for index in range(5):
+        digest = f"{index:02d}" + 'ab' * 31
+        upload = write_file(folder, f"upload{index}.tmp", 1000)
+        store.commit(upload, digest, os.path.join(folder, f"file{index}_doc.pdf"))
+        # A second fileId with the same content
+        duplicate = write_file(folder, f"duplicate{index}.tmp", 1000)
+        store.commit(duplicate, digest, os.path.join(folder, f"copy{index}_doc.pdf"))
+        used = time.time() - 100 + index * 10
+        os.utime(store.blob_path(digest), (used, used))
+        links.append(os.path.join(folder, f"file{index}_doc.pdf"))
+    if os.stat(links[0]).st_nlink == 1:
+        print("⏭️ Skipped: no hard links on this filesystem")
+        return True
+
+    evicted = []
+    manager = RetentionManager({folder: 0}, quota_bytes=4500, on_evict=evicted.append)
+    result = manager.sweep()
+    # Only the oldest blob and its two links had to go
+    assert result == {'filesRemoved': 3, 'bytesReclaimed': 1000, 'currentBytes': 4000}, result
+    assert [os.path.exists(path) for path in links] == [False, True, True, True, True]
+    assert len(evicted) == 3 and not os.path.exists(store.blob_path('00' + 'ab' * 31))
+    print("✅ Test passed!")
+    return True
+
+
+def test_remove_failure_continues_sweep():
+    """A file that cannot be removed is counted and the sweep goes on."""
+    print("Testing removal failures...")
+    folder = tempfile.mkdtemp()
+    stuck = write_file(folder, 'stuck.pdf', 100, age=120)
+    old = write_file(folder, 'old.pdf', 100, age=120)
+    remove = os.remove
+
+    def remove_unless_stuck(path):
+        if path == stuck:
+            raise PermissionError(13, 'Permission denied', path)
+        remove(path)
+
+    manager = RetentionManager({folder: 60})
+    with mock.patch('shared.retention.os.remove', remove_unless_stuck):
+        result = manager.sweep()
+    assert result['filesRemoved'] == 1 and os.path.exists(stuck) and not os.path.exists(old)
+    stats = manager.stats()
+    assert stats['removeFailures'] == 1 and stuck in stats['lastError']
+    print("✅ Test passed!")
+    return True
+
+
+def test_protected_paths():
+    """Protected files survive both TTL expiry and quota eviction."""
+    print("Testing protected paths...")
+    folder = tempfile.mkdtemp()
+    busy = write_file(folder, 'busy.pdf', 1000, age=500)
+    idle = write_file(folder, 'idle.pdf', 1000, age=400)
+    recent = write_file(folder, 'recent.pdf', 1000, age=10)
+
+    manager = RetentionManager({folder: 300}, quota_bytes=1500, protect=lambda path: path == busy)
+    manager.sweep()
+    assert os.path.exists(busy) and not os.path.exists(idle)
+    # Still over quota, but the only other file is protected
+    assert not os.path.exists(recent)
+    assert manager.stats()['currentBytes'] == 1000
+    print("✅ Test passed!")
+    return True
+
+
+def test_prune_empty_dirs():
+    """Empty folders below a root are removed; the root and hidden folders stay."""
+    print("Testing pruning of empty folders...")
+    folder = tempfile.mkdtemp()
+    write_file(folder, os.path.join('job1', 'file1', 'old.csv'), 10, age=120)
+    kept = write_file(folder, os.path.join('job2', 'out.csv'), 10)
+    os.makedirs(os.path.join(folder, 'empty', 'nested'))
+    os.makedirs(os.path.join(folder, '.hidden'))
+
+    RetentionManager({folder: 60}).sweep()
+    assert sorted(os.listdir(folder)) == ['.hidden', 'job2']
+    assert os.path.exists(kept)
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_ttl_expiry(),
+            test_quota_evicts_least_recently_used(),
+            test_quota_over_deduplicated_uploads(),
+            test_remove_failure_continues_sweep(),
+            test_protected_paths(),
+            test_prune_empty_dirs(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
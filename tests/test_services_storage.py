@@ -0,0 +1,122 @@
+"""
+Test the upload, conversion and download services against object storage.
+
+All three Flask apps run in-process with STORAGE_BACKEND=s3 on moto's S3
+mock, so nothing is shared through the local filesystem: uploads, converted
+outputs and metadata records all go through the bucket.
+"""
+import importlib.util
+import io
+import os
+import sys
+import time
+import zipfile
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import boto3
+from moto import mock_aws
+
+BUCKET = 'pdf-to-csv-services-test'
+
+# Minimal single-page PDF with a few lines of text
+DUMMY_PDF = b"""%PDF-1.4
+1 0 obj
+<< /Type /Catalog /Pages 2 0 R >>
+endobj
+2 0 obj
+<< /Type /Pages /Kids [3 0 R] /Count 1 >>
+endobj
+3 0 obj
+<< /Type /Page /Parent 2 0 R /Resources 4 0 R /MediaBox [0 0 612 792] /Contents 5 0 R >>
+endobj
+4 0 obj
+<< /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >>
+endobj
+5 0 obj
+<< /Length 72 >>
+stream
+BT
+/F1 12 Tf
+50 700 Td
+(Hello World) Tj
+0 -20 Td
+(Second line) Tj
+ET
+endstream
+endobj
+trailer
+<< /Size 6 /Root 1 0 R >>
+%%EOF
+"""
+
+
+def load_service(name):
+    """Import services/<name>/app.py under a unique module name."""
+    service_dir = os.path.join(ROOT, 'services', name)
+    sys.path.insert(0, service_dir)
+    spec = importlib.util.spec_from_file_location(f'{name}_service_app', os.path.join(service_dir, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@mock_aws
+@mock.patch.dict(os.environ, {
+    'STORAGE_BACKEND': 's3',
+    'S3_BUCKET': BUCKET,
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    # Per-run buckets, so repeated runs do not spend the host's hourly limits
+    'RATE_LIMIT_STORE': 'memory'
+})
+def test_services_share_object_storage():
+    """Upload, convert and download with every byte going through S3."""
+    print("Testing services on object storage...")
+    s3 = boto3.client('s3', region_name='us-east-1')
+    s3.create_bucket(Bucket=BUCKET)
+
+    upload = load_service('upload').app.test_client()
+    conversion = load_service('conversion').app.test_client()
+    download = load_service('download').app.test_client()
+
+    r = upload.post('/api/upload', data={'file': (io.BytesIO(DUMMY_PDF), 'report.pdf')},
+                    content_type='multipart/form-data')
+    assert r.status_code == 200, r.get_data(as_text=True)
+    file_id = r.get_json()['data']['fileId']
+    assert s3.head_object(Bucket=BUCKET, Key=f'pdf-to-csv-uploads/{file_id}_report.pdf')
+
+    r = conversion.post('/api/convert', json={'fileIds': [file_id], 'outputFormat': 'csv'})
+    job_id = r.get_json()['data']['jobId']
+    for _ in range(100):
+        status = conversion.get(f'/api/status/{job_id}').get_json()['data']
+        if status['status'] in ('completed', 'error'):
+            break
+        time.sleep(0.1)
+    assert status['status'] == 'completed', status
+    converted = status['convertedFiles']
+    assert converted and all(f['storageKey'].startswith(f'pdf-to-csv-converted/{job_id}/') for f in converted)
+
+    r = download.get(f"/api/download/{converted[0]['fileId']}")
+    assert r.status_code == 200 and b'Hello World' in r.data
+
+    r = download.post('/api/download/batch', json={'fileIds': [converted[0]['fileId'], 'missing']})
+    with zipfile.ZipFile(io.BytesIO(r.data)) as zf:
+        assert zf.namelist() == [converted[0]['filename']]
+
+    r = download.delete(f'/api/cleanup/{job_id}')
+    assert r.status_code == 200
+    assert download.get(f"/api/download/{converted[0]['fileId']}").status_code == 404
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = test_services_share_object_storage()
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
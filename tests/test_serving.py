@@ -0,0 +1,138 @@
+"""
+Test production serving: server settings from the environment, shutdown
+callbacks, worker recycling, and conversion consumers retiring after
+max_jobs jobs.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'services', 'conversion'))
+
+from shared.serving import server_settings
+from job_store import MemoryJobStore
+from work_queue import SQLiteWorkQueue
+from worker import ConversionWorker
+from test_profiling import DUMMY_PDF
+
+
+def test_server_settings():
+    """Defaults per service; prefixed variables win; derived values follow overrides."""
+    print("Testing server settings...")
+    conversion = server_settings('conversion', {})
+    assert conversion['port'] == 5002 and conversion['workers'] == 2
+    assert conversion['timeout'] >= conversion['graceful_timeout']
+    assert conversion['max_requests_jitter'] == conversion['max_requests'] // 10
+
+    settings = server_settings('upload', {
+        'WEB_CONCURRENCY': '3', 'UPLOAD_WEB_CONCURRENCY': '5', 'DOWNLOAD_WEB_THREADS': '2',
+        'GRACEFUL_TIMEOUT': '100'
+    })
+    assert settings['workers'] == 5 and settings['threads'] == 8
+    # A longer drain lengthens the heartbeat timeout with it
+    assert settings['timeout'] == 130
+
+    for environ in ({'WEB_THREADS': 'many'}, {'WEB_CONCURRENCY': '0'}, {'WORKER_TIMEOUT': '5'},
+                    {'MAX_REQUESTS_PER_WORKER': '10', 'MAX_REQUESTS_JITTER': '20'}):
+        try:
+            server_settings('download', environ)
+        except ValueError:
+            continue
+        raise AssertionError(f"{environ} was accepted")
+    try:
+        server_settings('frontend', {})
+        raise AssertionError('unknown service was accepted')
+    except ValueError:
+        pass
+    print("✅ Test passed!")
+    return True
+
+
+def test_shutdown_and_recycle():
+    """Shutdown callbacks run once per process; recycling needs a master."""
+    print("Testing shutdown and recycling...")
+    # In a child process: the serving state is per process
+    script = textwrap.dedent(f"""
+        import signal, sys, threading
+        sys.path.insert(0, {ROOT!r})
+        from shared.serving import mark_supervised, on_shutdown, request_recycle, shutdown
+
+        calls = []
+        on_shutdown(lambda timeout: calls.append(('drain', timeout)))
+        on_shutdown(lambda timeout: 1 / 0)
+        on_shutdown(lambda timeout: calls.append(('after', timeout)))
+        threads = [threading.Thread(target=shutdown, args=(5,)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert calls == [('drain', 5), ('after', 5)], calls
+
+        assert request_recycle() is False
+        terms = []
+        signal.signal(signal.SIGTERM, lambda sig, frame: terms.append(sig))
+        mark_supervised()
+        assert request_recycle() is True
+        assert terms == [signal.SIGTERM], terms
+        print('ok')
+    """)
+    if sys.platform == 'win32':
+        print("⏭️ Skipped: recycling is POSIX-only")
+        return True
+    result = subprocess.run([sys.executable, '-c', script], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    assert result.returncode == 0 and result.stdout.strip() == 'ok', result.stdout
+    print("✅ Test passed!")
+    return True
+
+
+def test_worker_retires_after_max_jobs():
+    """Consumers stop leasing after max_jobs jobs; the rest stays queued."""
+    print("Testing conversion worker retirement...")
+    folder = tempfile.mkdtemp()
+    pdf_path = os.path.join(folder, 'doc.pdf')
+    with open(pdf_path, 'wb') as f:
+        f.write(DUMMY_PDF)
+
+    jobs = MemoryJobStore()
+    queue = SQLiteWorkQueue(os.path.join(folder, 'queue.db'))
+    retired = []
+    worker = ConversionWorker(
+        folder, os.path.join(folder, 'converted'), jobs, None, work_queue=queue,
+        isolate_extraction=False, max_jobs=2, on_retire=lambda: retired.append(time.time())
+    )
+    file_infos = [{'fileId': 'file1', 'filename': 'doc.pdf', 'filepath': pdf_path}]
+    for index in range(3):
+        job_id = f"job{index}"
+        jobs.create({'jobId': job_id, 'status': 'pending', 'progress': 0, 'createdAt': '2024-01-01T00:00:00'})
+        queue.enqueue(job_id, {'fileInfos': file_infos, 'parser': 'pdfplumber', 'merge': False, 'outputFormat': 'csv'})
+
+    worker.start_consumers(1, poll_interval=0.05)
+    consumers = list(worker._consumers)
+    for thread in consumers:
+        thread.join(30)
+    assert not any(thread.is_alive() for thread in consumers)
+
+    statuses = sorted(jobs.get(f"job{index}")['status'] for index in range(3))
+    assert statuses == ['completed', 'completed', 'pending'], statuses
+    assert len(retired) == 1
+    assert queue.stats()['queued'] == 1
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_server_settings(),
+            test_shutdown_and_recycle(),
+            test_worker_retires_after_max_jobs(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
@@ -0,0 +1,436 @@
+"""
+Test the storage backends (read-through cache, bulk and async access)
+against a local S3 stand-in.
+
+Uses moto's in-process S3 mock, so no network or AWS account is needed. The
+multipart writer and the ranged reader are tested against a stub client that
+records every call, so part boundaries and ranges can be checked exactly.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import boto3
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from shared.async_storage import ThreadedAsyncStorageBackend
+from shared.storage import CachedStorageBackend, LocalStorageBackend, S3StorageBackend, _S3MultipartWriter, map_file
+
+BUCKET = 'pdf-to-csv-test'
+
+
+def make_backend():
+    """Create an S3 backend with a fresh bucket on the stand-in."""
+    client = boto3.client(
+        's3',
+        region_name='us-east-1',
+        aws_access_key_id='testing',
+        aws_secret_access_key='testing'
+    )
+    client.create_bucket(Bucket=BUCKET)
+    return S3StorageBackend(bucket=BUCKET, client=client)
+
+
+class CountingBackend:
+    """Wraps a backend and counts object reads."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def open_read(self, key):
+        with self._lock:
+            self.reads += 1
+        return self.backend.open_read(key)
+
+
+@mock_aws
+def test_read_through_and_invalidation():
+    """Repeated loads are served locally; remote changes are picked up."""
+    print("Testing read-through caching...")
+    s3 = make_backend()
+    s3.save('uploads/a.pdf', b'%PDF-1.4 first')
+    counting = CountingBackend(s3)
+    cache = CachedStorageBackend(counting, tempfile.mkdtemp(), revalidate_after=0)
+
+    assert cache.load('uploads/a.pdf') == b'%PDF-1.4 first'
+    assert cache.load('uploads/a.pdf') == b'%PDF-1.4 first'
+    assert counting.reads == 1
+
+    # Changed remotely: the ETag no longer matches, so the entry is refetched
+    s3.save('uploads/a.pdf', b'%PDF-1.4 second')
+    assert cache.load('uploads/a.pdf') == b'%PDF-1.4 second'
+    assert counting.reads == 2
+    print("✅ Test passed!")
+    return True
+
+
+@mock_aws
+def test_single_flight_misses():
+    """Concurrent misses for one key trigger a single fetch."""
+    print("Testing single-flight misses...")
+    s3 = make_backend()
+    s3.save('uploads/big.pdf', os.urandom(2 * 1024 * 1024))
+    counting = CountingBackend(s3)
+    cache = CachedStorageBackend(counting, tempfile.mkdtemp())
+
+    threads = [threading.Thread(target=cache.load, args=('uploads/big.pdf',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counting.reads == 1
+    print("✅ Test passed!")
+    return True
+
+
+@mock_aws
+def test_lru_eviction_and_checksum():
+    """The cache stays under its byte limit and rejects corrupted entries."""
+    print("Testing LRU eviction and checksum validation...")
+    s3 = make_backend()
+    for name in ('a', 'b', 'c'):
+        s3.save(f'converted/{name}.csv', name.encode() * 1000)
+    cache_dir = tempfile.mkdtemp()
+    cache = CachedStorageBackend(s3, cache_dir, max_bytes=2500)
+
+    for name in ('a', 'b', 'c'):
+        cache.load(f'converted/{name}.csv')
+    stats = cache.stats()
+    assert stats['bytes'] <= 2500 and stats['evictions'] == 1
+
+    # A restarted process re-adopts entries but checksums them before use
+    path = cache.local_path('converted/c.csv')
+    with open(path, 'wb') as f:
+        f.write(b'x' * 1000)
+    restarted = CachedStorageBackend(s3, cache_dir, max_bytes=2500)
+    assert restarted.load('converted/c.csv') == b'c' * 1000
+    print("✅ Test passed!")
+    return True
+
+
+@mock_aws
+def test_pinned_copies_and_stale_files():
+    """Handed-out copies survive eviction; leftover temp files are swept on start."""
+    print("Testing pinned copies and stale cache files...")
+    s3 = make_backend()
+    for name in ('a', 'b', 'c'):
+        s3.save(f'converted/{name}.csv', name.encode() * 1000)
+    cache_dir = tempfile.mkdtemp()
+    cache = CachedStorageBackend(s3, cache_dir, max_bytes=2500)
+
+    with cache.local_copy('converted/a.csv') as path:
+        cache.load('converted/b.csv')
+        cache.load('converted/c.csv')
+        assert 'converted/a.csv' not in cache._entries
+        with open(path, 'rb') as f:
+            assert f.read() == b'a' * 1000
+    assert not os.path.exists(path)
+
+    # Left by a failed fetch and a process that died while reading
+    stale = time.time() - 2 * 24 * 60 * 60
+    leftovers = [os.path.join(cache_dir, 'abc.tmp'), os.path.join(cache_dir, '.pinned', 'abc.csv')]
+    fresh = os.path.join(cache_dir, 'def.tmp')
+    for leftover in leftovers + [fresh]:
+        with open(leftover, 'wb') as f:
+            f.write(b'x' * 100)
+    for leftover in leftovers:
+        os.utime(leftover, (stale, stale))
+    CachedStorageBackend(s3, cache_dir, max_bytes=2500)
+    assert not any(os.path.exists(leftover) for leftover in leftovers)
+    assert os.path.exists(fresh)
+    print("✅ Test passed!")
+    return True
+
+
+@mock_aws
+def test_bulk_operations():
+    """Bulk calls cover many keys; deletes are batched into multi-object requests."""
+    print("Testing bulk operations...")
+    s3 = make_backend()
+    items = {f'converted/job/{i}.csv': str(i).encode() for i in range(1200)}
+    s3.save_many(items)
+
+    loaded = s3.load_many(['converted/job/1.csv', 'converted/job/2.csv', 'converted/missing.csv'])
+    assert loaded == {'converted/job/1.csv': b'1', 'converted/job/2.csv': b'2'}
+    assert s3.exists_many(['converted/job/3.csv', 'converted/missing.csv']) == {
+        'converted/job/3.csv': True, 'converted/missing.csv': False
+    }
+
+    cache = CachedStorageBackend(s3, tempfile.mkdtemp())
+    assert cache.load('converted/job/5.csv') == b'5'
+    cache.delete_many(items)
+    assert not any(s3.exists_many(list(items)[::100]).values())
+    assert cache.load_many(['converted/job/5.csv']) == {}
+    print("✅ Test passed!")
+    return True
+
+
+@mock_aws
+def test_async_streaming():
+    """The async adapter streams reads and writes without blocking the loop."""
+    print("Testing async streaming...")
+    storage = ThreadedAsyncStorageBackend(make_backend())
+
+    async def chunks():
+        for _ in range(3):
+            yield b'x' * (4 * 1024 * 1024)
+
+    async def failing_chunks():
+        yield b'partial'
+        raise RuntimeError('client disconnected')
+
+    async def run():
+        await storage.write_stream('converted/big.csv', chunks())
+        received = [chunk async for chunk in storage.iter_read('converted/big.csv', 1024 * 1024)]
+        assert len(received) == 12 and sum(map(len, received)) == 12 * 1024 * 1024
+
+        try:
+            await storage.write_stream('converted/partial.csv', failing_chunks())
+        except RuntimeError:
+            pass
+        assert not await storage.exists('converted/partial.csv')
+
+    asyncio.run(run())
+    print("✅ Test passed!")
+    return True
+
+
+def client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'operation')
+
+
+class StubS3Client:
+    """
+    Minimal S3 client keeping objects in a dict and recording every call.
+    Uploading part fail_part, or completing the upload when fail_complete is
+    set, raises like S3 would.
+    """
+
+    def __init__(self, fail_part=None, fail_complete=False):
+        self.objects = {}
+        self.calls = []
+        self.fail_part = fail_part
+        self.fail_complete = fail_complete
+        self._uploads = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.calls.append(('put_object', len(Body)))
+        self.objects[Key] = bytes(Body)
+        return {}
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = f"upload{len(self._uploads) + 1}"
+        self._uploads[upload_id] = {}
+        self.calls.append(('create_multipart_upload',))
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append(('upload_part', PartNumber, len(Body)))
+        if PartNumber == self.fail_part:
+            raise client_error('InternalError')
+        self._uploads[UploadId][PartNumber] = bytes(Body)
+        return {'ETag': f'"etag{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append(('complete_multipart_upload', [part['PartNumber'] for part in MultipartUpload['Parts']]))
+        if self.fail_complete:
+            raise client_error('InvalidPart')
+        parts = self._uploads.pop(UploadId)
+        self.objects[Key] = b''.join(parts[part['PartNumber']] for part in MultipartUpload['Parts'])
+        return {}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append(('abort_multipart_upload',))
+        self._uploads.pop(UploadId, None)
+        return {}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise client_error('404')
+        return {'ContentLength': len(self.objects[Key]), 'ETag': self._etag(Key)}
+
+    def get_object(self, Bucket, Key, Range, IfMatch=None):
+        self.calls.append(('get_object', Range))
+        if IfMatch is not None and IfMatch != self._etag(Key):
+            raise client_error('PreconditionFailed')
+        start = int(Range[len('bytes='):].rstrip('-'))
+        return {'Body': io.BytesIO(self.objects[Key][start:])}
+
+    def _etag(self, Key):
+        return f'"{hashlib.md5(self.objects[Key]).hexdigest()}"'
+
+
+def test_multipart_part_boundaries():
+    """Writes are cut into fixed-size parts; small objects are a single PUT."""
+    print("Testing multipart part boundaries...")
+    client = StubS3Client()
+    data = os.urandom(31)
+    with _S3MultipartWriter(client, BUCKET, 'big.csv', part_size=10) as writer:
+        for start, end in ((0, 3), (3, 18), (18, 22), (22, 31)):
+            writer.write(data[start:end])
+    assert client.calls == [
+        ('create_multipart_upload',),
+        ('upload_part', 1, 10), ('upload_part', 2, 10), ('upload_part', 3, 10),
+        # The remainder is the last part, sent on close
+        ('upload_part', 4, 1),
+        ('complete_multipart_upload', [1, 2, 3, 4])
+    ]
+    assert client.objects['big.csv'] == data
+
+    # An exact multiple of the part size has no empty trailing part
+    client = StubS3Client()
+    with _S3MultipartWriter(client, BUCKET, 'even.csv', part_size=10) as writer:
+        writer.write(data[:20])
+    assert [call for call in client.calls if call[0] == 'upload_part'] == [('upload_part', 1, 10), ('upload_part', 2, 10)]
+
+    client = StubS3Client()
+    with _S3MultipartWriter(client, BUCKET, 'small.csv', part_size=10) as writer:
+        writer.write(data[:9])
+    assert client.calls == [('put_object', 9)] and client.objects['small.csv'] == data[:9]
+    print("✅ Test passed!")
+    return True
+
+
+def test_multipart_abort_on_error():
+    """A failed part, a failed completion or an exception aborts the upload."""
+    print("Testing multipart abort on error...")
+    data = os.urandom(35)
+
+    client = StubS3Client(fail_part=2)
+    try:
+        with _S3MultipartWriter(client, BUCKET, 'big.csv', part_size=10) as writer:
+            writer.write(data)
+        raise AssertionError('failed part was not raised')
+    except ClientError:
+        pass
+    assert client.calls[-1] == ('abort_multipart_upload',) and 'big.csv' not in client.objects
+
+    client = StubS3Client(fail_complete=True)
+    writer = _S3MultipartWriter(client, BUCKET, 'big.csv', part_size=10)
+    writer.write(data)
+    try:
+        writer.close()
+        raise AssertionError('failed completion was not raised')
+    except ClientError:
+        pass
+    assert client.calls[-1] == ('abort_multipart_upload',) and writer.closed
+    assert 'big.csv' not in client.objects
+
+    client = StubS3Client()
+    try:
+        with _S3MultipartWriter(client, BUCKET, 'big.csv', part_size=10) as writer:
+            writer.write(data)
+            raise RuntimeError('client disconnected')
+    except RuntimeError:
+        pass
+    assert client.calls[-1] == ('abort_multipart_upload',)
+    assert not any(call[0] == 'complete_multipart_upload' for call in client.calls)
+    print("✅ Test passed!")
+    return True
+
+
+def test_ranged_reader():
+    """Sequential reads share one ranged GET; a seek starts a new range."""
+    print("Testing ranged reader...")
+    client = StubS3Client()
+    data = os.urandom(3 * 1024 * 1024)
+    client.objects['doc.pdf'] = data
+    backend = S3StorageBackend(bucket=BUCKET, client=client)
+
+    with backend.open_read('doc.pdf') as f:
+        assert f.read(1000) == data[:1000]
+        assert f.read(2 * 1024 * 1024) == data[1000:1000 + 2 * 1024 * 1024]
+        assert client.calls == [('get_object', 'bytes=0-')]
+
+        f.seek(-100, io.SEEK_END)
+        assert f.read() == data[-100:]
+        f.seek(5000)
+        assert f.read(10) == data[5000:5010]
+        assert client.calls[1:] == [('get_object', f"bytes={len(data) - 100}-"), ('get_object', 'bytes=5000-')]
+        assert f.read(0) == b'' and f.tell() == 5010
+
+        # A new version between ranges fails instead of mixing bytes
+        client.objects['doc.pdf'] = os.urandom(len(data))
+        f.seek(0)
+        try:
+            f.read(10)
+            raise AssertionError('read across object versions')
+        except ClientError as e:
+            assert e.response['Error']['Code'] == 'PreconditionFailed'
+
+    try:
+        backend.open_read('missing.pdf')
+        raise AssertionError('missing key was opened')
+    except FileNotFoundError:
+        pass
+    print("✅ Test passed!")
+    return True
+
+
+@mock_aws
+def test_memory_mapped_reads():
+    """map_file and load_mmap give a read-only buffer that is also a seekable file."""
+    print("Testing memory-mapped reads...")
+    folder = tempfile.mkdtemp()
+    local = LocalStorageBackend(folder)
+    data = os.urandom(100000)
+    local.save('uploads/doc.pdf', data)
+
+    with local.load_mmap('uploads/doc.pdf') as mapped:
+        assert len(mapped) == len(data) and mapped[:10] == data[:10]
+        assert bytes(memoryview(mapped)[-5:]) == data[-5:]
+        mapped.seek(50000)
+        assert mapped.read(10) == data[50000:50010] and mapped.tell() == 50010
+        try:
+            mapped[0:1] = b'x'
+            raise AssertionError('memory map is writable')
+        except TypeError:
+            pass
+
+    # Empty files cannot be mapped and read as an empty file instead
+    local.save('uploads/empty.pdf', b'')
+    with map_file(local.storage_path('uploads/empty.pdf')) as mapped:
+        assert mapped.read() == b''
+
+    # The cache maps its local copy of a remote object
+    backend = make_backend()
+    backend.save('uploads/doc.pdf', data)
+    cached = CachedStorageBackend(backend, tempfile.mkdtemp())
+    with cached.load_mmap('uploads/doc.pdf') as mapped:
+        assert mapped[:] == data
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_read_through_and_invalidation(),
+            test_single_flight_misses(),
+            test_lru_eviction_and_checksum(),
+            test_pinned_copies_and_stale_files(),
+            test_bulk_operations(),
+            test_async_streaming(),
+            test_multipart_part_boundaries(),
+            test_multipart_abort_on_error(),
+            test_ranged_reader(),
+            test_memory_mapped_reads(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
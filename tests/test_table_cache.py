@@ -0,0 +1,164 @@
+"""
+Test the table cache and speculative pre-extraction: conversions hit the
+cache filled by an earlier extraction or a prefetch, and miss it whenever the
+content, the parser or the entry itself changed.
+"""
+import hashlib
+import os
+import sys
+import tempfile
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'services', 'conversion'))
+
+from shared.metadata import MetadataStore
+from shared.storage import LocalStorageBackend
+from cache import TableCache, table_cache_key
+from job_store import MemoryJobStore
+from worker import ConversionWorker
+from test_profiling import DUMMY_PDF
+
+
+def make_worker():
+    """In-process worker with an empty table cache and a local metadata store."""
+    folder = tempfile.mkdtemp()
+    file_metadata = MetadataStore(LocalStorageBackend(os.path.join(folder, 'storage')))
+    worker = ConversionWorker(
+        folder, os.path.join(folder, 'converted'), MemoryJobStore(), file_metadata,
+        table_cache=TableCache(os.path.join(folder, 'cache')), isolate_extraction=False
+    )
+    return worker, folder
+
+
+def write_pdf(folder, name, data=DUMMY_PDF):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path, hashlib.sha256(data).hexdigest()
+
+
+def count_extractions(worker):
+    """Patch the worker's extraction to count its calls (and still run it)."""
+    return mock.patch.object(worker, '_run_extraction', wraps=worker._run_extraction)
+
+
+def test_cache_entries():
+    """Hits and misses are counted; unreadable entries and bad keys are rejected."""
+    print("Testing table cache entries...")
+    cache = TableCache(tempfile.mkdtemp())
+    key = table_cache_key('ab' * 32, 'pdfplumber')
+    assert table_cache_key(None, 'pdfplumber') is None
+    assert cache.get(key) is None and not cache.contains(key)
+
+    cache.put(key, [[['a', 'b'], ['1', '2']]])
+    assert cache.contains(key) and cache.get(key) == [[['a', 'b'], ['1', '2']]]
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hitRatio': 0.5}
+
+    # A corrupt entry is a miss, and the next put replaces it
+    with open(cache._path(key), 'w') as f:
+        f.write('{not json')
+    assert cache.get(key) is None
+    cache.put(key, [])
+    assert cache.get(key) == []
+
+    try:
+        cache.get('../escape')
+        raise AssertionError('path-like key was accepted')
+    except ValueError:
+        pass
+    print("✅ Test passed!")
+    return True
+
+
+def test_conversion_hits_and_misses():
+    """The second extraction of the same content is served from the cache."""
+    print("Testing cache hits and invalidation...")
+    worker, folder = make_worker()
+    pdf_path, sha256 = write_pdf(folder, 'doc.pdf')
+    key = table_cache_key(sha256, 'pdfplumber')
+
+    with count_extractions(worker) as extraction:
+        tables, _ = worker._extract_tables(pdf_path, 'pdfplumber', key)
+        assert extraction.call_count == 1 and worker.table_cache.get(key) == tables
+        assert worker._extract_tables(pdf_path, 'pdfplumber', key) == (tables, [])
+        assert extraction.call_count == 1
+
+        # Another parser and other content have their own entries
+        worker._extract_tables(pdf_path, 'tabula', table_cache_key(sha256, 'tabula'))
+        assert extraction.call_count == 2
+        changed = DUMMY_PDF.replace(b'Hello World', b'Hello Again')
+        changed_path, changed_sha = write_pdf(folder, 'doc.pdf', changed)
+        changed_tables, _ = worker._extract_tables(changed_path, 'pdfplumber', table_cache_key(changed_sha, 'pdfplumber'))
+        assert extraction.call_count == 3 and changed_tables != tables
+    print("✅ Test passed!")
+    return True
+
+
+def test_partial_results_are_not_cached():
+    """Extractions with page errors are returned but never cached."""
+    print("Testing that partial results are not cached...")
+    worker, folder = make_worker()
+    pdf_path, sha256 = write_pdf(folder, 'doc.pdf')
+    key = table_cache_key(sha256, 'pdfplumber')
+    partial = ([[['row']]], [{'page': 2, 'error': 'Page timed out after 30s'}])
+
+    with mock.patch.object(worker, '_run_extraction', return_value=partial):
+        assert worker._extract_tables(pdf_path, 'pdfplumber', key) == partial
+    assert not worker.table_cache.contains(key)
+    print("✅ Test passed!")
+    return True
+
+
+def test_prefetch_fills_cache():
+    """A prefetched upload converts without extracting again."""
+    print("Testing speculative pre-extraction...")
+    worker, folder = make_worker()
+    pdf_path, sha256 = write_pdf(folder, 'doc.pdf')
+    worker.file_metadata.put('files', 'file1', {'fileId': 'file1', 'filepath': pdf_path, 'sha256': sha256})
+    key = table_cache_key(sha256, 'pdfplumber')
+
+    assert worker.prefetch(['file1', 'missing']) == 1
+    worker._prefetch_executor.submit(lambda: None).result(30)
+    assert worker.table_cache.contains(key)
+    assert worker.speculation_stats == {'queued': 1, 'completed': 1, 'cancelled': 0, 'failed': 0}
+    # Already cached: nothing more to do
+    assert worker.prefetch(['file1']) == 0
+
+    with count_extractions(worker) as extraction:
+        tables, page_errors = worker._extract_tables(pdf_path, 'pdfplumber', key)
+    assert extraction.call_count == 0 and tables and page_errors == []
+    print("✅ Test passed!")
+    return True
+
+
+def test_prefetch_yields_to_jobs():
+    """Speculative extraction is cancelled while the service is busy."""
+    print("Testing speculation under load...")
+    worker, folder = make_worker()
+    pdf_path, sha256 = write_pdf(folder, 'doc.pdf')
+    worker.file_metadata.put('files', 'file1', {'fileId': 'file1', 'filepath': pdf_path, 'sha256': sha256})
+
+    worker._active_jobs = worker.speculation_max_active + 1
+    assert worker.prefetch(['file1']) == 1
+    worker._prefetch_executor.submit(lambda: None).result(30)
+    assert worker.speculation_stats['cancelled'] == 1
+    assert not worker.table_cache.contains(table_cache_key(sha256, 'pdfplumber'))
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_cache_entries(),
+            test_conversion_hits_and_misses(),
+            test_partial_results_are_not_cached(),
+            test_prefetch_fills_cache(),
+            test_prefetch_yields_to_jobs(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
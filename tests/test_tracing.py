@@ -0,0 +1,118 @@
+"""
+Test tracing spans: per-stage timings, Chrome trace export, no recording
+without a bound trace, and spans reported by the extraction child process.
+"""
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'services', 'conversion'))
+
+from shared.tracing import NOOP_SPAN, Trace, activate, span, traced
+from isolation import extract_isolated
+
+# Minimal single-page PDF with a few lines of text
+DUMMY_PDF = b"""%PDF-1.4
+1 0 obj
+<< /Type /Catalog /Pages 2 0 R >>
+endobj
+2 0 obj
+<< /Type /Pages /Kids [3 0 R] /Count 1 >>
+endobj
+3 0 obj
+<< /Type /Page /Parent 2 0 R /Resources 4 0 R /MediaBox [0 0 612 792] /Contents 5 0 R >>
+endobj
+4 0 obj
+<< /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >>
+endobj
+5 0 obj
+<< /Length 72 >>
+stream
+BT
+/F1 12 Tf
+50 700 Td
+(Hello World) Tj
+0 -20 Td
+(Second line) Tj
+ET
+endstream
+endobj
+trailer
+<< /Size 6 /Root 1 0 R >>
+%%EOF
+"""
+
+
+@traced()
+def analyze(rows):
+    return len(rows)
+
+
+def test_spans_and_timings():
+    """Spans of the bound trace add up per name; nothing is recorded without one."""
+    print("Testing spans and timings...")
+    assert span('extract') is NOOP_SPAN
+    assert analyze([1, 2]) == 2
+
+    trace = Trace('job1')
+    with activate(trace):
+        with span('extract', pages=2):
+            for _ in range(3):
+                analyze([1])
+        writing = span('write')
+        writing.end()
+    assert span('after') is NOOP_SPAN
+
+    timings = trace.timings()
+    assert set(timings) == {'extract', 'analyze', 'write'}
+    assert timings['analyze']['count'] == 3 and timings['extract']['count'] == 1
+    assert timings['extract']['ms'] >= timings['analyze']['ms'] >= 0
+
+    path = trace.export(os.path.join(tempfile.mkdtemp(), 'traces', 'job1.json'))
+    with open(path) as f:
+        events = json.load(f)['traceEvents']
+    assert len(events) == 5 and all(event['ph'] == 'X' for event in events)
+    extract = next(event for event in events if event['name'] == 'extract')
+    assert extract['args'] == {'pages': 2} and extract['dur'] >= 0
+    print("✅ Test passed!")
+    return True
+
+
+def test_child_spans_are_merged():
+    """The isolated extraction child reports its page spans into the caller's trace."""
+    print("Testing spans from the extraction child...")
+    pdf_path = os.path.join(tempfile.mkdtemp(), 'doc.pdf')
+    with open(pdf_path, 'wb') as f:
+        f.write(DUMMY_PDF)
+
+    trace = Trace('job2')
+    with activate(trace):
+        results, page_errors = extract_isolated(pdf_path, 'text', page_timeout=30)
+    assert results == {1: [['Hello World'], ['Second line']]} and page_errors == []
+
+    events = trace.to_chrome()['traceEvents']
+    pages = [event for event in events if event['name'] == 'page']
+    assert len(pages) == 1 and pages[0]['args']['page'] == 1
+    assert pages[0]['pid'] != os.getpid()
+    assert 'page.extract_text' in trace.timings()
+
+    # Untraced extraction leaves no spans behind
+    assert extract_isolated(pdf_path, 'text', page_timeout=30)[0] == results
+    assert len(trace.to_chrome()['traceEvents']) == len(events)
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_spans_and_timings(),
+            test_child_spans_are_merged(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)
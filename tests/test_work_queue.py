@@ -0,0 +1,150 @@
+"""
+Test the persistent conversion work queue: leases, heartbeats, crash
+recovery and dead-lettering.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'services', 'conversion')))
+
+import work_queue
+from work_queue import QueueFull, SQLiteWorkQueue
+
+# Retry immediately instead of backing off
+work_queue.RETRY_BACKOFF_SECONDS = 0
+
+
+def make_queue(**kwargs):
+    return SQLiteWorkQueue(os.path.join(tempfile.mkdtemp(), 'queue.db'), **kwargs)
+
+
+def test_lease_and_complete():
+    """A task is handed to exactly one consumer and survives a restart."""
+    print("Testing lease and complete...")
+    queue = make_queue()
+    queue.enqueue('job1', {'parser': 'pdfplumber'})
+
+    # A new queue object on the same file stands in for a restarted process
+    restarted = SQLiteWorkQueue(queue.path)
+    task = restarted.lease('worker-a')
+    assert task['jobId'] == 'job1' and task['payload'] == {'parser': 'pdfplumber'}
+    assert queue.lease('worker-b') is None
+
+    restarted.complete(task['taskId'], 'worker-a')
+    assert queue.stats()['done'] == 1
+    print("✅ Test passed!")
+    return True
+
+
+def test_expired_lease_is_retried():
+    """A task whose worker stops heartbeating goes back to the queue."""
+    print("Testing crash recovery...")
+    queue = make_queue(lease_seconds=0.2)
+    queue.enqueue('job1', {})
+
+    task = queue.lease('crashed-worker')
+    time.sleep(0.1)
+    assert queue.heartbeat(task['taskId'], 'crashed-worker')
+    assert queue.reap_expired() == []
+
+    time.sleep(0.3)
+    reaped = queue.reap_expired()
+    assert [(t['jobId'], state) for t, state in reaped] == [('job1', 'queued')]
+    assert not queue.heartbeat(task['taskId'], 'crashed-worker')
+
+    retry = queue.lease('worker-b')
+    assert retry['taskId'] == task['taskId'] and retry['attempts'] == 2
+    print("✅ Test passed!")
+    return True
+
+
+def test_dead_letter_after_max_attempts():
+    """Tasks that keep failing are dead-lettered instead of retried forever."""
+    print("Testing dead-lettering...")
+    queue = make_queue(max_attempts=2)
+    queue.enqueue('job1', {})
+
+    assert queue.fail(queue.lease('w')['taskId'], 'w', 'boom') == 'queued'
+    assert queue.fail(queue.lease('w')['taskId'], 'w', 'boom') == 'dead'
+    assert queue.lease('w') is None
+    assert queue.stats()['dead'] == 1
+    print("✅ Test passed!")
+    return True
+
+
+def test_weighted_round_robin():
+    """Interactive tasks get three of every four leases while both classes wait."""
+    print("Testing weighted round-robin...")
+    queue = make_queue()
+    for index in range(8):
+        queue.enqueue(f'bulk{index}', {}, priority='bulk')
+    for index in range(6):
+        queue.enqueue(f'interactive{index}', {}, priority='interactive')
+
+    order = [queue.lease('w')['jobId'][:4] for _ in range(8)]
+    assert order == ['inte', 'inte', 'inte', 'bulk', 'inte', 'inte', 'inte', 'bulk']
+    # Once interactive work runs out, bulk gets every lease
+    assert queue.lease('w')['jobId'].startswith('bulk')
+    print("✅ Test passed!")
+    return True
+
+
+def test_fair_share_between_clients():
+    """A client's backlog does not hold back another client's task."""
+    print("Testing fair share...")
+    queue = make_queue()
+    for index in range(50):
+        queue.enqueue(f'big{index}', {}, client_id='big-customer')
+    queue.enqueue('invoice', {}, client_id='small-customer')
+
+    first, second = queue.lease('w'), queue.lease('w')
+    assert first['jobId'] == 'big0' and second['jobId'] == 'invoice'
+    print("✅ Test passed!")
+    return True
+
+
+def test_admission_and_running_limits():
+    """Admission limits refuse new tasks; running limits hold a class back."""
+    print("Testing admission limits...")
+    queue = make_queue(client_limit=2, class_limits={'bulk': 3}, running_limits={'bulk': 1})
+    queue.enqueue('a1', {}, client_id='a')
+    queue.enqueue('a2', {}, client_id='a')
+    try:
+        queue.enqueue('a3', {}, client_id='a')
+        assert False, 'expected QueueFull'
+    except QueueFull as e:
+        assert e.scope == 'client'
+
+    for index in range(3):
+        queue.enqueue(f'bulk{index}', {}, priority='bulk', client_id=f'c{index}')
+    try:
+        queue.enqueue('bulk3', {}, priority='bulk', client_id='d')
+        assert False, 'expected QueueFull'
+    except QueueFull as e:
+        assert e.scope == 'class'
+
+    leased = [queue.lease('w')['jobId'] for _ in range(3)]
+    assert sorted(leased) == ['a1', 'a2', 'bulk0'] and queue.lease('w') is None
+    stats = queue.stats()['classes']
+    assert stats['bulk']['queued'] == 2 and stats['bulk']['leased'] == 1
+    assert stats['interactive']['leasedRecently'] == 2
+    print("✅ Test passed!")
+    return True
+
+
+if __name__ == '__main__':
+    try:
+        success = all([
+            test_lease_and_complete(),
+            test_expired_lease_is_retried(),
+            test_dead_letter_after_max_attempts(),
+            test_weighted_round_robin(),
+            test_fair_share_between_clients(),
+            test_admission_and_running_limits(),
+        ])
+        exit(0 if success else 1)
+    except Exception as e:
+        print(f"❌ Test failed: {e}")
+        exit(1)